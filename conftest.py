@@ -0,0 +1,2 @@
+"""Plugins of the tests run by pytest."""
+pytest_plugins = ['robottelo.pytest_plugin']
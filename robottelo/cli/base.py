@@ -1,11 +1,23 @@
 # -*- encoding: utf-8 -*-
 """Generic base class for cli hammer commands."""
 import logging
+import re
+import six
+import time
 
+from functools import partial
 from robottelo import ssh
-from robottelo.cli import hammer
+from robottelo.cli import hammer, hammer_shell
+from robottelo.cli.metrics import metrics
 from robottelo.config import settings
 
+#: Matches the hammer run time in the ``time -p`` output.
+HAMMER_TIME_REGEX = re.compile(r'^real\s+(\d+(?:\.\d+)?)\s*$', re.MULTILINE)
+
+#: Callables called with the CLI class and the options of every entity
+#: deleted by :meth:`Base.delete`.
+DELETE_HOOKS = []
+
 
 class CLIError(Exception):
     """Indicates that a CLI command could not be run."""
@@ -29,6 +41,76 @@ class CLIReturnCodeError(Exception):
         return self.msg
 
 
+class CLICommand(six.text_type):
+    """A hammer command built by :meth:`Base._construct_command`.
+
+    It is the text of the command, which also keeps the ``name`` of the
+    command, the command base and subcommand without the options.
+
+    """
+    def __new__(cls, text, name):
+        command = super(CLICommand, cls).__new__(cls, text)
+        command.name = name
+        return command
+
+
+class LazyInfo(dict):
+    """The fields of a new entity, completed with its info output on demand.
+
+    Holds the fields known right after the entity was created. The first time
+    a missing field is looked up, or all the fields are accessed, ``load`` is
+    called and the fields it returns are added.
+
+    :param dict fields: The fields already known.
+    :param load: A callable returning the info output of the entity.
+
+    """
+    def __init__(self, fields, load):
+        super(LazyInfo, self).__init__(fields)
+        self._load = load
+
+    def load(self):
+        """Add the info output fields, if not done yet."""
+        if self._load is not None:
+            load, self._load = self._load, None
+            self.update(load())
+        return self
+
+    def __missing__(self, key):
+        if self._load is None:
+            raise KeyError(key)
+        return self.load()[key]
+
+    def __contains__(self, key):
+        if self._load is not None and not dict.__contains__(self, key):
+            self.load()
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        """Return the value of ``key`` or ``default`` if it is missing."""
+        return self[key] if key in self else default
+
+
+def _loading(name):
+    """Wrap the ``dict`` method ``name`` to load the info fields first."""
+    method = getattr(dict, name)
+
+    def loading_method(self, *args, **kwargs):
+        """Load the info fields and call the dict method."""
+        self.load()
+        return method(self, *args, **kwargs)
+
+    loading_method.__name__ = name
+    return loading_method
+
+
+for _name in ('__eq__', '__iter__', '__len__', '__ne__', '__repr__', 'copy',
+              'items', 'iteritems', 'iterkeys', 'itervalues', 'keys',
+              'values'):
+    if hasattr(dict, _name):
+        setattr(LazyInfo, _name, _loading(_name))
+
+
 class Base(object):
     """
     @param command_base: base command of hammer.
@@ -86,13 +168,12 @@ class Base(object):
     @since: 27.Nov.2013
     """
     command_base = None  # each inherited instance should define this
-    command_sub = None  # specific to instance, like: create, update, etc
     command_requires_org = False  # True when command requires organization-id
 
     logger = logging.getLogger('robottelo')
 
     @classmethod
-    def _handle_response(cls, response, ignore_stderr=None):
+    def _handle_response(cls, response, ignore_stderr=None, command=None):
         """Verify ``return_code`` of the CLI command.
 
         Check for a non-zero return code or any stderr contents.
@@ -101,6 +182,8 @@ class Base(object):
             :mod:`robottelo.ssh.command`.
         :param ignore_stderr: indicates whether to throw a warning in logs if
             ``stderr`` is not empty.
+        :param command: the command which was run, its name is reported if it
+            is a :class:`CLICommand`.
         :returns: contents of ``stdout``.
         :raises robottelo.cli.base.CLIReturnCodeError: If return code is
             different from zero.
@@ -109,11 +192,10 @@ class Base(object):
             raise CLIReturnCodeError(
                 response.return_code,
                 response.stderr,
-                u'Command "{0} {1}" finished with return_code {2}\n'
-                'stderr contains following message:\n{3}'
+                u'Command "{0}" finished with return_code {1}\n'
+                'stderr contains following message:\n{2}'
                 .format(
-                    cls.command_base,
-                    cls.command_sub,
+                    getattr(command, 'name', cls.command_base),
                     response.return_code,
                     response.stderr,
                 )
@@ -131,9 +213,8 @@ class Base(object):
         Adds OS to record.
         """
 
-        cls.command_sub = 'add-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command('add-operatingsystem', options))
 
         return result
 
@@ -141,30 +222,39 @@ class Base(object):
     def create(cls, options=None):
         """
         Creates a new record using the arguments passed via dictionary.
-        """
 
-        cls.command_sub = 'create'
+        The new record is read with the info command, or returned as a
+        :class:`LazyInfo` which reads it on demand when
+        ``hammer.lazy_create`` is enabled.
+        """
 
         if options is None:
             options = {}
 
-        result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+        if settings.hammer.json_output:
+            result = cls.execute(
+                cls._construct_command('create', options),
+                output_format='json')
+            # The JSON output of create is a single object with the message
+            # and the new object ID and name
+            result = hammer.parse_json(result) if result else []
+            if isinstance(result, dict):
+                result = [result]
+        else:
+            result = cls.execute(
+                cls._construct_command('create', options), output_format='csv')
 
         # Extract new object ID if it was successfully created
         if len(result) > 0 and 'id' in result[0]:
             obj_id = result[0]['id']
 
             # Fetch new object
-            # Some Katello obj require the organization-id for subcommands
-            info_options = {u'id': obj_id}
-            if cls.command_requires_org:
-                if 'organization-id' not in options:
-                    raise CLIError(
-                        'organization-id option is required for {0}.create'
-                        .format(cls.__name__)
-                    )
-                info_options[u'organization-id'] = options[u'organization-id']
+            info_options = cls._info_options(options, obj_id)
+
+            if settings.hammer.lazy_create:
+                fields = dict(result[0])
+                fields.pop(u'message', None)
+                return LazyInfo(fields, partial(cls.info, info_options))
 
             new_obj = cls.info(info_options)
             # stdout should be a dictionary containing the object
@@ -173,14 +263,36 @@ class Base(object):
 
         return result
 
+    @classmethod
+    def _info_options(cls, create_options, obj_id):
+        """Return the info options which read the object created with
+        ``create_options`` and whose ID is ``obj_id``.
+
+        :raises robottelo.cli.base.CLIError: If the class requires the
+            organization-id and it is not in ``create_options``.
+        """
+        info_options = {u'id': obj_id}
+        # Some Katello obj require the organization-id for subcommands
+        if cls.command_requires_org:
+            if 'organization-id' not in create_options:
+                raise CLIError(
+                    'organization-id option is required for {0}.create'
+                    .format(cls.__name__)
+                )
+            info_options[u'organization-id'] = create_options[
+                u'organization-id']
+        return info_options
+
     @classmethod
     def delete(cls, options=None):
-        """Deletes existing record."""
-        cls.command_sub = 'delete'
-        return cls.execute(
-            cls._construct_command(options),
+        """Deletes existing record and calls the :data:`DELETE_HOOKS`."""
+        result = cls.execute(
+            cls._construct_command('delete', options),
             ignore_stderr=True,
         )
+        for hook in DELETE_HOOKS:
+            hook(cls, options or {})
+        return result
 
     @classmethod
     def delete_parameter(cls, options=None):
@@ -188,9 +300,8 @@ class Base(object):
         Deletes parameter from record.
         """
 
-        cls.command_sub = 'delete-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command('delete-parameter', options))
 
         return result
 
@@ -200,9 +311,7 @@ class Base(object):
         Displays the content for existing partition table.
         """
 
-        cls.command_sub = 'dump'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command('dump', options))
 
         return result
 
@@ -236,33 +345,127 @@ class Base(object):
     def execute(cls, command, user=None, password=None, output_format=None,
                 timeout=None, ignore_stderr=None, return_raw_response=None):
         """Executes the cli ``command`` on the server via ssh"""
+        started = time.time()
+        ssh_time = None
         user, password = cls._get_username_password(user, password)
         time_hammer = False
         if settings.performance:
             time_hammer = settings.performance.time_hammer
 
-        # add time to measure hammer performance
-        cmd = u'LANG={0} {1} hammer -v -u {2} -p {3} {4} {5}'.format(
-            settings.locale,
-            u'time -p' if time_hammer else '',
-            user,
-            password,
-            u'--output={0}'.format(output_format) if output_format else u'',
-            command,
-        )
-        response = ssh.command(
-            cmd.encode('utf-8'),
-            output_format=output_format,
-            timeout=timeout,
-        )
+        arguments = cls._hammer_arguments(
+            command, user, password, output_format)
+        response = None
+        # Timing hammer measures the whole hammer process, so it always runs
+        # a new one
+        if settings.hammer.mode == 'shell' and not time_hammer:
+            try:
+                response = hammer_shell.command(
+                    arguments,
+                    user,
+                    password,
+                    output_format=output_format,
+                    timeout=timeout,
+                )
+            except hammer_shell.HammerShellError as err:
+                cls.logger.debug(u'Running on a new hammer process: %s', err)
+        if response is None:
+            # add time to measure hammer performance
+            cmd = u'LANG={0} {1} hammer {2}'.format(
+                settings.locale,
+                u'time -p' if time_hammer else '',
+                arguments,
+            )
+            ssh_started = time.time()
+            response = ssh.command(
+                cmd.encode('utf-8'),
+                output_format=output_format,
+                timeout=timeout,
+            )
+            ssh_time = time.time() - ssh_started
+        cls._record_metrics(
+            command, response, time.time() - started, ssh_time)
         if return_raw_response:
             return response
         else:
             return cls._handle_response(
                 response,
                 ignore_stderr=ignore_stderr,
+                command=command,
             )
 
+    @classmethod
+    def _hammer_arguments(cls, command, user, password, output_format=None):
+        """Return the hammer arguments which run ``command`` as ``user``,
+        including the global options.
+        """
+        return u'-v -u {0} -p {1} {2} {3}'.format(
+            user,
+            password,
+            u'--output={0}'.format(output_format) if output_format else u'',
+            command,
+        )
+
+    @classmethod
+    def execute_batch(cls, commands, user=None, password=None,
+                      output_format=None, timeout=None):
+        """Executes several cli ``commands`` on the server, one after another,
+        with a single SSH command.
+
+        Each command runs on a new hammer process, as it does with
+        :meth:`execute`, and all of them are run by a
+        :class:`robottelo.ssh.SSHCommandBatch`.
+
+        Commands are not run on the hammer shell nor timed, and their metrics
+        are not recorded.
+
+        :param commands: A list of commands built by
+            :meth:`_construct_command`.
+        :param str output_format: The hammer output format, applied to all
+            commands.
+        :param int timeout: Timeout of the SSH command, in seconds.
+        :return: A list of ``SSHCommandResult``, one for each command in the
+            same order of ``commands``, like :func:`robottelo.ssh.command`
+            returns them.
+        """
+        user, password = cls._get_username_password(user, password)
+        with ssh.batch(timeout=timeout) as batch:
+            batched = [
+                batch.command(
+                    u'LANG={0} hammer {1}'.format(
+                        settings.locale,
+                        cls._hammer_arguments(
+                            command, user, password, output_format),
+                    ),
+                    output_format=output_format,
+                )
+                for command in commands
+            ]
+        return [command.result for command in batched]
+
+    @classmethod
+    def _record_metrics(cls, command, response, wall_time, ssh_time=None):
+        """Record the metrics of a command run by :meth:`execute` on
+        :data:`robottelo.cli.metrics.metrics`.
+
+        :param command: the command which was run.
+        :param response: the ``SSHCommandResult`` of the command.
+        :param float wall_time: seconds spent in :meth:`execute`.
+        :param float ssh_time: seconds spent running the SSH command, if it
+            ran on a new hammer process.
+        """
+        name = getattr(command, 'name', cls.command_base)
+        metrics.record(name, 'wall_time', wall_time)
+        if response.output_size is not None:
+            metrics.record(name, 'output_size', response.output_size)
+        if response.output_format:
+            metrics.record(name, 'parse_time', response.parse_time)
+        if ssh_time is not None and response.stderr:
+            match = HAMMER_TIME_REGEX.search(response.stderr)
+            if match is not None:
+                hammer_time = float(match.group(1))
+                metrics.record(name, 'hammer_time', hammer_time)
+                metrics.record(name, 'ssh_overhead', ssh_time - hammer_time)
+
     @classmethod
     def exists(cls, options=None, search=None):
         """Search for an entity using the query ``search[0]="search[1]"``
@@ -291,8 +494,13 @@ class Base(object):
 
     @classmethod
     def info(cls, options=None, output_format=None):
-        """Reads the entity information."""
-        cls.command_sub = 'info'
+        """Reads the entity information.
+
+        The information is parsed from the text output, or from the JSON
+        output when ``hammer.json_output`` is enabled. If ``output_format`` is
+        given the output is requested and returned in that format.
+
+        """
 
         if options is None:
             options = {}
@@ -303,12 +511,19 @@ class Base(object):
                 .format(cls.__name__)
             )
 
-        result = cls.execute(
-            command=cls._construct_command(options),
-            output_format=output_format
-        )
+        if output_format is None and settings.hammer.json_output:
+            result = cls.execute(
+                command=cls._construct_command('info', options),
+                output_format='json'
+            )
+            return hammer.parse_json(result) if result else {}
+
+        command = cls._construct_command('info', options)
+        result = cls.execute(command=command, output_format=output_format)
         if output_format != 'json':
+            started = time.time()
             result = hammer.parse_info(result)
+            metrics.record(command.name, 'parse_time', time.time() - started)
         return result
 
     @classmethod
@@ -318,8 +533,6 @@ class Base(object):
         @param options: ID (sometimes name works as well) to retrieve info.
         """
 
-        cls.command_sub = 'list'
-
         if options is None:
             options = {}
 
@@ -332,21 +545,61 @@ class Base(object):
                 .format(cls.__name__)
             )
 
+        if settings.hammer.json_output:
+            result = cls.execute(
+                cls._construct_command('list', options), output_format='json')
+            return hammer.parse_json(result) if result else []
+
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('list', options), output_format='csv')
 
         return result
 
+    @classmethod
+    def iter_list(cls, options=None, page_size=1000):
+        """Iterate over the listed entities, fetching them one page at a time.
+
+        Each page is fetched by a :meth:`list` call with the ``page`` and
+        ``per-page`` options, only once the entities of the previous page were
+        consumed. Callers which stop iterating early do not fetch the
+        remaining pages, and long listings are never held in full.
+
+        Fetching stops on a page which is empty or not full. It also stops on
+        a page with the same entity IDs as the previous one, which is what
+        the subcommands ignoring the ``page`` option return, and that page is
+        not yielded again.
+
+        :param dict options: The ``list`` options.
+        :param int page_size: The number of entities fetched by each call.
+        :return: A generator of the listed entities.
+
+        """
+        options = dict(options or {})
+        page = options.pop(u'page', 1)
+        options[u'per-page'] = page_size
+        previous_ids = None
+        while True:
+            options[u'page'] = page
+            result = cls.list(options, per_page=False)
+            ids = [entity.get(u'id') for entity in result]
+            if not result or ids == previous_ids:
+                return
+            for entity in result:
+                yield entity
+            if len(result) < page_size:
+                return
+            previous_ids = ids
+            page += 1
+
     @classmethod
     def puppetclasses(cls, options=None):
         """
         Lists all puppet classes.
         """
 
-        cls.command_sub = 'puppet-classes'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('puppet-classes', options),
+            output_format='csv')
 
         return result
 
@@ -356,9 +609,8 @@ class Base(object):
         Removes OS from record.
         """
 
-        cls.command_sub = 'remove-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command('remove-operatingsystem', options))
 
         return result
 
@@ -368,10 +620,8 @@ class Base(object):
         Lists all smart class parameters.
         """
 
-        cls.command_sub = 'sc-params'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('sc-params', options), output_format='csv')
 
         return result
 
@@ -381,9 +631,7 @@ class Base(object):
         Creates or updates parameter for a record.
         """
 
-        cls.command_sub = 'set-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command('set-parameter', options))
 
         return result
 
@@ -393,10 +641,8 @@ class Base(object):
         Updates existing record.
         """
 
-        cls.command_sub = 'update'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('update', options), output_format='csv')
 
         return result
 
@@ -419,9 +665,16 @@ class Base(object):
         return Wrapper
 
     @classmethod
-    def _construct_command(cls, options=None):
+    def _construct_command(cls, command_sub, options=None):
         """
-        Build a hammer cli command based on the options passed
+        Build a hammer cli command based on the subcommand and the options
+        passed. Nothing is stored on the class, so commands can be built from
+        several threads at the same time.
+
+        :param str command_sub: The subcommand, like ``create`` or
+            ``errata list``.
+        :param dict options: The subcommand options.
+        :rtype: CLICommand
         """
 
         tail = u''
@@ -438,10 +691,7 @@ class Base(object):
                 if isinstance(val, list):
                     val = ','.join(str(el) for el in val)
                 tail += u' --{0}="{1}"'.format(key, val)
-        cmd = u'{0} {1} {2}'.format(
-            cls.command_base,
-            cls.command_sub,
-            tail.strip()
-        )
+        name = u'{0} {1}'.format(cls.command_base, command_sub)
+        cmd = CLICommand(u'{0} {1}'.format(name, tail.strip()), name)
 
         return cmd
@@ -44,26 +44,25 @@ class ContentView(Base):
     @classmethod
     def add_repository(cls, options):
         """Associate repository to a selected CV."""
-        cls.command_sub = 'add-repository'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('add-repository', options),
+            output_format='csv')
 
     @classmethod
     def add_version(cls, options):
         """Associate version to a selected CV."""
-        cls.command_sub = 'add-version'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('add-version', options),
+            output_format='csv')
 
     @classmethod
     def publish(cls, options, timeout=None):
         """Publishes a new version of content-view."""
-        cls.command_sub = 'publish'
         # Publishing can take a while so try to wait a bit longer
         if timeout is None:
             timeout = 120
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command('publish', options),
             ignore_stderr=True,
             timeout=timeout,
         )
@@ -71,51 +70,49 @@ class ContentView(Base):
     @classmethod
     def version_info(cls, options):
         """Provides version info related to content-view's version."""
-        cls.command_sub = 'version info'
 
         if options is None:
             options = {}
 
-        return hammer.parse_info(cls.execute(cls._construct_command(options)))
+        return hammer.parse_info(
+            cls.execute(cls._construct_command('version info', options)))
 
     @classmethod
     def version_incremental_update(cls, options):
         """Performs incremental update of the content-view's version"""
-        cls.command_sub = 'version incremental-update'
         if options is None:
             options = {}
             return cls.execute(
-                cls._construct_command(options),
+                cls._construct_command('version incremental-update', options),
                 output_format='info'
             )
 
     @classmethod
     def puppet_module_add(cls, options):
         """Associate puppet_module to selected CV"""
-        cls.command_sub = 'puppet-module add'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('puppet-module add', options),
+            output_format='csv')
 
     @classmethod
     def puppet_module_info(cls, options):
         """Provides puppet-module info related to content-view's version."""
-        cls.command_sub = 'puppet-module info'
 
         if options is None:
             options = {}
 
-        return hammer.parse_info(cls.execute(cls._construct_command(options)))
+        return hammer.parse_info(
+            cls.execute(cls._construct_command('puppet-module info', options)))
 
     @classmethod
     def filter_info(cls, options):
         """Provides filter info related to content-view's version."""
 
-        cls.command_sub = 'filter info'
-
         if options is None:
             options = {}
 
-        return hammer.parse_info(cls.execute(cls._construct_command(options)))
+        return hammer.parse_info(
+            cls.execute(cls._construct_command('filter info', options)))
 
     @classmethod
     def filter_create(cls, options):
@@ -149,10 +146,9 @@ class ContentView(Base):
                                                  package_group, erratum)
 
         """
-        cls.command_sub = 'filter create'
         if options is None:
             options = {}
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command('filter create', options))
 
     @classmethod
     def filter_update(cls, options):
@@ -187,10 +183,9 @@ class ContentView(Base):
                                                  Comma separated list of values
 
         """
-        cls.command_sub = 'filter update'
         if options is None:
             options = {}
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command('filter update', options))
 
     @classmethod
     def filter_delete(cls, options):
@@ -212,52 +207,48 @@ class ContentView(Base):
                                                       search by
 
         """
-        cls.command_sub = 'filter delete'
         if options is None:
             options = {}
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command('filter delete', options))
 
     @classmethod
     def filter_rule_create(cls, options):
         """Add new rule to content view filter."""
-        cls.command_sub = 'filter rule create'
         if options is None:
             options = {}
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command('filter rule create', options))
 
     @classmethod
     def version_list(cls, options):
         """Lists content-view's versions."""
-        cls.command_sub = 'version list'
         if options is None:
             options = {}
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('version list', options),
+            output_format='csv')
 
     @classmethod
     def version_promote(cls, options):
         """Promotes content-view version to next env."""
-        cls.command_sub = 'version promote'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command('version promote', options),
             ignore_stderr=True,
         )
 
     @classmethod
     def version_delete(cls, options):
         """Removes content-view version."""
-        cls.command_sub = 'version delete'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command('version delete', options),
             ignore_stderr=True,
         )
 
     @classmethod
     def remove_from_environment(cls, options=None):
         """Remove content-view from an environment"""
-        cls.command_sub = 'remove-from-environment'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command('remove-from-environment', options),
             ignore_stderr=True,
         )
 
@@ -267,8 +258,7 @@ class ContentView(Base):
         reassign content hosts and keys
 
         """
-        cls.command_sub = 'remove'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command('remove', options),
             ignore_stderr=True,
         )
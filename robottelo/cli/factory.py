@@ -8,6 +8,7 @@ import json
 import logging
 import os
 import random
+import threading
 
 from fauxfactory import (
     gen_alphanumeric,
@@ -18,11 +19,18 @@ from fauxfactory import (
     gen_string,
     gen_url,
 )
+from functools import partial
 from os import chmod
 from robottelo import manifests, ssh
 from robottelo.cli.activationkey import ActivationKey
 from robottelo.cli.architecture import Architecture
-from robottelo.cli.base import CLIReturnCodeError
+from robottelo.cli import hammer
+from robottelo.cli.base import (
+    DELETE_HOOKS,
+    CLIError,
+    CLIReturnCodeError,
+    LazyInfo,
+)
 from robottelo.cli.computeresource import ComputeResource
 from robottelo.cli.contenthost import ContentHost
 from robottelo.cli.contentview import ContentView
@@ -51,16 +59,21 @@ from robottelo.cli.syncplan import SyncPlan
 from robottelo.cli.template import Template
 from robottelo.cli.user import User
 from robottelo.cli.usergroup import UserGroup, UserGroupExternal
+from robottelo.config import settings
 from robottelo.constants import (
     DEFAULT_SUBSCRIPTION_NAME,
     FAKE_1_YUM_REPO,
     FOREMAN_PROVIDERS,
     OPERATING_SYSTEMS,
+    PRDS,
+    REPOS,
+    REPOSET,
     SYNC_INTERVAL,
     TEMPLATE_TYPES,
 )
-from robottelo.decorators import cacheable
+from robottelo.decorators import OBJECT_CACHE, cacheable
 from robottelo.helpers import update_dictionary
+from robottelo.parallel import EntityPool, StepGraph
 from robottelo.ssh import upload_file
 from tempfile import mkstemp
 
@@ -75,6 +88,35 @@ class CLIFactoryError(Exception):
     """Indicates an error occurred while creating an entity using hammer"""
 
 
+class CLIFactoryBatchError(CLIFactoryError):
+    """Indicates that some entities could not be created by
+    :func:`make_many`.
+
+    :param msg: explanation of the error
+    :param results: The list of the created entities, with ``None`` in place
+        of the entities which could not be created.
+    :param errors: A dict mapping the index of each entity which could not be
+        created to its error message.
+
+    """
+    def __init__(self, msg, results, errors):
+        super(CLIFactoryBatchError, self).__init__(msg)
+        self.results = results
+        self.errors = errors
+
+
+class _CreateRecorded(Exception):
+    """Stops a ``make_*`` function once :func:`create_object` recorded its
+    create options for :func:`make_many`.
+
+    """
+
+
+#: The create options recorded by :func:`create_object` for
+#: :func:`make_many`, on the thread running it.
+_recorded = threading.local()
+
+
 def create_object(cli_object, options, values):
     """
     Creates <object> with dictionary of arguments.
@@ -90,6 +132,9 @@ def create_object(cli_object, options, values):
 
     """
     update_dictionary(options, values)
+    if getattr(_recorded, 'creates', None) is not None:
+        _recorded.creates.append((cli_object, options))
+        raise _CreateRecorded()
     try:
         result = cli_object.create(options)
     except CLIReturnCodeError as err:
@@ -110,6 +155,193 @@ def create_object(cli_object, options, values):
     return result
 
 
+#: The name of the cacheable ``make_*`` function of each CLI object, without
+#: the ``make_`` prefix.
+_CACHED_ENTITY_NAMES = {
+    ActivationKey: 'activation_key',
+    Architecture: 'architecture',
+    ComputeResource: 'compute_resource',
+    ContentHost: 'content_host',
+    ContentView: 'content_view',
+    Domain: 'domain',
+    Environment: 'environment',
+    GPGKey: 'gpg_key',
+    Host: 'host',
+    HostCollection: 'host_collection',
+    HostGroup: 'hostgroup',
+    LifecycleEnvironment: 'lifecycle_environment',
+    Location: 'location',
+    Medium: 'medium',
+    Model: 'model',
+    OperatingSys: 'os',
+    Org: 'org',
+    PartitionTable: 'partition_table',
+    Product: 'product',
+    Proxy: 'proxy',
+    Repository: 'repository',
+    Role: 'role',
+    Subnet: 'subnet',
+    SyncPlan: 'sync_plan',
+    Template: 'template',
+    User: 'user',
+    UserGroup: 'usergroup',
+}
+
+
+def _discard_deleted(cli_object, options):
+    """Drop a deleted entity from :data:`robottelo.decorators.OBJECT_CACHE`.
+
+    Called for each entity deleted with :meth:`robottelo.cli.base.Base.delete`
+    and deleted by ID.
+
+    """
+    if options.get('id') is None:
+        return
+    # Classes returned by with_user subclass the CLI object
+    for klass in cli_object.__mro__:
+        if klass in _CACHED_ENTITY_NAMES:
+            OBJECT_CACHE.discard_entity(
+                _CACHED_ENTITY_NAMES[klass], options['id'])
+            return
+
+
+DELETE_HOOKS.append(_discard_deleted)
+
+
+def _record_create(make_fn, options):
+    """Call ``make_fn`` with ``options`` and return the CLI object and
+    options of the create command it would run, without running it.
+
+    """
+    _recorded.creates = []
+    try:
+        make_fn(options)
+    except _CreateRecorded:
+        pass
+    finally:
+        creates, _recorded.creates = _recorded.creates, None
+    if len(creates) != 1:
+        raise CLIFactoryError(
+            u'{0} can not be used to create many entities'
+            .format(getattr(make_fn, '__name__', make_fn))
+        )
+    return creates[0]
+
+
+def make_many(make_fn, count, options_fn=None, timeout=None):
+    """Create ``count`` entities with the ``make_*`` function ``make_fn``,
+    running all the create commands with a single SSH command.
+
+    ``make_fn`` is called once for each entity, to generate its create
+    options without running hammer. Then all the create commands are run
+    by a single remote script, and the info commands reading the created
+    entities by another one, instead of two hammer commands and SSH commands
+    for each entity. The entities are read on demand instead when
+    ``hammer.lazy_create`` is enabled.
+
+    ``make_*`` functions which need more than running the create command,
+    like ``make_proxy`` without an ``url`` which opens an SSH tunnel, can not
+    be used.
+
+    Usage::
+
+        users = make_many(make_user, 50, lambda index: {u'admin': True})
+
+    :param make_fn: A ``make_*`` function, like :func:`make_user`.
+    :param int count: The number of entities to create.
+    :param options_fn: A callable receiving the index of each entity and
+        returning the options passed to ``make_fn``. The default options of
+        ``make_fn`` are used if not provided.
+    :param int timeout: Timeout of each SSH command, in seconds.
+    :raise robottelo.cli.factory.CLIFactoryBatchError: If some entities could
+        not be created, once all the others were.
+    :rtype: list
+    :return: A list with the dictionary representing each newly created
+        resource.
+
+    """
+    creates = [
+        _record_create(make_fn, options_fn(index) if options_fn else None)
+        for index in range(count)
+    ]
+    if not creates:
+        return []
+    results = [None] * count
+    errors = {}
+
+    def failed(index, msg):
+        """Record the error of an entity which could not be created."""
+        cli_object, options = creates[index]
+        errors[index] = u'Failed to create {0} with data:\n{1}\n{2}'.format(
+            cli_object.__name__,
+            json.dumps(options, indent=2, sort_keys=True),
+            msg,
+        )
+
+    # All the entities are created by the CLI object of the first one, as
+    # they come from the same make_* function
+    cli_object = creates[0][0]
+    commands = [
+        cli_object._construct_command('create', options)
+        for _, options in creates
+    ]
+    responses = cli_object.execute_batch(
+        commands, output_format='csv', timeout=timeout)
+    reads = []
+    for index, (command, response) in enumerate(zip(commands, responses)):
+        try:
+            result = cli_object._handle_response(response, command=command)
+        except CLIReturnCodeError as err:
+            failed(index, err.msg)
+            continue
+        if not result or 'id' not in result[0]:
+            results[index] = result[0] if result else result
+            continue
+        try:
+            info_options = cli_object._info_options(
+                creates[index][1], result[0]['id'])
+        except CLIError as err:
+            failed(index, err)
+            continue
+        if settings.hammer.lazy_create:
+            fields = dict(result[0])
+            fields.pop(u'message', None)
+            results[index] = LazyInfo(
+                fields, partial(cli_object.info, info_options))
+        else:
+            # Keep the create output in case the info output is empty
+            results[index] = result[0]
+            reads.append(
+                (index, cli_object._construct_command('info', info_options)))
+
+    if reads:
+        responses = cli_object.execute_batch(
+            [command for _, command in reads], timeout=timeout)
+        for (index, command), response in zip(reads, responses):
+            try:
+                result = cli_object._handle_response(
+                    response, command=command)
+            except CLIReturnCodeError as err:
+                failed(index, err.msg)
+                results[index] = None
+                continue
+            new_obj = hammer.parse_info(result)
+            if len(new_obj) > 0:
+                results[index] = new_obj
+
+    if errors:
+        raise CLIFactoryBatchError(
+            u'Failed to create {0} of {1} entities:\n{2}'.format(
+                len(errors),
+                count,
+                u'\n'.join(errors[index] for index in sorted(errors)),
+            ),
+            results,
+            errors,
+        )
+    return results
+
+
 @cacheable
 def make_activation_key(options=None):
     """
@@ -1758,6 +1990,160 @@ def activationkey_add_subscription_to_repo(options=None):
                 )
 
 
+def _add_org_and_env_steps(graph, options):
+    """Add the steps creating the organization and the lifecycle environment
+    of the ``setup_org_for_a_*`` helpers, unless their ID is in ``options``.
+
+    The steps results are the ``organization-id`` and
+    ``lifecycle-environment-id``.
+
+    """
+    if options.get('organization-id') is None:
+        graph.add('organization-id', lambda results: make_org()['id'])
+    else:
+        graph.add_result('organization-id', options['organization-id'])
+    if options.get('lifecycle-environment-id') is None:
+        graph.add(
+            'lifecycle-environment-id',
+            lambda results: make_lifecycle_environment({
+                u'organization-id': results['organization-id']})['id'],
+            requires=['organization-id'],
+        )
+    else:
+        graph.add_result(
+            'lifecycle-environment-id', options['lifecycle-environment-id'])
+
+
+def _add_content_view_steps(graph, options):
+    """Add the steps of the ``setup_org_for_a_*`` helpers which create the
+    content view if its ID is not in ``options``, add the ``repository`` step
+    result to it once created, and publish and promote it to the lifecycle
+    environment once the ``synchronize`` step is done.
+
+    """
+    if options.get('content-view-id') is None:
+        graph.add(
+            'content-view-id',
+            lambda results: make_content_view({
+                u'organization-id': results['organization-id']})['id'],
+            requires=['organization-id'],
+        )
+    else:
+        graph.add_result('content-view-id', options['content-view-id'])
+
+    def add_repository(results):
+        """Associate repo with the content view"""
+        try:
+            ContentView.add_repository({
+                u'id': results['content-view-id'],
+                u'organization-id': results['organization-id'],
+                u'repository-id': results['repository']['id'],
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to add repository to content view\n{0}'
+                .format(err.msg)
+            )
+
+    graph.add(
+        'content-view-repository',
+        add_repository,
+        requires=['content-view-id', 'repository'],
+    )
+
+    def publish(results):
+        """Publish a new version of CV and return the version"""
+        try:
+            ContentView.publish({u'id': results['content-view-id']})
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to publish new version of content view\n{0}'
+                .format(err.msg)
+            )
+        # Get the version id
+        try:
+            return ContentView.info(
+                {u'id': results['content-view-id']})['versions'][-1]
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to fetch content view info\n{0}'.format(err.msg))
+
+    graph.add(
+        'content-view-version',
+        publish,
+        requires=['content-view-repository', 'synchronize'],
+    )
+
+    def promote(results):
+        """Promote version to next env"""
+        try:
+            ContentView.version_promote({
+                u'id': results['content-view-version']['id'],
+                u'organization-id': results['organization-id'],
+                u'to-lifecycle-environment-id': (
+                    results['lifecycle-environment-id']),
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to promote version to next environment\n{0}'
+                .format(err.msg)
+            )
+
+    graph.add(
+        'promote',
+        promote,
+        requires=['content-view-version', 'lifecycle-environment-id'],
+    )
+
+
+def _add_activation_key_steps(graph, options, subscription):
+    """Add the steps of the ``setup_org_for_a_*`` helpers which create the
+    activation key if its ID is not in ``options``, or associate it with the
+    content view otherwise, and add a subscription to it.
+
+    :param subscription: A callable which receives the steps results and
+        returns the name of the subscription to add.
+
+    """
+    def activation_key(results):
+        """Create activation key if needed and associate content view with
+        it
+
+        """
+        if options.get('activationkey-id') is None:
+            return make_activation_key({
+                u'content-view-id': results['content-view-id'],
+                u'lifecycle-environment-id': (
+                    results['lifecycle-environment-id']),
+                u'organization-id': results['organization-id'],
+            })['id']
+        # Given activation key may have no (or different) CV associated.
+        # Associate activation key with CV just to be sure
+        try:
+            ActivationKey.update({
+                u'content-view-id': results['content-view-id'],
+                u'id': options['activationkey-id'],
+                u'organization-id': results['organization-id'],
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to associate activation-key with CV\n{0}'
+                .format(err.msg)
+            )
+        return options['activationkey-id']
+
+    graph.add('activationkey-id', activation_key, requires=['promote'])
+    graph.add(
+        'subscription',
+        lambda results: activationkey_add_subscription_to_repo({
+            u'activationkey-id': results['activationkey-id'],
+            u'organization-id': results['organization-id'],
+            u'subscription': subscription(results),
+        }),
+        requires=['activationkey-id'],
+    )
+
+
 def setup_org_for_a_custom_repo(options=None):
     """Sets up Org for the given custom repo by:
 
@@ -1784,6 +2170,10 @@ def setup_org_for_a_custom_repo(options=None):
         activationkey-id (optional) - ID of activation key (or create a new one
                                     if empty)
 
+    Steps which do not depend on each other run concurrently, for example the
+    lifecycle environment and content view are created while the repository
+    is synchronized.
+
     :return: A dictionary with the entity ids of Activation key, Content view,
         Lifecycle Environment, Organization, Product and Repository
 
@@ -1792,99 +2182,51 @@ def setup_org_for_a_custom_repo(options=None):
             not options or
             not options.get('url')):
         raise CLIFactoryError('Please provide valid custom repo URL.')
+    graph = StepGraph()
     # Create new organization and lifecycle environment if needed
-    if options.get('organization-id') is None:
-        org_id = make_org()['id']
-    else:
-        org_id = options['organization-id']
-    if options.get('lifecycle-environment-id') is None:
-        env_id = make_lifecycle_environment({u'organization-id': org_id})['id']
-    else:
-        env_id = options['lifecycle-environment-id']
+    _add_org_and_env_steps(graph, options)
     # Create custom product and repository
-    custom_product = make_product({u'organization-id': org_id})
-    custom_repo = make_repository({
-        u'content-type': 'yum',
-        u'product-id': custom_product['id'],
-        u'url': options.get('url'),
-    })
-    # Synchronize custom repository
-    try:
-        Repository.synchronize({'id': custom_repo['id']})
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to synchronize repository\n{0}'.format(err.msg))
-    # Create CV if needed and associate repo with it
-    if options.get('content-view-id') is None:
-        cv_id = make_content_view({u'organization-id': org_id})['id']
-    else:
-        cv_id = options['content-view-id']
-    try:
-        ContentView.add_repository({
-            u'id': cv_id,
-            u'organization-id': org_id,
-            u'repository-id': custom_repo['id'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to add repository to content view\n{0}'.format(err.msg))
-    # Publish a new version of CV
-    try:
-        ContentView.publish({u'id': cv_id})
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to publish new version of content view\n{0}'
-            .format(err.msg)
-        )
-    # Get the version id
-    cvv = ContentView.info({u'id': cv_id})['versions'][-1]
-    # Promote version to next env
-    try:
-        ContentView.version_promote({
-            u'id': cvv['id'],
-            u'organization-id': org_id,
-            u'to-lifecycle-environment-id': env_id,
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to promote version to next environment\n{0}'
-            .format(err.msg)
-        )
-    # Create activation key if needed and associate content view with it
-    if options.get('activationkey-id') is None:
-        activationkey_id = make_activation_key({
-            u'content-view-id': cv_id,
-            u'lifecycle-environment-id': env_id,
-            u'organization-id': org_id,
-        })['id']
-    else:
-        activationkey_id = options['activationkey-id']
-        # Given activation key may have no (or different) CV associated.
-        # Associate activation key with CV just to be sure
+    graph.add(
+        'product',
+        lambda results: make_product({
+            u'organization-id': results['organization-id']}),
+        requires=['organization-id'],
+    )
+    graph.add(
+        'repository',
+        lambda results: make_repository({
+            u'content-type': 'yum',
+            u'product-id': results['product']['id'],
+            u'url': options.get('url'),
+        }),
+        requires=['product'],
+    )
+
+    def synchronize(results):
+        """Synchronize custom repository"""
         try:
-            ActivationKey.update({
-                u'content-view-id': cv_id,
-                u'id': activationkey_id,
-                u'organization-id': org_id,
-            })
+            Repository.synchronize({'id': results['repository']['id']})
         except CLIReturnCodeError as err:
             raise CLIFactoryError(
-                u'Failed to associate activation-key with CV\n{0}'
-                .format(err.msg)
-            )
-    # Add subscription to activation-key
-    activationkey_add_subscription_to_repo({
-        u'activationkey-id': activationkey_id,
-        u'organization-id': org_id,
-        u'subscription': custom_product['name'],
-    })
+                u'Failed to synchronize repository\n{0}'.format(err.msg))
+
+    graph.add('synchronize', synchronize, requires=['repository'])
+    # Create CV if needed, while the repository synchronizes, then associate
+    # repo with it, publish and promote it and associate the activation key
+    _add_content_view_steps(graph, options)
+    _add_activation_key_steps(
+        graph,
+        options,
+        lambda results: results['product']['name'],
+    )
+    results = graph.run()
     return {
-        u'activationkey-id': activationkey_id,
-        u'content-view-id': cv_id,
-        u'lifecycle-environment-id': env_id,
-        u'organization-id': org_id,
-        u'product-id': custom_product['id'],
-        u'repository-id': custom_repo['id'],
+        u'activationkey-id': results['activationkey-id'],
+        u'content-view-id': results['content-view-id'],
+        u'lifecycle-environment-id': results['lifecycle-environment-id'],
+        u'organization-id': results['organization-id'],
+        u'product-id': results['product']['id'],
+        u'repository-id': results['repository']['id'],
     }
 
 
@@ -1919,6 +2261,10 @@ def setup_org_for_a_rh_repo(options=None):
         activationkey-id (optional) - ID of activation key (or create a new one
                                     if empty)
 
+    Steps which do not depend on each other run concurrently, for example the
+    lifecycle environment and content view are created while the manifest is
+    uploaded and the repository is synchronized.
+
     :return: A dictionary with the entity ids of Activation key, Content view,
         Lifecycle Environment, Organization and Repository
 
@@ -1930,130 +2276,111 @@ def setup_org_for_a_rh_repo(options=None):
             not options.get('repository')):
         raise CLIFactoryError(
             'Please provide valid product, repository-set and repo.')
+    graph = StepGraph()
     # Create new organization and lifecycle environment if needed
-    if options.get('organization-id') is None:
-        org_id = make_org()['id']
-    else:
-        org_id = options['organization-id']
-    if options.get('lifecycle-environment-id') is None:
-        env_id = make_lifecycle_environment({u'organization-id': org_id})['id']
-    else:
-        env_id = options['lifecycle-environment-id']
-    # Clone manifest and upload it
-    with manifests.clone() as manifest:
-        upload_file(manifest.content, manifest.filename)
-    try:
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org_id,
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to upload manifest\n{0}'.format(err.msg))
-    # Enable repo from Repository Set
-    try:
-        RepositorySet.enable({
-            u'basearch': 'x86_64',
-            u'name': options['repository-set'],
-            u'organization-id': org_id,
-            u'product': options['product'],
-            u'releasever': options.get('releasever'),
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to enable repository set\n{0}'.format(err.msg))
-    # Fetch repository info
-    try:
-        rhel_repo = Repository.info({
-            u'name': options['repository'],
-            u'organization-id': org_id,
-            u'product': options['product'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to fetch repository info\n{0}'.format(err.msg))
-    # Synchronize the RH repository
-    try:
-        Repository.synchronize({
-            u'name': options['repository'],
-            u'organization-id': org_id,
-            u'product': options['product'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to synchronize repository\n{0}'.format(err.msg))
-    # Create CV if needed and associate repo with it
-    if options.get('content-view-id') is None:
-        cv_id = make_content_view({u'organization-id': org_id})['id']
-    else:
-        cv_id = options['content-view-id']
-    try:
-        ContentView.add_repository({
-            u'id': cv_id,
-            u'organization-id': org_id,
-            u'repository-id': rhel_repo['id'],
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to add repository to content view\n{0}'.format(err.msg))
-    # Publish a new version of CV
-    try:
-        ContentView.publish({u'id': cv_id})
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to publish new version of content view\n{0}'
-            .format(err.msg)
-        )
-    # Get the version id
-    try:
-        cvv = ContentView.info({u'id': cv_id})['versions'][-1]
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to fetch content view info\n{0}'.format(err.msg))
-    # Promote version1 to next env
-    try:
-        ContentView.version_promote({
-            u'id': cvv['id'],
-            u'organization-id': org_id,
-            u'to-lifecycle-environment-id': env_id,
-        })
-    except CLIReturnCodeError as err:
-        raise CLIFactoryError(
-            u'Failed to promote version to next environment\n{0}'
-            .format(err.msg)
-        )
-    # Create activation key if needed and associate content view with it
-    if options.get('activationkey-id') is None:
-        activationkey_id = make_activation_key({
-            u'content-view-id': cv_id,
-            u'lifecycle-environment-id': env_id,
-            u'organization-id': org_id,
-        })['id']
-    else:
-        activationkey_id = options['activationkey-id']
-        # Given activation key may have no (or different) CV associated.
-        # Associate activation key with CV just to be sure
+    _add_org_and_env_steps(graph, options)
+
+    def upload_manifest(results):
+        """Clone manifest and upload it"""
+        with manifests.clone() as manifest:
+            upload_file(manifest.content, manifest.filename)
         try:
-            ActivationKey.update({
-                u'id': activationkey_id,
-                u'organization-id': org_id,
-                u'content-view-id': cv_id,
+            Subscription.upload({
+                u'file': manifest.filename,
+                u'organization-id': results['organization-id'],
             })
         except CLIReturnCodeError as err:
             raise CLIFactoryError(
-                u'Failed to associate activation-key with CV\n{0}'
-                .format(err.msg)
-            )
-    # Add subscription to activation-key
-    activationkey_add_subscription_to_repo({
-        u'organization-id': org_id,
-        u'activationkey-id': activationkey_id,
-        u'subscription': DEFAULT_SUBSCRIPTION_NAME,
-    })
+                u'Failed to upload manifest\n{0}'.format(err.msg))
+
+    graph.add('manifest', upload_manifest, requires=['organization-id'])
+
+    def enable_repository_set(results):
+        """Enable repo from Repository Set"""
+        try:
+            RepositorySet.enable({
+                u'basearch': 'x86_64',
+                u'name': options['repository-set'],
+                u'organization-id': results['organization-id'],
+                u'product': options['product'],
+                u'releasever': options.get('releasever'),
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to enable repository set\n{0}'.format(err.msg))
+
+    graph.add('repository-set', enable_repository_set, requires=['manifest'])
+
+    def repository_info(results):
+        """Fetch repository info"""
+        try:
+            return Repository.info({
+                u'name': options['repository'],
+                u'organization-id': results['organization-id'],
+                u'product': options['product'],
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to fetch repository info\n{0}'.format(err.msg))
+
+    graph.add('repository', repository_info, requires=['repository-set'])
+
+    def synchronize(results):
+        """Synchronize the RH repository"""
+        try:
+            Repository.synchronize({
+                u'name': options['repository'],
+                u'organization-id': results['organization-id'],
+                u'product': options['product'],
+            })
+        except CLIReturnCodeError as err:
+            raise CLIFactoryError(
+                u'Failed to synchronize repository\n{0}'.format(err.msg))
+
+    graph.add('synchronize', synchronize, requires=['repository-set'])
+    # Create CV if needed, while the repository synchronizes, then associate
+    # repo with it, publish and promote it and associate the activation key
+    _add_content_view_steps(graph, options)
+    _add_activation_key_steps(
+        graph,
+        options,
+        lambda results: DEFAULT_SUBSCRIPTION_NAME,
+    )
+    results = graph.run()
     return {
-        u'activationkey-id': activationkey_id,
-        u'content-view-id': cv_id,
-        u'lifecycle-environment-id': env_id,
-        u'organization-id': org_id,
-        u'repository-id': rhel_repo['id'],
+        u'activationkey-id': results['activationkey-id'],
+        u'content-view-id': results['content-view-id'],
+        u'lifecycle-environment-id': results['lifecycle-environment-id'],
+        u'organization-id': results['organization-id'],
+        u'repository-id': results['repository']['id'],
     }
+
+
+def prepare_rh_org():
+    """Create an organization with the Red Hat Satellite Tools repository
+    synchronized, and a content view and an activation key using it, with
+    :func:`setup_org_for_a_rh_repo`.
+
+    :return: The dictionary returned by :func:`setup_org_for_a_rh_repo`.
+
+    """
+    return setup_org_for_a_rh_repo({
+        u'product': PRDS['rhel'],
+        u'repository-set': REPOSET['rhst7'],
+        u'repository': REPOS['rhst7']['name'],
+    })
+
+
+def _rh_org_pool_size():
+    """Return the number of organizations :data:`rh_org_pool` keeps ready,
+    from the ``hammer.rh_org_pool_size`` setting.
+
+    """
+    return settings.hammer.rh_org_pool_size or 0
+
+
+#: Organizations prepared by :func:`prepare_rh_org` in the background, for
+#: the tests which need one of their own. Use ``rh_org_pool.get()`` to take
+#: one. The first call starts preparing ``hammer.rh_org_pool_size``
+#: organizations, so the next callers get theirs right away.
+rh_org_pool = EntityPool(prepare_rh_org, size=_rh_org_pool_size)
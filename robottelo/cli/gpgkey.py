@@ -35,10 +35,8 @@ class GPGKey(Base):
         Gets information for GPG Key
         """
 
-        cls.command_sub = 'info'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('info', options), output_format='csv')
 
         # Need to rebuild the returned object
         # First check for content key
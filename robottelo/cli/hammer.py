@@ -1,13 +1,24 @@
 """Helpers to interact with hammer command line utility."""
 import csv
+import hashlib
+import io
+import json
+import logging
+import os
 import re
 import six
 
+from six.moves import cPickle as pickle
 from six.moves import zip
 from six.moves import cStringIO as StringIO
 
+#: Decodes the JSON output of hammer.
+load_json = json.loads
 
-def _csv_reader(output):
+logger = logging.getLogger(__name__)
+
+
+def _csv_reader(output, decode=True):
     """An unicode CSV reader which processes unicode strings and return unicode
     strings data.
 
@@ -23,6 +34,8 @@ def _csv_reader(output):
 
     :param output: can be any object which supports the iterator protocol and
     returns a unicode string each time its next() method is called.
+    :param bool decode: On Python 2, whether to decode the values. If
+        ``False`` the values are UTF-8 encoded strings.
     :return: generator that will yield a list of unicode string values.
 
     """
@@ -32,17 +45,108 @@ def _csv_reader(output):
     handler = StringIO(data)
 
     for row in csv.reader(handler):
-        if six.PY2:
-            yield [value.decode('utf8') for value in row]
+        if six.PY2 and decode and row:
+            # Decoding each value on its own takes most of the parsing time.
+            # The csv module does not accept NUL characters, so it is safe to
+            # join the values with it and decode the whole row at once.
+            yield '\x00'.join(row).decode('utf8').split(u'\x00')
         else:
             yield row
 
 
-def parse_csv(output):
-    """Parse CSV output from Hammer CLI and convert it to python dictionary."""
-    reader = _csv_reader(output)
+class CSVRow(object):
+    """A row of hammer CSV output.
+
+    A read-only mapping of the header keys to the row values, which can be
+    used as the dicts returned by :func:`parse_csv`. All rows of an output
+    share the same keys and only hold their own values, so they are faster to
+    build and lighter than a dict for each row. On Python 2 the values are
+    only decoded when read. Use ``dict(row)`` to get a dict.
+
+    :param dict positions: Maps each key to the position of its value.
+    :param list values: The row values, UTF-8 encoded on Python 2.
+
+    """
+    __slots__ = ('_positions', '_values')
+
+    def __init__(self, positions, values):
+        self._positions = positions
+        self._values = values
+
+    def __getitem__(self, key):
+        try:
+            value = self._values[self._positions[key]]
+        except IndexError:
+            raise KeyError(key)
+        if six.PY2:
+            value = value.decode('utf8')
+        return value
+
+    def __contains__(self, key):
+        return self._positions.get(key, len(self._values)) < len(self._values)
+
+    def __iter__(self):
+        for key, position in self._positions.items():
+            if position < len(self._values):
+                yield key
+
+    def __len__(self):
+        return len([
+            position for position in self._positions.values()
+            if position < len(self._values)
+        ])
+
+    def __eq__(self, other):
+        if isinstance(other, (CSVRow, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, dict(self.items()))
+
+    def get(self, key, default=None):
+        """Return the value of ``key`` or ``default`` if it is missing."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """Return a list of the row keys."""
+        return [key for key in self]
+
+    def values(self):
+        """Return a list of the row values."""
+        return [self[key] for key in self]
+
+    def items(self):
+        """Return a list of the row ``(key, value)`` pairs."""
+        return [(key, self[key]) for key in self]
+
+
+def parse_csv(output, lazy=False):
+    """Parse CSV output from Hammer CLI and convert it to python dictionary.
+
+    :param output: The output lines.
+    :param bool lazy: Return :class:`CSVRow` objects instead of dicts, which
+        is faster for long outputs.
+    :return: A list with a dict or :class:`CSVRow` for each row.
+
+    """
+    reader = _csv_reader(output, decode=not lazy)
     # Generate the key names, spaces will be converted to dashes "-"
     keys = [header.replace(' ', '-').lower() for header in next(reader)]
+    if lazy:
+        if six.PY2:
+            keys = [key.decode('utf8') for key in keys]
+        positions = dict((key, position) for position, key in enumerate(keys))
+        return [CSVRow(positions, values) for values in reader if values]
     # For each entry, create a dict mapping each key with each value
     return [dict(zip(keys, values)) for values in reader if len(values) > 0]
 
@@ -111,81 +215,350 @@ def parse_help(output):
     return contents
 
 
+#: Matches the numbering of collection items keys, like ``1) Name``.
+NUMBERED_KEY_REGEX = re.compile(r'(\d+)\)\s*')
+
+#: Matches every numbering in a key.
+NUMBERINGS_REGEX = re.compile(r'\d+\)')
+
+#: Matches numbered single value lines, like ``1) value``.
+NUMBERED_VALUE_REGEX = re.compile(r'\d+\)\s+(.+)$')
+
+
 def parse_info(output):
-    """Parse the info output and returns a dict mapping the values."""
+    """Parse the info output and returns a dict mapping the values.
+
+    Properties without a value start a group of sub-properties, which are the
+    following indented lines. A group of sub-properties is a dict, or a list
+    if its items are numbered or have a single value. Indented properties
+    without a value start a nested group with the lines indented deeper than
+    them.
+
+    """
     # info dictionary
     contents = {}
-    sub_prop = None  # stores name of the last group of sub-properties
-    sub_num = None  # is not None when list of properties
+    # The group of sub-properties being parsed is items, stored at
+    # parent[name]. Its lines are indented deeper than column and numbered is
+    # True when it is a list of numbered properties. The groups it is nested
+    # in are saved on outer_groups.
+    parent = name = items = None
+    column = -1
+    numbered = False
+    outer_groups = []
+    numbered_key = NUMBERED_KEY_REGEX.match
+    numbered_value = NUMBERED_VALUE_REGEX.match
+    remove_numberings = NUMBERINGS_REGEX.sub
 
     for line in output:
         # skip empty lines
         if line == '':
             continue
-        if line.startswith(' '):  # sub-properties are indented
-            # values are separated by ':' or '=>'
-            if line.find(':') != -1:
-                key, value = line.lstrip().split(":", 1)
-            elif line.find('=>') != -1:
-                key, value = line.lstrip().split(" =>", 1)
-            else:
-                key = value = None
+        if line[0] != ' ':
+            key, separator, value = line.lstrip().partition(':')
+            if not separator:
+                raise ValueError(
+                    u'Not able to parse info line "{0}"'.format(line))
+            key = key.replace(' ', '-').lower()
+            value = value.lstrip()
+            # new property implies no numbered or nested sub-properties
+            if outer_groups:
+                parent, name, items, _, _ = outer_groups[0]
+                outer_groups = []
+            column = -1
+            numbered = False
+            if value == '':  # 'key:' no value, new group of sub-properties
+                parent = contents
+                name = key
+                items = contents[key] = {}
+            else:  # 'key: value' line
+                contents[key] = value
+            continue
 
-            if key is None and value is None:
-                # Parse single attribute collection properties
-                # Template
-                #  1) template1
-                #  2) template2
-                #
-                # or
-                # Template
-                #  template1
-                #  template2
-                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
+        # sub-properties are indented
+        stripped = line.lstrip()
+        indent = len(line) - len(stripped)
+        # lines indented up to a nested group start close it
+        while indent <= column:
+            parent, name, items, column, numbered = outer_groups.pop()
+        if items is None:  # first line of a nested group
+            items = parent[name] = {}
+        # values are separated by ':' or '=>'
+        key, separator, value = stripped.partition(':')
+        if not separator:
+            key, separator, value = stripped.partition(' =>')
+            if not separator and '=>' in stripped:
+                raise ValueError(
+                    u'Not able to parse info line "{0}"'.format(line))
+        if not separator:
+            # Parse single attribute collection properties
+            # Template
+            #  1) template1
+            #  2) template2
+            #
+            # or
+            # Template
+            #  template1
+            #  template2
+            if stripped[:1].isdigit():
+                match = numbered_value(stripped)
+                if match is not None:
+                    stripped = match.group(1)
+            if isinstance(items, dict):
+                items = parent[name] = []
+            items.append(stripped)
+            continue
+        # some properties have many numbered values
+        # Example:
+        # Content:
+        #  1) Repo Name: repo1
+        #     URL:       /custom/4f84fc90-9ffa-...
+        #  2) Repo Name: puppet1
+        #     URL:       /custom/4f84fc90-9ffa-...
+        if key[:1].isdigit():
+            match = numbered_key(key)
+            if match is not None:
+                numbered = True
+                indent += match.end()
+                # no. 1) we need to change dict() to list()
+                if int(match.group(1)) == 1:
+                    items = parent[name] = []
+                # remove number from key
+                key = remove_numberings('', key)
+                # append empty dict to array
+                items.append({})
+        key = key.lstrip().replace(' ', '-').lower()
+        value = value.lstrip()
+        # add value to dictionary
+        properties = items[-1] if numbered else items
+        properties[key] = value
+        if value == '':  # 'key:' no value, may start a nested group
+            outer_groups.append((parent, name, items, column, numbered))
+            parent = properties
+            name = key
+            items = None
+            column = indent
+            numbered = False
 
-                if match is None:
-                    match = re.match(r'(.*)$', line.lstrip())
+    return contents
 
-                value = match.group(1)
 
-                if isinstance(contents[sub_prop], dict):
-                    contents[sub_prop] = []
+def _normalize_json(value):
+    """Convert decoded JSON data to the shape of the parsed text output.
 
-                contents[sub_prop].append(value)
-            else:
-                # some properties have many numbered values
-                # Example:
-                # Content:
-                #  1) Repo Name: repo1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                #  2) Repo Name: puppet1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                starts_with_number = re.match(r'(\d+)\)', key)
-                if starts_with_number:
-                    sub_num = int(starts_with_number.group(1))
-                    # no. 1) we need to change dict() to list()
-                    if sub_num == 1:
-                        contents[sub_prop] = []
-                    # remove number from key
-                    key = re.sub(r'\d+\)', '', key)
-                    # append empty dict to array
-                    contents[sub_prop].append({})
-
-                key = key.lstrip().replace(' ', '-').lower()
-
-                # add value to dictionary
-                if sub_num is not None:
-                    contents[sub_prop][-1][key] = value.lstrip()
+    Keys are lowercased with dashes instead of spaces and scalar values are
+    converted to the text hammer shows for them.
+
+    """
+    if isinstance(value, six.text_type):
+        return value
+    if isinstance(value, dict):
+        return {
+            key.replace(' ', '-').lower(): _normalize_json(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_normalize_json(item) for item in value]
+    if value is None:
+        return u''
+    if value is True:
+        return u'yes'
+    if value is False:
+        return u'no'
+    return six.text_type(value)
+
+
+def parse_json(data):
+    """Normalize the decoded JSON output of a hammer command.
+
+    The JSON output has the same structure as the info and CSV outputs, but
+    uses the hammer field labels as keys and JSON types as values. This
+    returns the same dicts and lists :func:`parse_info` and :func:`parse_csv`
+    return, so the results do not depend on the output format.
+
+    Like in the parsed info output, properties of an object without a value
+    are empty dicts, while empty values of list rows are empty strings.
+
+    :param data: The JSON output decoded with :func:`load_json`.
+
+    """
+    if isinstance(data, dict):
+        return {
+            key.replace(' ', '-').lower():
+                {} if value is None else _normalize_json(value)
+            for key, value in data.items()
+        }
+    return _normalize_json(data)
+
+
+class CommandTree(object):
+    """The tree of the hammer commands, with their options and subcommands.
+
+    Each node is a dict like the ones returned by :func:`parse_help`, with
+    its subcommands nodes. Nodes are indexed by their command path, like
+    ``hammer organization create``, so looking up a command does not walk
+    the tree::
+
+        tree = CommandTree.load(get_data_file('hammer_commands.json'))
+        tree.options('hammer organization create')
+
+    :param dict root: The node of the root command.
+    :param str command: The root command.
+
+    """
+    #: Pickle protocol of the cache, readable by Python 2 and 3.
+    PICKLE_PROTOCOL = 2
+
+    def __init__(self, root, command='hammer'):
+        self.root = root
+        self.command = command
+        self._index = {}
+        nodes = [(command, root)]
+        while nodes:
+            path, node = nodes.pop()
+            self._index[path] = node
+            nodes.extend(
+                (u'{0} {1}'.format(path, subcommand['name']), subcommand)
+                for subcommand in node['subcommands']
+            )
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def __getitem__(self, path):
+        return self._index[path]
+
+    def __iter__(self):
+        return iter(sorted(self._index))
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, path, default=None):
+        """Return the node of the command ``path`` or ``default`` if there is
+        no such command.
+
+        """
+        return self._index.get(path, default)
+
+    def options(self, path):
+        """Return a set of the option names of the command ``path``."""
+        return set(option['name'] for option in self._index[path]['options'])
+
+    def subcommands(self, path):
+        """Return a set of the subcommand names of the command ``path``."""
+        return set(
+            subcommand['name']
+            for subcommand in self._index[path]['subcommands']
+        )
+
+    @classmethod
+    def load(cls, path, cache=True):
+        """Load the tree from a JSON file, like the one written by
+        ``scripts/hammer_command_tree.py``.
+
+        The tree is cached as a pickle next to the JSON file, with the
+        ``.pickle`` extension, which is loaded instead of the JSON file while
+        it is not older than it. Failing to write the cache is not an error.
+
+        :param str path: The path of the JSON file.
+        :param bool cache: Whether to use the pickle cache.
+
+        """
+        cache_path = os.path.splitext(path)[0] + '.pickle'
+        if cache:
+            try:
+                if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+                    with open(cache_path, 'rb') as handler:
+                        return cls(pickle.load(handler))
+            except Exception as err:  # pylint:disable=broad-except
+                logger.debug(
+                    u'Not using the command tree cache %s: %s',
+                    cache_path, err
+                )
+        with io.open(path, encoding='utf-8') as handler:
+            root = load_json(handler.read())
+        if cache:
+            temp_path = u'{0}.{1}'.format(cache_path, os.getpid())
+            try:
+                with open(temp_path, 'wb') as handler:
+                    pickle.dump(root, handler, cls.PICKLE_PROTOCOL)
+                os.rename(temp_path, cache_path)
+            except EnvironmentError as err:
+                logger.debug(
+                    u'Failed to write the command tree cache %s: %s',
+                    cache_path, err
+                )
+        return cls(root)
+
+    @staticmethod
+    def _parse_help(output):
+        """Parse the help ``output`` of a command into a node, with the
+        ``help_hash`` of the output.
+
+        """
+        if not isinstance(output, six.string_types):
+            output = u'\n'.join(output or [])
+        contents = parse_help(output.split(u'\n'))
+        contents[u'help_hash'] = hashlib.sha1(
+            output.encode('utf-8')).hexdigest()
+        return contents
+
+    @classmethod
+    def fetch(cls, command='hammer', hostname=None, max_channels=10,
+              previous=None):
+        """Build the tree from the help of the commands on the server.
+
+        The help of all the commands of each level of the tree is fetched at
+        once, running up to ``max_channels`` commands at the same time on a
+        single SSH connection.
+
+        Each node keeps a ``help_hash`` of the help output it was parsed
+        from. When a ``previous`` tree is given, the subcommands of a command
+        whose help did not change are copied from it instead of being
+        fetched again. Changes to those subcommands which do not change the
+        parent help are not detected, so only pass a ``previous`` tree for
+        quick updates. The subcommands of the root command are always
+        fetched.
+
+        :param str command: The root command.
+        :param str hostname: The hostname of the server. If ``None``
+            ``server.hostname`` from the configuration will be used.
+        :param int max_channels: Maximum number of help commands running at
+            the same time.
+        :param previous: A :class:`CommandTree` fetched before.
+
+        """
+        # robottelo.ssh parses the hammer output with this module
+        from robottelo import ssh
+        root = cls._parse_help(ssh.command(
+            u'{0} --help'.format(command), hostname=hostname).stdout)
+        level = [(command, root)]
+        while True:
+            nodes = [
+                (u'{0} {1}'.format(path, subcommand['name']), subcommand)
+                for path, node in level
+                for subcommand in node['subcommands']
+            ]
+            if not nodes:
+                break
+            results = ssh.command_many(
+                [u'{0} --help'.format(path) for path, _ in nodes],
+                hostname=hostname,
+                max_channels=max_channels,
+            )
+            level = []
+            for (path, node), result in zip(nodes, results):
+                node.update(cls._parse_help(result.stdout))
+                unchanged = previous is not None and (
+                    previous.get(path, {}).get('help_hash') ==
+                    node['help_hash']
+                )
+                if unchanged:
+                    node['subcommands'] = previous[path]['subcommands']
                 else:
-                    contents[sub_prop][key] = value.lstrip()
-        else:
-            sub_num = None  # new property implies no sub property
-            key, value = line.lstrip().split(":", 1)
-            key = key.lstrip().replace(' ', '-').lower()
-            if value.lstrip() == '':  # 'key:' no value, new sub-property
-                sub_prop = key
-                contents[sub_prop] = {}
-            else:  # 'key: value' line
-                contents[key] = value.lstrip()
+                    level.append((path, node))
+        return cls(root, command)
 
-    return contents
+    def to_json(self):
+        """Return the tree as JSON, in the format read by :meth:`load`."""
+        return json.dumps(self.root, indent=2, sort_keys=True)
@@ -0,0 +1,371 @@
+# -*- encoding: utf-8 -*-
+"""Run hammer commands on long-lived hammer processes.
+
+Starting hammer loads Ruby, hammer and all of its plugins, which takes a
+large share of the time of every CLI command. A :class:`HammerShell` starts a
+small Ruby driver on the server which loads hammer once and then runs every
+command it receives on the same process.
+
+Commands are sent to the driver as JSON encoded lines on its stdin. After each
+command the driver writes a boundary line with the command exit status to
+stdout and another one to stderr, which delimit the output of each command.
+
+Hammer keeps the API connection it creates for the first command, so each
+process only runs commands of a single user. Commands are split into
+arguments by Ruby ``Shellwords``, which handles quoting the same way the shell
+does but does not expand variables or run substitutions, commands relying on
+those are run on a new hammer process.
+
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import select
+import socket
+import threading
+import time
+import uuid
+
+from six.moves import shlex_quote
+
+from robottelo import ssh
+from robottelo.config import settings
+
+logger = logging.getLogger(__name__)
+
+#: Ruby driver which loads hammer once and runs the commands read from stdin.
+#: It is started with the boundary as its single argument.
+DRIVER = r'''
+require 'json'
+require 'shellwords'
+require 'stringio'
+boundary = ARGV.shift
+STDOUT.sync = true
+STDERR.sync = true
+ARGV.replace(['--version'])
+begin
+  load Gem.bin_path('hammer_cli', 'hammer')
+rescue SystemExit
+end
+finish = lambda do |code|
+  $stdin = STDIN
+  $stdout = STDOUT
+  $stderr = STDERR
+  STDOUT.write("\n#{boundary} #{code}\n")
+  STDERR.write("\n#{boundary} #{code}\n")
+end
+finish.call('ready')
+while (line = STDIN.gets)
+  $stdin = StringIO.new
+  begin
+    code = HammerCLI::MainCommand.run(
+      'hammer', JSON.parse(line).first.shellsplit, {})
+  rescue SystemExit => e
+    code = e.status
+  rescue Exception => e
+    STDERR.write("#{e.class}: #{e.message}\n")
+    code = 70
+  end
+  finish.call(code.is_a?(Integer) ? code : 0)
+end
+'''
+
+#: Commands using shell features the driver can not reproduce.
+SHELL_FEATURES_REGEX = re.compile(r'[$`|;&<>\n]')
+
+
+class HammerShellError(Exception):
+    """Indicates that a command could not be sent to a hammer shell. The
+    command did not run and can be run on a new hammer process.
+
+    """
+
+
+class HammerShellExited(Exception):
+    """Indicates that the hammer shell exited while running a command."""
+
+
+class _FramedOutput(object):
+    """Buffer of a driver output stream, split on the boundary lines."""
+    def __init__(self, boundary):
+        self.data = bytearray()
+        self.prefix = b'\n' + boundary + b' '
+        self._scanned = 0
+
+    def feed(self, data):
+        """Append data received from the driver."""
+        self.data.extend(data)
+
+    def pop(self):
+        """Return the output up to the next boundary line.
+
+        :return: A tuple in the form ``(output, status)`` or ``None`` if the
+            boundary line was not received yet.
+
+        """
+        index = self.data.find(self.prefix, self._scanned)
+        if index == -1:
+            self._scanned = max(0, len(self.data) - len(self.prefix) + 1)
+            return None
+        end = self.data.find(b'\n', index + len(self.prefix))
+        if end == -1:
+            self._scanned = index
+            return None
+        output = bytes(self.data[:index])
+        status = bytes(self.data[index + len(self.prefix):end])
+        del self.data[:end + 1]
+        self._scanned = 0
+        return output, status
+
+
+class HammerShell(object):
+    """A hammer process running on a host, ready to run commands.
+
+    :param str hostname: The hostname of the server.
+    :param str locale: The ``LANG`` of the hammer process.
+    :param str user: The user which runs the commands.
+    :param str password: The password of ``user``.
+
+    """
+    def __init__(self, hostname, locale, user, password):
+        self.hostname = hostname
+        self.locale = locale
+        self.user = user
+        self.password = password
+        self.boundary = u'__robottelo_hammer_{0}__'.format(uuid.uuid4().hex)
+        self._client = None
+        self._channel = None
+        self._stdout = _FramedOutput(self.boundary.encode('ascii'))
+        self._stderr = _FramedOutput(self.boundary.encode('ascii'))
+
+    @property
+    def alive(self):
+        """Whether the hammer process can run commands."""
+        return (
+            self._channel is not None and
+            not self._channel.closed and
+            not self._channel.exit_status_ready()
+        )
+
+    def start(self, timeout=120):
+        """Start the hammer process and wait until hammer is loaded.
+
+        :raises HammerShellError: If the hammer process can not be started.
+
+        """
+        try:
+            self._client = ssh._open_connection(
+                self.hostname,
+                settings.server.ssh_username,
+                settings.server.ssh_key,
+                10,
+            )
+            self._channel = self._client.get_transport().open_session()
+            self._channel.exec_command(u'LANG={0} ruby -e {1} {2}'.format(
+                self.locale, shlex_quote(DRIVER), self.boundary))
+            _, stderr, status = self._read_output(timeout)
+        except Exception as err:
+            self.close()
+            raise HammerShellError(
+                u'Failed to start hammer shell on {0}: {1}'
+                .format(self.hostname, err)
+            )
+        if status != b'ready':
+            self.close()
+            raise HammerShellError(
+                u'Failed to start hammer shell on {0}: {1}'
+                .format(self.hostname, stderr.decode('utf-8', 'replace'))
+            )
+
+    def execute(self, command, timeout=120):
+        """Run a hammer command.
+
+        :param str command: The hammer arguments, as they would be passed to
+            hammer on a shell.
+        :param int timeout: Maximum number of seconds to wait for the command
+            to finish.
+        :return: A tuple in the form ``(stdout, stderr, return_code)``, where
+            ``stdout`` and ``stderr`` are bytes.
+        :raises HammerShellError: If the command could not be sent.
+        :raises HammerShellExited: If the hammer process exited while
+            running the command.
+        :raises socket.timeout: If the command does not finish in time.
+
+        """
+        request = json.dumps([command]) + u'\n'
+        try:
+            if not self.alive:
+                raise HammerShellError('The hammer shell is not running')
+            self._channel.sendall(request.encode('utf-8'))
+        except (EOFError, socket.error) as err:
+            self.close()
+            raise HammerShellError(err)
+        try:
+            stdout, stderr, status = self._read_output(timeout)
+        except Exception:
+            self.close()
+            raise
+        return stdout, stderr, int(status)
+
+    def _read_output(self, timeout):
+        """Receive the output of the driver up to the next boundary lines.
+
+        :return: A tuple in the form ``(stdout, stderr, status)``.
+
+        """
+        deadline = time.time() + timeout
+        channel = self._channel
+        stdout = stderr = None
+        while True:
+            if stdout is None:
+                stdout = self._stdout.pop()
+            if stderr is None:
+                stderr = self._stderr.pop()
+            if stdout is not None and stderr is not None:
+                return stdout[0], stderr[0], stdout[1]
+            if channel.recv_ready():
+                self._stdout.feed(channel.recv(ssh.RECV_SIZE))
+            elif channel.recv_stderr_ready():
+                self._stderr.feed(channel.recv_stderr(ssh.RECV_SIZE))
+            elif channel.eof_received or channel.exit_status_ready():
+                raise HammerShellExited(
+                    u'The hammer shell on {0} exited'.format(self.hostname))
+            else:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise socket.timeout()
+                select.select([channel], [], [], min(remaining, 1))
+
+    def close(self):
+        """Stop the hammer process and close its connection."""
+        if self._channel is not None:
+            self._channel.close()
+            self._channel = None
+        if self._client is not None:
+            ssh._close_connection(self._client)
+            self._client = None
+
+
+class HammerShellPool(object):
+    """A thread-safe pool of :class:`HammerShell`.
+
+    Each command checks out an idle shell of the same host, locale and user,
+    or starts a new one, and returns it to the pool when done, so commands run
+    by different threads never share a shell. At most ``max_size`` idle
+    shells are kept running, the least recently used ones are stopped.
+
+    If a shell can not be started on a host, no other shell is started on it
+    and :func:`command` raises :class:`HammerShellError` right away.
+
+    :param int max_size: Maximum number of idle shells kept running.
+
+    """
+    def __init__(self, max_size=4):
+        self.max_size = max_size
+        self._idle = []
+        self._unavailable = set()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        """Forget all shells inherited from a parent process.
+
+        Must be called with the lock acquired.
+
+        """
+        if self._pid != os.getpid():
+            self._idle = []
+            self._unavailable = set()
+            self._pid = os.getpid()
+
+    def checkout(self, hostname, locale, user, password):
+        """Get an idle shell or start a new one.
+
+        :raises HammerShellError: If a shell can not be started on
+            ``hostname``.
+
+        """
+        key = (hostname, locale, user, password)
+        with self._lock:
+            self._check_pid()
+            if hostname in self._unavailable:
+                raise HammerShellError(
+                    u'The hammer shell is not available on {0}'
+                    .format(hostname)
+                )
+            for shell in reversed(self._idle):
+                if (shell.hostname, shell.locale,
+                        shell.user, shell.password) == key:
+                    self._idle.remove(shell)
+                    if shell.alive:
+                        return shell
+                    shell.close()
+        shell = HammerShell(hostname, locale, user, password)
+        try:
+            shell.start()
+        except HammerShellError as err:
+            logger.warning(u'%s, falling back to one-shot hammer', err)
+            with self._lock:
+                self._unavailable.add(hostname)
+            raise
+        return shell
+
+    def checkin(self, shell):
+        """Return a shell to the pool."""
+        stale = []
+        with self._lock:
+            self._check_pid()
+            if shell.alive:
+                self._idle.append(shell)
+            while len(self._idle) > self.max_size:
+                stale.append(self._idle.pop(0))
+        for shell in stale:
+            shell.close()
+
+    def close_all(self):
+        """Stop all idle shells."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._unavailable = set()
+        for shell in idle:
+            shell.close()
+
+
+_pool = HammerShellPool()
+atexit.register(_pool.close_all)
+
+
+def command(command, user, password, output_format=None, timeout=None,
+            hostname=None):
+    """Run a hammer command on a hammer shell.
+
+    :param str command: The hammer arguments, as they would be passed to
+        hammer on a shell, including the global options.
+    :param str user: The user which runs the command.
+    :param str password: The password of ``user``.
+    :param str output_format: The hammer output format, used to parse the
+        output.
+    :param int timeout: Maximum number of seconds to wait for the command to
+        finish. Defaults to 120 seconds.
+    :param str hostname: The hostname of the server. If ``None``
+        ``server.hostname`` from the configuration will be used.
+    :return: A :class:`robottelo.ssh.SSHCommandResult`.
+    :raises HammerShellError: If the command can not run on a hammer shell,
+        it did not run and should be run on a new hammer process.
+
+    """
+    if SHELL_FEATURES_REGEX.search(command):
+        raise HammerShellError(
+            u'Command uses shell features: {0}'.format(command))
+    if timeout is None:
+        timeout = 120
+    hostname = hostname or settings.server.hostname
+    shell = _pool.checkout(hostname, settings.locale, user, password)
+    logger.debug('>>> [%s] (hammer shell) %s', hostname, command)
+    try:
+        stdout, stderr, return_code = shell.execute(command, timeout)
+    finally:
+        _pool.checkin(shell)
+    return ssh._build_result(stdout, stderr, return_code, output_format)
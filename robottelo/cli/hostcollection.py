@@ -34,14 +34,13 @@ class HostCollection(Base):
     @classmethod
     def add_content_host(cls, options=None):
         """Associate a content-host"""
-        cls.command_sub = 'add-content-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command('add-content-host', options))
 
     @classmethod
     def remove_content_host(cls, options=None):
         """Remove a content-host"""
-        cls.command_sub = 'remove-content-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command('remove-content-host', options))
 
     @classmethod
     def content_hosts(cls, options=None):
@@ -60,6 +59,6 @@ class HostCollection(Base):
             --organization-id ORGANIZATION_ID
             --organization-label Organization label to search by
         """
-        cls.command_sub = 'content-hosts'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command('content-hosts', options),
+            output_format='csv')
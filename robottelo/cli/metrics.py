@@ -0,0 +1,253 @@
+# -*- encoding: utf-8 -*-
+"""Client side metrics of the hammer commands run by the CLI helpers.
+
+:meth:`robottelo.cli.base.Base.execute` records, for every hammer command it
+runs, the following metrics on histograms of the command name, for example
+``organization create``:
+
+``wall_time``
+    Seconds spent in ``execute``, from building the command line to the
+    parsed output.
+``hammer_time``
+    Seconds hammer ran, parsed from the ``time -p`` output. Only recorded when
+    ``performance.time_hammer`` is enabled.
+``ssh_overhead``
+    Seconds spent running the SSH command besides the hammer run time. Only
+    recorded along ``hammer_time``.
+``output_size``
+    Bytes of the command output.
+``parse_time``
+    Seconds spent parsing the command output.
+
+The histograms of the whole session are exported to
+``hammer.metrics_path`` when the interpreter exits, as JSON or CSV depending
+on the file extension.
+
+"""
+import atexit
+import csv
+import io
+import json
+import logging
+import threading
+
+import six
+
+from robottelo.config import settings
+
+logger = logging.getLogger(__name__)
+
+#: The unit of each metric.
+METRICS = {
+    'hammer_time': 'seconds',
+    'output_size': 'bytes',
+    'parse_time': 'seconds',
+    'ssh_overhead': 'seconds',
+    'wall_time': 'seconds',
+}
+
+#: Histograms count integers, values in seconds are counted in microseconds.
+_SCALES = {'bytes': 1, 'seconds': 1000000}
+
+#: The percentiles exported for each histogram.
+PERCENTILES = (50, 90, 99)
+
+
+class Histogram(object):
+    """A histogram of non-negative integers with a bounded relative error.
+
+    Values are counted in buckets like in HdrHistogram: values up to
+    ``2 ** precision_bits`` have their own bucket, and higher values share
+    buckets whose width is at most ``2 ** (1 - precision_bits)`` of the
+    values, so about 1% with the default precision. Only non-empty buckets
+    are stored.
+
+    :param int precision_bits: The number of significant bits kept.
+
+    """
+    def __init__(self, precision_bits=7):
+        self.precision_bits = precision_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        """Return the bucket index of ``value``."""
+        shift = value.bit_length() - self.precision_bits
+        if shift <= 0:
+            return value
+        return (shift << (self.precision_bits - 1)) + (value >> shift)
+
+    def _highest_value(self, bucket):
+        """Return the highest value counted in ``bucket``."""
+        half = 1 << (self.precision_bits - 1)
+        shift = bucket // half - 1
+        if shift <= 0:
+            return bucket
+        return ((bucket - shift * half + 1) << shift) - 1
+
+    def record(self, value):
+        """Count ``value``, negative values are counted as zero."""
+        value = max(0, int(value))
+        bucket = self._bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        """The mean of the values, or ``None`` if there is none."""
+        if self.count == 0:
+            return None
+        return self.total / float(self.count)
+
+    def percentile(self, percentile):
+        """Return the value below or at which ``percentile`` percent of the
+        values are, or ``None`` if there is none.
+
+        Like HdrHistogram, the highest value of the bucket is returned, capped
+        to the highest value counted.
+
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(round(self.count * percentile / 100.0)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._highest_value(bucket), self.max)
+        return self.max
+
+    def buckets(self):
+        """Return a list of ``(highest_value, count)`` of the non-empty
+        buckets, sorted by value.
+
+        """
+        return [
+            (self._highest_value(bucket), self.counts[bucket])
+            for bucket in sorted(self.counts)
+        ]
+
+
+class CommandMetrics(object):
+    """Thread-safe collection of the histograms of each command and metric.
+    """
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, command, metric, value):
+        """Record ``value`` of ``metric`` for ``command``.
+
+        :param str command: The command name, like ``organization create``.
+        :param str metric: One of :data:`METRICS`.
+        :param value: The value, in the unit of ``metric``.
+
+        """
+        scale = _SCALES[METRICS[metric]]
+        with self._lock:
+            key = (command, metric)
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].record(round(value * scale))
+
+    def histogram(self, command, metric):
+        """Return the histogram of ``metric`` for ``command``, or ``None``
+        if nothing was recorded.
+
+        """
+        return self._histograms.get((command, metric))
+
+    def reset(self):
+        """Forget all the recorded values."""
+        with self._lock:
+            self._histograms = {}
+
+    def summary(self):
+        """Return a list of dicts summarizing each histogram, sorted by
+        command and metric. Values are in the unit of the metric.
+
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        rows = []
+        for (command, metric), histogram in histograms:
+            scale = float(_SCALES[METRICS[metric]])
+            row = {
+                'command': command,
+                'metric': metric,
+                'unit': METRICS[metric],
+                'count': histogram.count,
+                'total': histogram.total / scale,
+                'min': histogram.min / scale,
+                'mean': histogram.mean / scale,
+                'max': histogram.max / scale,
+                'buckets': [
+                    [value / scale, count]
+                    for value, count in histogram.buckets()
+                ],
+            }
+            for percentile in PERCENTILES:
+                row['p{0}'.format(percentile)] = (
+                    histogram.percentile(percentile) / scale)
+            rows.append(row)
+        return rows
+
+    def to_json(self):
+        """Return the summary of the histograms, with their buckets, as
+        JSON.
+
+        """
+        return json.dumps(self.summary(), indent=2, sort_keys=True)
+
+    def to_csv(self):
+        """Return the summary of the histograms as CSV, one row for each
+        command and metric, without the buckets.
+
+        """
+        fields = ['command', 'metric', 'unit', 'count', 'total', 'min',
+                  'mean']
+        fields.extend('p{0}'.format(percentile) for percentile in PERCENTILES)
+        fields.append('max')
+        output = six.StringIO()
+        writer = csv.writer(output, lineterminator='\n')
+        writer.writerow(fields)
+        for row in self.summary():
+            writer.writerow([row[field] for field in fields])
+        return output.getvalue()
+
+    def export(self, path):
+        """Write the histograms to ``path``, as CSV if its extension is
+        ``.csv`` and as JSON otherwise.
+
+        """
+        if path.endswith('.csv'):
+            data = self.to_csv()
+        else:
+            data = self.to_json()
+        with io.open(path, 'w', encoding='utf-8') as handler:
+            handler.write(six.text_type(data))
+
+
+#: The :class:`CommandMetrics` recorded by the CLI helpers.
+metrics = CommandMetrics()
+
+
+def _export_at_exit():
+    """Export the recorded metrics if ``hammer.metrics_path`` is set."""
+    if not settings.configured or not settings.hammer.metrics_path:
+        return
+    try:
+        metrics.export(settings.hammer.metrics_path)
+    except (IOError, OSError) as err:
+        logger.warning(u'Failed to export hammer metrics: %s', err)
+
+
+atexit.register(_export_at_exit)
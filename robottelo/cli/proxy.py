@@ -49,7 +49,7 @@ def default_url_on_new_port(oldport, newport):
     ssh.upload_file(key, '/tmp/dsa_{0}'.format(newport))
     ssh.command('chmod 700 /tmp/dsa_{0}'.format(newport))
 
-    with ssh._get_connection() as connection:
+    with ssh._get_connection(pooled=False) as connection:
         command = (
             u'ssh -i {0} -t -t -o UserKnownHostsFile=/dev/null'
             ' -o StrictHostKeyChecking=no -L {1}:{2}:{3} {4}@{5}'
@@ -76,11 +76,9 @@ class Proxy(Base):
     @classmethod
     def importclasses(cls, options=None):
         """Import puppet classes from puppet proxy."""
-        cls.command_sub = 'import-classes'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command('import-classes', options))
 
     @classmethod
     def refresh_features(cls, options=None):
         """Refreshes smart proxy features"""
-        cls.command_sub = 'refresh-features'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command('refresh-features', options))
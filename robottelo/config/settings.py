@@ -215,6 +215,32 @@ class ServerSettings(FeatureSettings):
             self.get_pub_url(), 'katello-ca-consumer-latest.noarch.rpm')
 
 
+class BugsSettings(FeatureSettings):
+    """Bug trackers settings definitions."""
+    def __init__(self, *args, **kwargs):
+        super(BugsSettings, self).__init__(*args, **kwargs)
+        self.cache_path = None
+        self.cache_ttl = None
+        self.offline = None
+
+    def read(self, reader):
+        """Read bug trackers settings."""
+        self.cache_path = reader.get('bugs', 'cache_path')
+        self.cache_ttl = reader.get('bugs', 'cache_ttl', 3600, int)
+        self.offline = reader.get('bugs', 'offline', False, bool)
+
+    def validate(self):
+        """Validate bug trackers settings."""
+        validation_errors = []
+        if self.cache_ttl < 0:
+            validation_errors.append(
+                '[bugs] cache_ttl must not be negative.')
+        if self.offline and not self.cache_path:
+            validation_errors.append(
+                '[bugs] offline requires cache_path to be provided.')
+        return validation_errors
+
+
 class ClientsSettings(FeatureSettings):
     """Clients settings definitions."""
     def __init__(self, *args, **kwargs):
@@ -306,6 +332,43 @@ class FakeManifestSettings(FeatureSettings):
         return validation_errors
 
 
+class HammerSettings(FeatureSettings):
+    """Hammer CLI execution settings definitions."""
+    def __init__(self, *args, **kwargs):
+        super(HammerSettings, self).__init__(*args, **kwargs)
+        self.json_output = None
+        self.lazy_create = None
+        self.metrics_path = None
+        self.mode = None
+        self.object_cache_size = None
+        self.rh_org_pool_size = None
+
+    def read(self, reader):
+        """Read hammer settings."""
+        self.json_output = reader.get('hammer', 'json_output', False, bool)
+        self.lazy_create = reader.get('hammer', 'lazy_create', False, bool)
+        self.metrics_path = reader.get('hammer', 'metrics_path')
+        self.mode = reader.get('hammer', 'mode', 'oneshot')
+        self.object_cache_size = reader.get(
+            'hammer', 'object_cache_size', 0, int)
+        self.rh_org_pool_size = reader.get(
+            'hammer', 'rh_org_pool_size', 0, int)
+
+    def validate(self):
+        """Validate hammer settings."""
+        validation_errors = []
+        if self.mode not in ('oneshot', 'shell'):
+            validation_errors.append(
+                '[hammer] mode must be one of oneshot or shell.')
+        if self.object_cache_size < 0:
+            validation_errors.append(
+                '[hammer] object_cache_size must not be negative.')
+        if self.rh_org_pool_size < 0:
+            validation_errors.append(
+                '[hammer] rh_org_pool_size must not be negative.')
+        return validation_errors
+
+
 class LDAPSettings(FeatureSettings):
     """LDAP settings definitions."""
     def __init__(self, *args, **kwargs):
@@ -540,11 +603,13 @@ class Settings(object):
         self.window_manager_command = None
 
         # Features
+        self.bugs = BugsSettings()
         self.clients = ClientsSettings()
         self.compute_resources = LibvirtHostSettings()
         self.discovery = DiscoveryISOSettings()
         self.docker = DockerSettings()
         self.fake_manifest = FakeManifestSettings()
+        self.hammer = HammerSettings()
         self.ldap = LDAPSettings()
         self.oscap = OscapSettings()
         self.performance = PerformanceSettings()
@@ -574,6 +639,9 @@ class Settings(object):
             self._validate_robottelo_settings())
         self.server.read(self.reader)
         self._validation_errors.extend(self.server.validate())
+        if self.reader.has_section('bugs'):
+            self.bugs.read(self.reader)
+            self._validation_errors.extend(self.bugs.validate())
         if self.reader.has_section('clients'):
             self.clients.read(self.reader)
             self._validation_errors.extend(self.clients.validate())
@@ -589,6 +657,9 @@ class Settings(object):
         if self.reader.has_section('fake_manifest'):
             self.fake_manifest.read(self.reader)
             self._validation_errors.extend(self.fake_manifest.validate())
+        if self.reader.has_section('hammer'):
+            self.hammer.read(self.reader)
+            self._validation_errors.extend(self.hammer.validate())
         if self.reader.has_section('ldap'):
             self.ldap.read(self.reader)
             self._validation_errors.extend(self.ldap.validate())
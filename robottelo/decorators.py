@@ -1,20 +1,30 @@
 # -*- encoding: utf-8 -*-
 """Implements various decorators"""
-import bugzilla
+import collections
+import json
 import logging
+import os
 import pytest
-import requests
+import six
+import sqlite3
+import threading
+import time
 import unittest2
 
-from functools import wraps
+from functools import partial, wraps
 from robottelo.config import settings
 from robottelo.constants import BZ_OPEN_STATUSES, NOT_IMPLEMENTED
+from robottelo.lazy import LazyModule
+from robottelo.parallel import StepGraph
 from six.moves.xmlrpc_client import Fault
 from xml.parsers.expat import ExpatError, ErrorString
 
+# The bug trackers clients are only imported when a bug status is fetched
+bugzilla = LazyModule('bugzilla')
+requests = LazyModule('requests')
+
 BUGZILLA_URL = "https://bugzilla.redhat.com/xmlrpc.cgi"
 LOGGER = logging.getLogger(__name__)
-OBJECT_CACHE = {}
 REDMINE_URL = 'http://projects.theforeman.org'
 
 # Test Tier Decorators
@@ -31,7 +41,8 @@ _bugzilla = {}
 
 # A cache used by redmine-related functions.
 #
-# * _redmine['closed_statuses'] is used by `_redmine_closed_issue_statuses`
+# * _redmine['closed_statuses'] is used by `_redmine_closed_issue_statuses`,
+#   it is ``False`` when the statuses are not in the bug cache
 # * _redmine['issues'] is used by `skip_if_rm_bug_open`
 #
 _redmine = {
@@ -39,6 +50,12 @@ _redmine = {
     'issues': {},
 }
 
+# The IDs of the bugs referenced by `skip_if_bug_open`, by bug type, and the
+# ones `prefetch_bugs` already tried to fetch.
+_referenced_bugs = {'bugzilla': set(), 'redmine': set()}
+_prefetched_bugs = {'bugzilla': set(), 'redmine': set()}
+_prefetch_lock = threading.Lock()
+
 
 def skip_if_not_set(*options):
     """Skips test if expected configuration is not set.
@@ -136,8 +153,154 @@ def stubbed(reason=None):
     return wrapper
 
 
+def _freeze(value):
+    """Return a hashable version of ``value``, with dicts sorted by key."""
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class ObjectCache(object):
+    """A thread-safe cache of the objects created by the ``make_*``
+    functions.
+
+    Objects are cached under the name of the function without the ``make_``
+    prefix, like ``org``, and their options, so ``make_org(cached=True)`` and
+    ``make_product({u'organization-id': org['id']}, cached=True)`` share an
+    org and a product of that org with every caller passing the same options.
+    Threads asking for an object being created wait for it instead of
+    creating another one.
+
+    The cache lasts the whole session. When ``max_size`` is set, the least
+    recently used objects are dropped once more are cached, the size of
+    :data:`OBJECT_CACHE` is set by ``[hammer] object_cache_size``. ``hits``
+    and ``misses`` count the lookups.
+
+    :param int max_size: Maximum number of objects cached, unbounded if
+        ``None``.
+
+    """
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._objects = collections.OrderedDict()
+        self._creating = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name, options=None):
+        """Return the cache key of an object created with ``options``.
+
+        Options are compared regardless of their order, and no options is the
+        same as empty options.
+
+        """
+        return (name, _freeze(options or {}))
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._objects
+
+    def __len__(self):
+        with self._lock:
+            return len(self._objects)
+
+    def _hit(self, key):
+        """Return the object of ``key`` as the most recently used one.
+
+        Must be called with the lock acquired.
+
+        """
+        self.hits += 1
+        obj = self._objects.pop(key)
+        self._objects[key] = obj
+        return obj
+
+    def get_or_create(self, name, options, create):
+        """Return the object cached for ``name`` and ``options``, or create
+        and cache it by calling ``create``.
+
+        Objects ``create`` fails to create are not cached. The threads waiting
+        for them create them one at a time, as the threads coming next do.
+
+        """
+        key = self.key(name, options)
+        with self._lock:
+            if key in self._objects:
+                return self._hit(key)
+            creating = self._creating.setdefault(key, threading.Lock())
+        with creating:
+            with self._lock:
+                if key in self._objects:
+                    return self._hit(key)
+                self.misses += 1
+            obj = create()
+            with self._lock:
+                self._objects[key] = obj
+                # Only dropped once the object is cached, so all the threads
+                # creating it share the same lock until then
+                self._creating.pop(key, None)
+                while (self.max_size is not None and
+                        len(self._objects) > self.max_size):
+                    self._objects.popitem(last=False)
+        return obj
+
+    def discard(self, name, options=None):
+        """Drop the object cached for ``name`` and ``options``, if any."""
+        with self._lock:
+            self._objects.pop(self.key(name, options), None)
+
+    def discard_entity(self, name, entity_id):
+        """Drop the objects cached for ``name`` whose ID is ``entity_id``,
+        like an entity which was deleted.
+
+        """
+        entity_id = six.text_type(entity_id)
+        with self._lock:
+            for key, obj in list(self._objects.items()):
+                if key[0] != name:
+                    continue
+                try:
+                    if six.text_type(obj['id']) == entity_id:
+                        del self._objects[key]
+                except (KeyError, TypeError):
+                    continue
+
+    def clear(self, name=None):
+        """Drop all the cached objects, or the ones of ``name``."""
+        with self._lock:
+            if name is None:
+                self._objects.clear()
+                return
+            for key in list(self._objects):
+                if key[0] == name:
+                    del self._objects[key]
+
+    def reset_stats(self):
+        """Reset the ``hits`` and ``misses`` counters."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
 def cacheable(func):
-    """Decorator that makes an optional object cache available"""
+    """Decorator that makes an optional object cache available.
+
+    The decorated function receives an extra ``cached`` argument, when it is
+    ``True`` the object is looked up on :data:`OBJECT_CACHE` by the function
+    name and its options, and created only if it is not cached yet.
+
+    """
 
     @wraps(func)
     def cacheable_function(options=None, cached=False):
@@ -145,17 +308,37 @@ def cacheable(func):
         This is the function being returned.
         Requires input function's name start with 'make_'
         """
-        object_key = func.__name__.replace('make_', '')
-        if cached is True and object_key in OBJECT_CACHE:
-            return OBJECT_CACHE[object_key]
-        new_object = func(options)
-        if cached is True:
-            OBJECT_CACHE[object_key] = new_object
-        return new_object
+        if cached is not True:
+            return func(options)
+        _bound_object_cache()
+        return OBJECT_CACHE.get_or_create(
+            func.__name__.replace('make_', ''),
+            options,
+            lambda: func(options),
+        )
 
     return cacheable_function
 
 
+#: The cache of the objects created by the :func:`cacheable` functions.
+OBJECT_CACHE = ObjectCache()
+
+# Whether the size of OBJECT_CACHE was read from the settings
+_object_cache_bounded = False
+
+
+def _bound_object_cache():
+    """Set the size of :data:`OBJECT_CACHE` from the settings, once they are
+    configured.
+
+    """
+    global _object_cache_bounded  # pylint:disable=global-statement
+    if _object_cache_bounded or not settings.configured:
+        return
+    OBJECT_CACHE.max_size = settings.hammer.object_cache_size or None
+    _object_cache_bounded = True
+
+
 class ProjectModeError(Exception):
     """Indicates an error occurred while skipping based on Project Mode."""
 
@@ -238,11 +421,284 @@ class BugFetchError(Exception):
     """Indicates an error occurred while fetching information about a bug."""
 
 
+#: The fields of a Bugzilla bug read from the bug cache.
+BugzillaBug = collections.namedtuple('BugzillaBug', 'status whiteboard')
+
+
+class BugCache(object):
+    """A cache of bugs stored on disk, shared by all the processes using the
+    same file, like the pytest-xdist workers.
+
+    Bugs are stored as JSON along the time they were fetched, in a SQLite
+    database, and expire ``ttl`` seconds after being fetched.
+
+    :param str path: The database file, created if missing.
+    :param int ttl: Seconds bugs are fresh after being fetched.
+    :param int timeout: Seconds to wait for another process writing to the
+        cache.
+
+    """
+    def __init__(self, path, ttl=3600, timeout=300):
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+
+    def _connect(self):
+        """Open the database, creating it if missing."""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process created it at the same time
+                if not os.path.isdir(directory):
+                    raise
+        connection = sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS bugs ('
+            'tracker TEXT NOT NULL, bug_id TEXT NOT NULL, '
+            'data TEXT NOT NULL, fetched REAL NOT NULL, '
+            'PRIMARY KEY (tracker, bug_id))'
+        )
+        return connection
+
+    def _select(self, connection, tracker, bug_ids, stale):
+        """Return a dict mapping the cached bug IDs, as text, to their data.
+        """
+        bug_ids = [six.text_type(bug_id) for bug_id in bug_ids]
+        oldest = 0 if stale else time.time() - self.ttl
+        bugs = {}
+        # SQLite limits the number of parameters of a statement
+        for index in range(0, len(bug_ids), 500):
+            chunk = bug_ids[index:index + 500]
+            rows = connection.execute(
+                'SELECT bug_id, data FROM bugs WHERE tracker = ? AND '
+                'fetched >= ? AND bug_id IN ({0})'
+                .format(', '.join('?' * len(chunk))),
+                [tracker, oldest] + chunk
+            )
+            bugs.update((bug_id, json.loads(data)) for bug_id, data in rows)
+        return bugs
+
+    def _insert(self, connection, tracker, bugs):
+        """Store ``bugs``, a dict mapping bug IDs to their data."""
+        fetched = time.time()
+        connection.executemany(
+            'INSERT OR REPLACE INTO bugs VALUES (?, ?, ?, ?)',
+            [
+                (tracker, six.text_type(bug_id), json.dumps(data), fetched)
+                for bug_id, data in bugs.items()
+            ]
+        )
+
+    def get(self, tracker, bug_ids, stale=False):
+        """Return the cached bugs.
+
+        :param str tracker: The bug tracker, like ``bugzilla``.
+        :param bug_ids: The IDs of the bugs.
+        :param bool stale: Whether expired bugs are returned too.
+        :return: A dict mapping the IDs, as text, of the bugs found to their
+            data.
+
+        """
+        connection = self._connect()
+        try:
+            return self._select(connection, tracker, bug_ids, stale)
+        finally:
+            connection.close()
+
+    def update(self, tracker, bug_ids, fetch):
+        """Return the bugs, fetching the ones missing or expired.
+
+        The cache is locked while the bugs are fetched, so other processes
+        looking up the same bugs wait and read them from the cache instead of
+        fetching them again.
+
+        :param str tracker: The bug tracker, like ``bugzilla``.
+        :param bug_ids: The IDs of the bugs.
+        :param fetch: A callable receiving the list of IDs of the bugs to
+            fetch, and returning a dict mapping their IDs to their data.
+        :return: A dict mapping the IDs, as text, of the bugs found to their
+            data.
+
+        """
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                bugs = self._select(connection, tracker, bug_ids, False)
+                missing = [
+                    bug_id for bug_id in bug_ids
+                    if six.text_type(bug_id) not in bugs
+                ]
+                if missing:
+                    fetched = fetch(missing)
+                    self._insert(connection, tracker, fetched)
+                    bugs.update(
+                        (six.text_type(bug_id), data)
+                        for bug_id, data in fetched.items()
+                    )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        finally:
+            connection.close()
+        return bugs
+
+
+def _bugzilla_bug_data(bug):
+    """Return the fields of Bugzilla ``bug`` stored in the bug cache."""
+    return {
+        'status': getattr(bug, 'status', None),
+        'whiteboard': getattr(bug, 'whiteboard', None),
+    }
+
+
+# How the bugs of each tracker are stored in the bug cache: a function
+# returning the data stored for a bug and one returning the bug from the data.
+_BUG_CACHE_CODECS = {
+    'bugzilla': (_bugzilla_bug_data, lambda data: BugzillaBug(**data)),
+    'redmine': (
+        lambda status_id: {'status_id': status_id},
+        lambda data: data['status_id'],
+    ),
+    'redmine_statuses': (lambda statuses: statuses, lambda data: data),
+}
+
+
+def _get_bug_cache():
+    """Return the :class:`BugCache` configured in the ``[bugs]`` section, or
+    ``None`` if there is none.
+
+    """
+    if not settings.bugs.cache_path:
+        return None
+    return BugCache(settings.bugs.cache_path, settings.bugs.cache_ttl)
+
+
+def _load_bugs(tracker, bug_ids, fetch):
+    """Fetch bugs, through the bug cache if configured.
+
+    If fetching the bugs fails, the expired bugs found in the cache are used.
+    In offline mode, the bugs are only read from the cache, whatever their
+    age.
+
+    :param str tracker: The bug tracker, like ``bugzilla``.
+    :param bug_ids: The IDs of the bugs.
+    :param fetch: A callable receiving a list of bug IDs and returning a dict
+        mapping their IDs, as text, to the bugs.
+    :return: A dict mapping the IDs, as text, of the bugs found to the bugs.
+    :raises BugFetchError: If the bugs can not be fetched and are not cached.
+
+    """
+    cache = _get_bug_cache()
+    if cache is None:
+        return fetch(bug_ids)
+    encode, decode = _BUG_CACHE_CODECS[tracker]
+
+    def fetch_data(missing):
+        """Fetch the missing bugs and return the data to cache."""
+        return {
+            bug_id: encode(bug) for bug_id, bug in fetch(missing).items()}
+
+    try:
+        if settings.bugs.offline:
+            bugs = cache.get(tracker, bug_ids, stale=True)
+        else:
+            try:
+                bugs = cache.update(tracker, bug_ids, fetch_data)
+            except BugFetchError as err:
+                bugs = cache.get(tracker, bug_ids, stale=True)
+                if not bugs:
+                    raise
+                LOGGER.warning('%s. Using the expired cached bugs.', err)
+    except sqlite3.Error as err:
+        LOGGER.warning(
+            'Could not use the bug cache %s: %s', cache.path, err)
+        return fetch(bug_ids)
+    return {bug_id: decode(data) for bug_id, data in bugs.items()}
+
+
+def _connect_bugzilla():
+    """Return a connection to the Bugzilla server.
+
+    :raises BugFetchError: If the connection fails.
+
+    """
+    try:
+        bz_conn = bugzilla.RHBugzilla()
+        bz_conn.connect(BUGZILLA_URL)
+    except (TypeError, ValueError):
+        raise BugFetchError(
+            'Could not connect to {0}'.format(BUGZILLA_URL)
+        )
+    return bz_conn
+
+
+def _fetch_bugzilla_bug(bug_ids):
+    """Fetch a single Bugzilla bug.
+
+    :param bug_ids: A list with the ID of the bug.
+    :return: A dict mapping the bug ID, as text, to the python-bugzilla bug.
+    :raises BugFetchError: If an error occurs while fetching the bug.
+
+    """
+    bug_id = bug_ids[0]
+    bz_conn = _connect_bugzilla()
+    try:
+        return {six.text_type(bug_id): bz_conn.getbugsimple(bug_id)}
+    except Fault as err:
+        raise BugFetchError(
+            'Could not fetch bug. Error: {0}'.format(err.faultString)
+        )
+    except ExpatError as err:
+        raise BugFetchError(
+            'Could not interpret bug. Error: {0}'
+            .format(ErrorString(err.code))
+        )
+
+
+def _fetch_bugzilla_bugs(bug_ids):
+    """Fetch Bugzilla bugs with a single query.
+
+    Bugs which do not exist or can not be accessed are left out.
+
+    :param bug_ids: The IDs of the bugs.
+    :return: A dict mapping the IDs, as text, of the bugs fetched to
+        :class:`BugzillaBug`.
+    :raises BugFetchError: If an error occurs while fetching the bugs.
+
+    """
+    bz_conn = _connect_bugzilla()
+    try:
+        bugs = bz_conn.getbugs(
+            list(bug_ids), include_fields=['id', 'status', 'whiteboard'])
+    except Fault as err:
+        raise BugFetchError(
+            'Could not fetch bugs. Error: {0}'.format(err.faultString)
+        )
+    except ExpatError as err:
+        raise BugFetchError(
+            'Could not interpret bugs. Error: {0}'
+            .format(ErrorString(err.code))
+        )
+    return {
+        six.text_type(bug.id): BugzillaBug(**_bugzilla_bug_data(bug))
+        for bug in bugs
+        if bug is not None
+    }
+
+
 def _get_bugzilla_bug(bug_id):
     """Fetch bug ``bug_id``.
 
+    Only this bug is fetched if it was not by :func:`prefetch_bugs`.
+
     :param int bug_id: The ID of a bug in the Bugzilla database.
-    :return: A FRIGGIN UNDOCUMENTED python-bugzilla THING.
+    :return: A FRIGGIN UNDOCUMENTED python-bugzilla THING, or a
+        :class:`BugzillaBug` when read from the bug cache.
     :raises BugFetchError: If an error occurs while fetching the bug. For
         example, a network timeout occurs or the bug does not exist.
 
@@ -252,30 +708,32 @@ def _get_bugzilla_bug(bug_id):
         LOGGER.debug('Bugzilla bug {0} found in cache.'.format(bug_id))
     else:
         LOGGER.info('Bugzilla bug {0} not in cache. Fetching.'.format(bug_id))
-        # Make a network connection to the Bugzilla server.
-        try:
-            bz_conn = bugzilla.RHBugzilla()
-            bz_conn.connect(BUGZILLA_URL)
-        except (TypeError, ValueError):
+        bugs = _load_bugs('bugzilla', [bug_id], _fetch_bugzilla_bug)
+        if six.text_type(bug_id) not in bugs:
             raise BugFetchError(
-                'Could not connect to {0}'.format(BUGZILLA_URL)
-            )
-        # Fetch the bug and place it in the cache.
-        try:
-            _bugzilla[bug_id] = bz_conn.getbugsimple(bug_id)
-        except Fault as err:
-            raise BugFetchError(
-                'Could not fetch bug. Error: {0}'.format(err.faultString)
-            )
-        except ExpatError as err:
-            raise BugFetchError(
-                'Could not interpret bug. Error: {0}'
-                .format(ErrorString(err.code))
-            )
+                'Bugzilla bug {0} is not in the bug cache'.format(bug_id))
+        _bugzilla[bug_id] = bugs[six.text_type(bug_id)]
 
     return _bugzilla[bug_id]
 
 
+def _fetch_redmine_closed_statuses(keys):
+    """Fetch the IDs of the Redmine issue statuses which indicate an issue is
+    closed.
+
+    :param keys: A list with the single key the statuses are cached under.
+    :return: A dict mapping the key to the list of closed statuses.
+
+    """
+    result = requests.get('%s/issue_statuses.json' % REDMINE_URL).json()
+    # We've got a list of *all* statuses. Let's keep only *closed* statuses.
+    return {keys[0]: [
+        issue_status['id']
+        for issue_status in result['issue_statuses']
+        if issue_status.get('is_closed', False)
+    ]}
+
+
 # FIXME: It would be better to collect a list of statuses which indicate an
 # issue is open. Doing so would make the implementation of `wrapper` (in
 # `skip_if_rm_bug_open`) simpler.
@@ -285,26 +743,100 @@ def _redmine_closed_issue_statuses():
     This list of issue status IDs is not hard-coded. Instead, the Redmine
     server is consulted when generating this list.
 
-    :return: Statuses which indicate an issue is closed.
+    :return: Statuses which indicate an issue is closed, or ``None`` if they
+        are unknown because they are not in the bug cache, for example in
+        offline mode.
     :rtype: list
 
     """
     # Is the list of closed statuses cached?
     if _redmine['closed_statuses'] is None:
-        result = requests.get('%s/issue_statuses.json' % REDMINE_URL).json()
-        # We've got a list of *all* statuses. Let's throw only *closed*
-        # statuses in the cache.
-        _redmine['closed_statuses'] = []
-        for issue_status in result['issue_statuses']:
-            if issue_status.get('is_closed', False):
-                _redmine['closed_statuses'].append(issue_status['id'])
-
+        statuses = _load_bugs(
+            'redmine_statuses', ['closed'], _fetch_redmine_closed_statuses)
+        if 'closed' in statuses:
+            _redmine['closed_statuses'] = statuses['closed']
+        else:
+            LOGGER.warning(
+                'Redmine closed issue statuses are not in the bug cache')
+            # Do not look them up again on every bug lookup
+            _redmine['closed_statuses'] = False
+
+    if _redmine['closed_statuses'] is False:
+        return None
     return _redmine['closed_statuses']
 
 
+def _fetch_redmine_bug(bug_ids):
+    """Fetch the status ID of a single Redmine bug.
+
+    :param bug_ids: A list with the ID of the bug.
+    :return: A dict mapping the bug ID, as text, to its status ID.
+    :raises BugFetchError: If an error occurs while fetching the bug.
+
+    """
+    bug_id = bug_ids[0]
+    result = requests.get(
+        '{0}/issues/{1}.json'.format(REDMINE_URL, bug_id)
+    )
+    if result.status_code != 200:
+        raise BugFetchError(
+            'Redmine bug {0} does not exist'.format(bug_id)
+        )
+    result = result.json()
+    try:
+        return {six.text_type(bug_id): result['issue']['status']['id']}
+    except KeyError as err:
+        raise BugFetchError(
+            'Could not get status ID of Redmine bug {0}. Error: {1}'.
+            format(bug_id, err)
+        )
+
+
+def _fetch_redmine_bugs(bug_ids):
+    """Fetch the status ID of Redmine bugs, 100 bugs by request.
+
+    Bugs which do not exist or can not be accessed are left out.
+
+    :param bug_ids: The IDs of the bugs.
+    :return: A dict mapping the IDs, as text, of the bugs fetched to their
+        status ID.
+    :raises BugFetchError: If an error occurs while fetching the bugs.
+
+    """
+    bug_ids = [six.text_type(bug_id) for bug_id in bug_ids]
+    statuses = {}
+    for index in range(0, len(bug_ids), 100):
+        chunk = bug_ids[index:index + 100]
+        result = requests.get(
+            '{0}/issues.json'.format(REDMINE_URL),
+            params={
+                'issue_id': ','.join(chunk),
+                'limit': len(chunk),
+                'status_id': '*',
+            },
+        )
+        if result.status_code != 200:
+            raise BugFetchError(
+                'Could not fetch Redmine bugs {0}. Status code: {1}'
+                .format(', '.join(chunk), result.status_code)
+            )
+        try:
+            for issue in result.json()['issues']:
+                statuses[six.text_type(issue['id'])] = (
+                    issue['status']['id'])
+        except KeyError as err:
+            raise BugFetchError(
+                'Could not get status ID of Redmine bugs. Error: {0}'
+                .format(err)
+            )
+    return statuses
+
+
 def _get_redmine_bug_status_id(bug_id):
     """Fetch bug ``bug_id``.
 
+    Only this bug is fetched if it was not by :func:`prefetch_bugs`.
+
     :param int bug_id: The ID of a bug in the Redmine database.
     :return: The status ID of that bug.
     :raises BugFetchError: If an error occurs while fetching the bug. For
@@ -316,27 +848,144 @@ def _get_redmine_bug_status_id(bug_id):
     else:
         # Get info about bug.
         LOGGER.info('Redmine bug {0} not in cache. Fetching.'.format(bug_id))
-        result = requests.get(
-            '{0}/issues/{1}.json'.format(REDMINE_URL, bug_id)
-        )
-        if result.status_code != 200:
+        bugs = _load_bugs('redmine', [bug_id], _fetch_redmine_bug)
+        if six.text_type(bug_id) not in bugs:
             raise BugFetchError(
-                'Redmine bug {0} does not exist'.format(bug_id)
-            )
-        result = result.json()
-
+                'Redmine bug {0} is not in the bug cache'.format(bug_id))
         # Place bug into cache.
-        try:
-            _redmine['issues'][bug_id] = result['issue']['status']['id']
-        except KeyError as err:
-            raise BugFetchError(
-                'Could not get status ID of Redmine bug {0}. Error: {1}'.
-                format(bug_id, err)
-            )
+        _redmine['issues'][bug_id] = bugs[six.text_type(bug_id)]
 
     return _redmine['issues'][bug_id]
 
 
+def reference_bug(bug_type, bug_id):
+    """Record that the tests look up bug ``bug_id``, so it is fetched along
+    the other bugs by :func:`prefetch_bugs`.
+
+    :param str bug_type: Either 'bugzilla' or 'redmine'.
+    :param bug_id: The ID of the bug.
+
+    """
+    if bug_type in _referenced_bugs:
+        _referenced_bugs[bug_type].add(bug_id)
+
+
+def _fetch_in_chunks(fetch, bug_ids, chunk_size, max_workers, queries):
+    """Fetch bugs with one query for every ``chunk_size`` bugs, running at
+    most ``max_workers`` queries at the same time.
+
+    :param fetch: A callable receiving a list of bug IDs and returning a dict
+        mapping their IDs, as text, to the bugs.
+    :param bug_ids: The IDs of the bugs.
+    :param int chunk_size: The maximum number of bugs of a query.
+    :param int max_workers: The maximum number of queries running at the
+        same time.
+    :param list queries: A list where a dict with the number of ``bugs``, the
+        ``seconds`` it took and the ``error``, if any, of each query is
+        appended.
+    :return: A dict mapping the IDs, as text, of the bugs fetched to the
+        bugs.
+    :raises BugFetchError: If all the queries failed.
+
+    """
+    bug_ids = list(bug_ids)
+    graph = StepGraph()
+
+    def query(chunk):
+        """Return a step fetching the bugs of ``chunk``."""
+        def step(results):
+            """Fetch the bugs and report the query."""
+            start = time.time()
+            try:
+                bugs = fetch(chunk)
+            except Exception as err:  # pylint:disable=broad-except
+                bugs = {}
+                error = six.text_type(err) or type(err).__name__
+            else:
+                error = None
+            queries.append({
+                'bugs': len(chunk),
+                'error': error,
+                'seconds': time.time() - start,
+            })
+            return bugs
+        return step
+
+    for index in range(0, len(bug_ids), chunk_size):
+        graph.add(index, query(bug_ids[index:index + chunk_size]))
+    bugs = {}
+    for fetched in graph.run(max_workers).values():
+        bugs.update(fetched)
+    errors = [item['error'] for item in queries if item['error']]
+    if errors and len(errors) == len(queries):
+        raise BugFetchError(
+            'Could not fetch bugs. Error: {0}'.format(errors[0]))
+    return bugs
+
+
+def prefetch_bugs(max_workers=4, chunk_size=100):
+    """Fetch the bugs referenced by :class:`skip_if_bug_open` or
+    :func:`reference_bug` which were not fetched yet.
+
+    Test modules apply the decorators when imported, so once the tests are
+    collected all of their bugs can be fetched at once instead of one by one
+    as the tests run, which :mod:`robottelo.pytest_plugin` does. Bugs are
+    fetched with one query for every ``chunk_size`` bugs of a tracker, and at
+    most ``max_workers`` queries run at the same time. Bugs which can not be
+    fetched are fetched again one by one when looked up.
+
+    :return: A dict mapping each bug tracker queried to a dict with the
+        number of ``bugs`` looked up, the number ``found``, the ``seconds``
+        it took and the ``queries`` run, as described by
+        :func:`_fetch_in_chunks`. Bugs read from the bug cache take no query.
+
+    """
+    trackers = (
+        ('bugzilla', _bugzilla, _fetch_bugzilla_bugs),
+        ('redmine', _redmine['issues'], _fetch_redmine_bugs),
+    )
+    report = {}
+    with _prefetch_lock:
+        for tracker, bugs, fetch in trackers:
+            bug_ids = [
+                bug_id for bug_id in _referenced_bugs[tracker]
+                if bug_id not in _prefetched_bugs[tracker] and
+                bug_id not in bugs
+            ]
+            if not bug_ids:
+                continue
+            _prefetched_bugs[tracker].update(bug_ids)
+            LOGGER.info(
+                'Fetching %d %s bugs referenced by the tests.',
+                len(bug_ids), tracker
+            )
+            queries = []
+            start = time.time()
+            try:
+                fetched = _load_bugs(tracker, bug_ids, partial(
+                    _fetch_in_chunks,
+                    fetch,
+                    chunk_size=chunk_size,
+                    max_workers=max_workers,
+                    queries=queries,
+                ))
+            except BugFetchError as err:
+                LOGGER.warning(err)
+                fetched = {}
+            found = 0
+            for bug_id in bug_ids:
+                if six.text_type(bug_id) in fetched:
+                    bugs[bug_id] = fetched[six.text_type(bug_id)]
+                    found += 1
+            report[tracker] = {
+                'bugs': len(bug_ids),
+                'found': found,
+                'queries': queries,
+                'seconds': time.time() - start,
+            }
+    return report
+
+
 def bz_bug_is_open(bug_id):
     """Tell whether Bugzilla bug ``bug_id`` is open.
 
@@ -367,8 +1016,8 @@ def bz_bug_is_open(bug_id):
 def rm_bug_is_open(bug_id):
     """Tell whether Redmine bug ``bug_id`` is open.
 
-    If information about bug ``bug_id`` cannot be fetched, the bug is assumed
-    to be closed.
+    If information about bug ``bug_id`` or the closed issue statuses cannot
+    be fetched, the bug is assumed to be closed.
 
     :param bug_id: The ID of the bug being inspected.
     :return: ``True`` if the bug is open. ``False`` otherwise.
@@ -380,7 +1029,10 @@ def rm_bug_is_open(bug_id):
         status_id = _get_redmine_bug_status_id(bug_id)
     except BugFetchError as err:
         LOGGER.warning(err)
-    if status_id is None or status_id in _redmine_closed_issue_statuses():
+    if status_id is None:
+        return False
+    closed_statuses = _redmine_closed_issue_statuses()
+    if closed_statuses is None or status_id in closed_statuses:
         return False
     return True
 
@@ -402,6 +1054,7 @@ class skip_if_bug_open(object):  # noqa pylint:disable=C0103,R0903
         """
         self.bug_type = bug_type
         self.bug_id = bug_id
+        reference_bug(bug_type, bug_id)
 
     def __call__(self, func):
         """Define and return a replacement for ``func``.
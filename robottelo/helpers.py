@@ -10,6 +10,10 @@ from robottelo.config import settings
 
 LOGGER = logging.getLogger(__name__)
 
+#: Number of seconds the server software, version and host information
+#: probes are cached for. See :func:`robottelo.ssh.command`.
+SERVER_INFO_CACHE_TTL = 3600
+
 
 class DataFileError(Exception):
     """Indicates any issue when reading a data file."""
@@ -31,7 +35,8 @@ def get_server_software():
 
     """
     return_code = ssh.command(
-        '[ -f /usr/share/foreman/lib/satellite/version.rb ]'
+        '[ -f /usr/share/foreman/lib/satellite/version.rb ]',
+        cache_ttl=SERVER_INFO_CACHE_TTL,
     ).return_code
     return 'downstream' if return_code == 0 else 'upstream'
 
@@ -47,7 +52,8 @@ def get_server_version():
     """
     result = ''.join(ssh.command(
         "cat /usr/share/foreman/lib/satellite/version.rb | grep VERSION | "
-        "awk '{print $3}'"
+        "awk '{print $3}'",
+        cache_ttl=SERVER_INFO_CACHE_TTL,
     ).stdout)
     result = result.replace('"', '').strip()
     if len(result) == 0:
@@ -64,7 +70,8 @@ def get_host_info(hostname=None):
         ``minor`` are integers. ``minor`` can be ``None`` if not available.
 
     """
-    result = ssh.command('cat /etc/redhat-release', hostname)
+    result = ssh.command(
+        'cat /etc/redhat-release', hostname, cache_ttl=SERVER_INFO_CACHE_TTL)
     if result.return_code != 0:
         raise HostInfoError('Not able to cat /etc/redhat-release "{0}"'.format(
             result.stderr
@@ -154,20 +161,18 @@ def install_katello_ca(hostname=None):
         :raises: AssertionError: If katello-ca wasn't installed.
 
         """
-        ssh.command(
-            u'rpm -Uvh {0}'.format(settings.server.get_cert_rpm_url()),
-            hostname
-        )
-        # Not checking the return_code here, as rpm could be installed before
-        # and installation may fail
-        result = ssh.command(
-            u'rpm -q katello-ca-consumer-{0}'
-            .format(settings.server.hostname),
-            hostname
-        )
+        with ssh.batch(hostname) as commands:
+            # Not checking the return_code here, as rpm could be installed
+            # before and installation may fail
+            commands.command(
+                u'rpm -Uvh {0}'.format(settings.server.get_cert_rpm_url()))
+            query = commands.command(
+                u'rpm -q katello-ca-consumer-{0}'
+                .format(settings.server.hostname)
+            )
         # Checking the return_code here to verify katello-ca rpm is actually
         # present in the system
-        if result.return_code != 0:
+        if query.result.return_code != 0:
             raise AssertionError('Failed to install the katello-ca rpm')
 
 
@@ -0,0 +1,44 @@
+"""Import optional and heavy dependencies only when they are first used.
+
+Test modules import :mod:`robottelo.test` and :mod:`robottelo.decorators`
+whatever kind of tests they have, so the dependencies only some tests need,
+like the bug trackers clients or the performance tests statistics and charts
+libraries, are imported when first used instead::
+
+    requests = LazyModule('requests')
+
+    def get_issue(issue_id):
+        return requests.get(...)  # requests is imported here
+
+"""
+import importlib
+import threading
+
+
+class LazyModule(object):
+    """A module imported when one of its attributes is first accessed.
+
+    :param str name: The absolute name of the module.
+
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Import the module, if not done yet, and return it."""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        # Only called for the module attributes, which are not found on the
+        # proxy itself
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        return '<LazyModule {0!r}{1}>'.format(
+            self._name, '' if self._module is None else ' (loaded)')
@@ -0,0 +1,250 @@
+"""Run interdependent steps concurrently on a pool of threads.
+
+A :class:`StepGraph` is a set of named steps, each one depending on steps
+added before it. Steps run as soon as the steps they depend on are done, so
+independent steps run at the same time and only true dependencies are run
+one after another::
+
+    graph = StepGraph()
+    graph.add('org', lambda results: make_org())
+    graph.add('product', lambda results: make_product(
+        {u'organization-id': results['org']['id']}), requires=['org'])
+    graph.add('lce', lambda results: make_lifecycle_environment(
+        {u'organization-id': results['org']['id']}), requires=['org'])
+    results = graph.run()
+
+An :class:`EntityPool` prepares entities on background threads ahead of the
+callers which take them, and replaces each entity taken.
+
+"""
+import collections
+import logging
+import sys
+import threading
+
+import six
+
+logger = logging.getLogger(__name__)
+
+
+class StepGraph(object):
+    """A graph of steps to run concurrently.
+
+    Steps can only depend on steps added before them, so the graph never has
+    cycles.
+
+    """
+    def __init__(self):
+        self._steps = collections.OrderedDict()
+        self._results = {}
+
+    def add(self, name, function, requires=()):
+        """Add a step.
+
+        :param str name: The step name, its result is stored under it.
+        :param function: A callable which receives a dict mapping the names
+            of the steps done to their results, and returns the step result.
+        :param requires: The names of the steps which must be done before
+            this one runs.
+        :raises ValueError: If the step name is already used or a required
+            step was not added.
+
+        """
+        if name in self._steps:
+            raise ValueError(u'Step {0} is already added'.format(name))
+        unknown = [step for step in requires if step not in self._steps]
+        if unknown:
+            raise ValueError(u'Step {0} requires unknown steps: {1}'.format(
+                name, u', '.join(unknown)))
+        self._steps[name] = (function, tuple(requires))
+
+    def add_result(self, name, result):
+        """Add a step which is already done, with its result.
+
+        :raises ValueError: If the step name is already used.
+
+        """
+        if name in self._steps:
+            raise ValueError(u'Step {0} is already added'.format(name))
+        self._steps[name] = (None, ())
+        self._results[name] = result
+
+    def run(self, max_workers=4):
+        """Run all the steps and return their results.
+
+        Steps are started in the order they were added, as soon as the steps
+        they require are done and fewer than ``max_workers`` steps are
+        running. If a step raises an exception no other step is started and,
+        once the running steps are done, the first exception is raised again.
+
+        :param int max_workers: Maximum number of steps running at the same
+            time.
+        :return: A dict mapping each step name to its result.
+
+        """
+        results = dict(self._results)
+        pending = [name for name in self._steps if name not in results]
+        running = set()
+        errors = []
+        condition = threading.Condition()
+
+        def run_step(name, function):
+            """Run a step and notify the main thread it is done."""
+            try:
+                result = function(results)
+            except Exception:  # pylint:disable=broad-except
+                error = sys.exc_info()
+            else:
+                error = None
+            with condition:
+                running.discard(name)
+                if error is None:
+                    results[name] = result
+                else:
+                    errors.append(error)
+                condition.notify()
+
+        with condition:
+            while True:
+                for name in list(pending):
+                    if errors or len(running) >= max_workers:
+                        break
+                    function, requires = self._steps[name]
+                    if all(step in results for step in requires):
+                        pending.remove(name)
+                        running.add(name)
+                        thread = threading.Thread(
+                            target=run_step, args=(name, function))
+                        thread.daemon = True
+                        thread.start()
+                if not running:
+                    break
+                condition.wait()
+        if errors:
+            six.reraise(*errors[0])
+        return results
+
+
+class EntityPool(object):
+    """A thread-safe pool of entities prepared in the background.
+
+    Once started, up to ``size`` entities are prepared ahead by calling
+    ``prepare`` on background threads, at most ``workers`` at the same time.
+    Each entity is handed out once by :meth:`get`, which starts preparing
+    another one, so the pool is replenished while the caller uses it.
+
+    When ``size`` is zero nothing is prepared ahead and :meth:`get` prepares
+    the entity itself. ``size`` can also be a callable returning it, which is
+    called when the pool is first used, so the pool starts with the first
+    :meth:`get` call and can be sized by settings read by then.
+
+    :param prepare: A callable returning a new entity.
+    :param size: The number of entities kept ready, or a callable returning
+        it.
+    :param int workers: The maximum number of entities prepared at the same
+        time.
+
+    """
+    def __init__(self, prepare, size=0, workers=2):
+        self.prepare = prepare
+        self.size = size
+        self.workers = workers
+        self._ready = collections.deque()
+        self._errors = collections.deque()
+        self._preparing = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def ready(self):
+        """The number of entities ready to be handed out."""
+        return len(self._ready)
+
+    def _fill(self):
+        """Start preparing entities until the pool is full.
+
+        Must be called with the lock acquired.
+
+        """
+        if callable(self.size):
+            self.size = self.size()
+        while (not self._closed and
+               self._preparing < self.workers and
+               len(self._ready) + self._preparing < self.size):
+            self._preparing += 1
+            thread = threading.Thread(target=self._prepare_one)
+            thread.daemon = True
+            thread.start()
+
+    def _prepare_one(self):
+        """Prepare an entity and add it to the pool.
+
+        A failed preparation is not retried until its error is raised by
+        :meth:`get`.
+
+        """
+        try:
+            entity = self.prepare()
+        except Exception:  # pylint:disable=broad-except
+            error = sys.exc_info()
+            logger.warning(
+                u'Failed to prepare a pool entity', exc_info=error)
+        else:
+            error = None
+        with self._condition:
+            self._preparing -= 1
+            if self._closed:
+                pass
+            elif error is None:
+                self._ready.append(entity)
+                self._fill()
+            else:
+                self._errors.append(error)
+            self._condition.notify_all()
+
+    def start(self, size=None):
+        """Start preparing the entities in the background.
+
+        :param int size: The number of entities kept ready, if it changes.
+
+        """
+        with self._condition:
+            if size is not None:
+                self.size = size
+            self._closed = False
+            self._fill()
+
+    def get(self):
+        """Take an entity out of the pool, waiting for one being prepared
+        if none is ready.
+
+        :raises: The exception raised by a failed preparation, which is
+            raised only once.
+
+        """
+        error = None
+        with self._condition:
+            self._fill()
+            while not (self._ready or self._errors) and self._preparing:
+                self._condition.wait(1)
+            if self._ready:
+                entity = self._ready.popleft()
+                self._fill()
+                return entity
+            if self._errors:
+                error = self._errors.popleft()
+                self._fill()
+        if error is not None:
+            six.reraise(*error)
+        return self.prepare()
+
+    def close(self):
+        """Stop preparing entities and forget the ready ones.
+
+        Entities being prepared are forgotten once ready.
+
+        """
+        with self._condition:
+            self._closed = True
+            self._ready.clear()
+            self._errors.clear()
@@ -74,20 +74,16 @@ class Pulp(object):
         """
         LOGGER.info('Searching for enabled repositories by hammer CLI:')
 
+        # map repository name with id
+        map_repo_name_id = {}
         try:
-            result = Repository.list(
-                {'organization-id': org_id},
-                per_page=False
-            )
+            for repo in Repository.iter_list({'organization-id': org_id}):
+                map_repo_name_id[repo['name']] = repo['id']
         except CLIReturnCodeError:
             raise RuntimeError(
                 'No enabled repository found in organization {0}!'
                 .format(org_id)
             )
-        # map repository name with id
-        map_repo_name_id = {}
-        for repo in result:
-            map_repo_name_id[repo['name']] = repo['id']
         return map_repo_name_id
 
     @classmethod
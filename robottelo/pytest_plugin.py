@@ -0,0 +1,199 @@
+"""Pytest plugin fetching the bugs the tests look up before they run.
+
+The tests look up bugs with :class:`robottelo.decorators.skip_if_bug_open`,
+:func:`robottelo.decorators.bz_bug_is_open` and
+:func:`robottelo.decorators.rm_bug_is_open`. Fetching each bug as the tests
+run stalls them whenever a bug tracker is slow, so once the tests are
+collected the modules of the collected tests are scanned for these lookups
+and all the bugs are fetched at once by
+:func:`robottelo.decorators.prefetch_bugs`, before the first test runs.
+
+Only lookups of literal bug IDs are found, the other bugs are still fetched
+when looked up. The time the bug trackers took and their errors are reported
+in the terminal summary.
+
+The plugin is enabled by the ``conftest.py`` of the project root. Only the
+tests under ``tests/foreman`` are scanned, so the robottelo unit tests never
+query the bug trackers, and nothing is fetched when the settings can not be
+configured.
+
+"""
+import ast
+import logging
+import os
+
+import pytest
+import six
+
+from robottelo import decorators
+from robottelo.config import settings
+from robottelo.config.settings import ImproperlyConfigured
+
+LOGGER = logging.getLogger(__name__)
+
+#: The directory of the tests which are scanned for bug lookups.
+TESTS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'tests',
+    'foreman',
+)
+
+#: The maximum number of bug tracker queries running at the same time.
+PREFETCH_WORKERS = 4
+
+#: The key of the prefetch report sent by the pytest-xdist workers.
+WORKER_OUTPUT_KEY = 'robottelo_bug_prefetch'
+
+#: The functions looking up a bug, mapped to the type of the bug.
+BUG_LOOKUPS = {
+    'bz_bug_is_open': 'bugzilla',
+    'rm_bug_is_open': 'redmine',
+}
+
+# The prefetch reports to summarize, as ``(worker, report)`` tuples.
+_reports = []
+
+
+def _literal(node):
+    """Return the value of an integer or string literal node, or ``None``."""
+    if isinstance(node, ast.Num):
+        value = node.n
+    elif isinstance(node, ast.Str):
+        value = node.s
+    else:
+        return None
+    if isinstance(value, six.integer_types):
+        return value
+    if isinstance(value, six.string_types) and value.isdigit():
+        return value
+    return None
+
+
+def find_bug_lookups(source):
+    """Find the bugs looked up with a literal ID in ``source``.
+
+    :param source: The source code of a Python module.
+    :return: A set of ``(bug_type, bug_id)`` tuples, where ``bug_id`` keeps
+        the type it has in the source.
+
+    """
+    bugs = set()
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, ast.Call) or not node.args:
+            continue
+        name = getattr(node.func, 'id', None) or getattr(
+            node.func, 'attr', None)
+        if name == 'skip_if_bug_open' and len(node.args) == 2:
+            bug_type = node.args[0]
+            bug_type = bug_type.s if isinstance(bug_type, ast.Str) else None
+            bug_id = _literal(node.args[1])
+        elif name in BUG_LOOKUPS:
+            bug_type = BUG_LOOKUPS[name]
+            bug_id = _literal(node.args[0])
+        else:
+            continue
+        if bug_type in BUG_LOOKUPS.values() and bug_id is not None:
+            bugs.add((bug_type, bug_id))
+    return bugs
+
+
+def _configure_settings():
+    """Configure the settings if needed and tell whether they are."""
+    if not settings.configured:
+        try:
+            settings.configure()
+        except ImproperlyConfigured as err:
+            LOGGER.debug('Not prefetching the bugs: %s', err)
+            return False
+    return True
+
+
+def summarize(reports):
+    """Return the lines summarizing prefetch reports.
+
+    :param reports: A list of ``(worker, report)`` tuples, where ``worker``
+        is the pytest-xdist worker ID or ``None``, and ``report`` is returned
+        by :func:`robottelo.decorators.prefetch_bugs`.
+
+    """
+    lines = []
+    for worker, report in reports:
+        prefix = u'[{0}] '.format(worker) if worker else u''
+        for tracker in sorted(report):
+            tracker_report = report[tracker]
+            queries = tracker_report['queries']
+            failed = [query for query in queries if query['error']]
+            line = u'{0}{1}: {2} of {3} bugs found in {4:.2f}s'.format(
+                prefix,
+                tracker,
+                tracker_report['found'],
+                tracker_report['bugs'],
+                tracker_report['seconds'],
+            )
+            if queries:
+                line += u', {0} queries, slowest {1:.2f}s'.format(
+                    len(queries), max(query['seconds'] for query in queries))
+            else:
+                line += u', from the bug cache'
+            if failed:
+                line += u', {0} failed'.format(len(failed))
+            lines.append(line)
+            for query in failed:
+                lines.append(
+                    u'{0}{1} query of {2} bugs failed after {3:.2f}s: {4}'
+                    .format(prefix, tracker, query['bugs'], query['seconds'],
+                            query['error'])
+                )
+    return lines
+
+
+def pytest_collection_finish(session):
+    """Fetch the bugs looked up by the collected tests."""
+    paths = set()
+    for item in session.items:
+        path = os.path.abspath(str(item.fspath))
+        if (path.endswith('.py') and
+                path.startswith(TESTS_DIRECTORY + os.sep)):
+            paths.add(path)
+    if not paths or not _configure_settings():
+        return
+    for path in sorted(paths):
+        try:
+            with open(path, 'rb') as handler:
+                bugs = find_bug_lookups(handler.read())
+        except (IOError, SyntaxError) as err:
+            LOGGER.warning('Could not scan %s for bug lookups: %s', path, err)
+            continue
+        for bug_type, bug_id in bugs:
+            decorators.reference_bug(bug_type, bug_id)
+    report = decorators.prefetch_bugs(max_workers=PREFETCH_WORKERS)
+    if not report:
+        return
+    # pytest-xdist before 1.22 calls the workers slaves
+    workeroutput = getattr(
+        session.config, 'workeroutput',
+        getattr(session.config, 'slaveoutput', None)
+    )
+    if workeroutput is not None:
+        # Summarized by the pytest-xdist master once the worker is done
+        workeroutput[WORKER_OUTPUT_KEY] = report
+    else:
+        _reports.append((None, report))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Collect the prefetch report of a pytest-xdist worker."""
+    workeroutput = getattr(
+        node, 'workeroutput', getattr(node, 'slaveoutput', None)) or {}
+    if WORKER_OUTPUT_KEY in workeroutput:
+        _reports.append((node.gateway.id, workeroutput[WORKER_OUTPUT_KEY]))
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Report the time the bug trackers took and their errors."""
+    if not _reports:
+        return
+    terminalreporter.section('bug trackers')
+    for line in summarize(_reports):
+        terminalreporter.write_line(line)
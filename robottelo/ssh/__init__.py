@@ -0,0 +1,1098 @@
+"""Utility module to handle the shared ssh connection."""
+import atexit
+import copy
+import hashlib
+import logging
+import os
+import select
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import paramiko
+import re
+from six.moves import shlex_quote
+
+from robottelo.cli import hammer
+from robottelo.config import settings
+
+logger = logging.getLogger(__name__)
+
+#: Maximum number of bytes read from a channel on each ``recv`` call.
+RECV_SIZE = 32768
+
+#: Escape codes for colors displayed in the output.
+COLOR_CODES_REGEX = re.compile(r'\x1b\[\d\d?m')
+
+
+class SSHCommandResult(object):
+    """Structure that returns in all ssh commands results."""
+
+    def __init__(
+            self, stdout=None, stderr=None, return_code=0, output_format=None):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.return_code = return_code
+        self.output_format = output_format
+        # Size in bytes of the raw output, when known
+        self.output_size = None
+        # Seconds spent parsing the output
+        self.parse_time = 0.0
+        #  Does not make sense to return suspicious output if ($? <> 0)
+        if output_format and self.return_code == 0:
+            started = time.time()
+            if output_format == 'csv':
+                self.stdout = hammer.parse_csv(stdout) if stdout else {}
+            if output_format == 'json':
+                self.stdout = hammer.load_json(stdout) if stdout else None
+            self.parse_time = time.time() - started
+
+
+def _call_paramiko_sshclient():
+    """Call ``paramiko.SSHClient``.
+
+    This function does not alter the behaviour of ``paramiko.SSHClient``. It
+    exists soley for the sake of easing unit testing: it can be overridden for
+    mocking purposes.
+
+    """
+    return paramiko.SSHClient()
+
+
+class SSHConnectionPool(object):
+    """A thread-safe pool of authenticated ``paramiko.SSHClient`` objects.
+
+    Connections are keyed on ``(hostname, username, key_filename)``. When a
+    connection is checked out, an idle connection for the same key is reused
+    if it is still alive, otherwise a new one is established. When a
+    connection is checked in it is kept idle for reuse unless the pool
+    already holds ``max_size`` idle connections, in which case it is closed.
+
+    Idle connections older than ``idle_timeout`` seconds are evicted on every
+    checkout and checkin.
+
+    Each process owns its own pool, connections are never shared across a
+    ``fork``, which makes the pool safe to be used by pytest-xdist workers.
+
+    :param int max_size: Maximum number of idle connections kept open.
+    :param int idle_timeout: Number of seconds an idle connection is kept
+        open before being evicted.
+
+    """
+    def __init__(self, max_size=10, idle_timeout=300):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        """Forget all connections inherited from a parent process.
+
+        Must be called with the lock acquired.
+
+        """
+        if self._pid != os.getpid():
+            self._idle = {}
+            self._pid = os.getpid()
+
+    def _evict_expired(self):
+        """Remove idle connections older than ``idle_timeout``.
+
+        Must be called with the lock acquired.
+
+        :return: A list of the evicted clients, they should be closed by the
+            caller once the lock is released.
+
+        """
+        expired = []
+        deadline = time.time() - self.idle_timeout
+        for key in list(self._idle):
+            alive = []
+            for client, last_used in self._idle[key]:
+                if last_used < deadline:
+                    expired.append(client)
+                else:
+                    alive.append((client, last_used))
+            if alive:
+                self._idle[key] = alive
+            else:
+                del self._idle[key]
+        return expired
+
+    @property
+    def size(self):
+        """Number of idle connections currently held by the pool."""
+        with self._lock:
+            return sum(len(clients) for clients in self._idle.values())
+
+    def checkout(self, hostname, username, key_filename, timeout=10):
+        """Get a connection to ``hostname`` reusing an idle one if possible.
+
+        :return: A tuple in the form ``(key, client)``. The ``key`` should be
+            passed back to :meth:`checkin` together with the client.
+
+        """
+        key = (hostname, username, key_filename)
+        client = None
+        with self._lock:
+            self._check_pid()
+            stale = self._evict_expired()
+            idle = self._idle.get(key, [])
+            while idle and client is None:
+                candidate, _ = idle.pop()
+                if _is_connection_alive(candidate):
+                    client = candidate
+                else:
+                    stale.append(candidate)
+        for stale_client in stale:
+            _close_connection(stale_client)
+        if client is not None:
+            logger.debug(
+                'Reusing Paramiko client {0}'.format(hex(id(client))))
+            return key, client
+
+        return key, _open_connection(
+            hostname, username, key_filename, timeout)
+
+    def checkin(self, key, client):
+        """Return a connection to the pool so it can be reused."""
+        discard = []
+        with self._lock:
+            self._check_pid()
+            discard.extend(self._evict_expired())
+            idle_count = sum(len(clients) for clients in self._idle.values())
+            if idle_count < self.max_size and _is_connection_alive(client):
+                self._idle.setdefault(key, []).append((client, time.time()))
+            else:
+                discard.append(client)
+        for discarded_client in discard:
+            _close_connection(discarded_client)
+
+    def close_all(self):
+        """Close all idle connections held by the pool."""
+        with self._lock:
+            self._check_pid()
+            clients = [
+                client
+                for idle in self._idle.values()
+                for client, _ in idle
+            ]
+            self._idle = {}
+        for client in clients:
+            _close_connection(client)
+
+
+def _open_connection(hostname, username, key_filename, timeout):
+    """Establish a new ``paramiko.SSHClient`` connection."""
+    client = _call_paramiko_sshclient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        hostname=hostname,
+        username=username,
+        key_filename=key_filename,
+        timeout=timeout
+    )
+    logger.info('Instantiated Paramiko client {0}'.format(hex(id(client))))
+    return client
+
+
+def _is_connection_alive(client):
+    """Check whether a ``paramiko.SSHClient`` transport is still active."""
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+def _close_connection(client):
+    """Close a ``paramiko.SSHClient`` logging its destruction."""
+    client_id = hex(id(client))
+    logger.info('Destroying Paramiko client {0}'.format(client_id))
+    client.close()
+    logger.info('Destroyed Paramiko client {0}'.format(client_id))
+
+
+#: The :class:`SSHConnectionPool` shared by all functions in this module.
+_pool = SSHConnectionPool()
+atexit.register(_pool.close_all)
+
+
+@contextmanager
+def _get_connection(
+        hostname=None, username=None, key_filename=None, timeout=10,
+        pooled=True):
+    """Yield an ssh connection object.
+
+    The connection will be configured with the specified arguments or will
+    fall-back to server configuration in the configuration file.
+
+    Yield this SSH connection. The connection is automatically returned to
+    the connection pool when the caller is done using it using
+    ``contextlib``, so clients should use the ``with`` statement to handle
+    the object::
+
+        with _get_connection() as connection:
+            ...
+
+    If an exception is raised while the connection is in use, the connection
+    is closed instead of being returned to the pool.
+
+    :param str hostname: The hosname of the server to stablish connection. If
+        it is ``None`` ``server.hostname`` from configuration's ``main``
+        section will be used.
+    :param str username: The username to use when connecting. If it is ``None``
+        ``server.hostname`` from configuration's ``main`` section will be used.
+    :param str key_filename: The path of the ssh private key to use when
+        connecting to the server. If it is ``None`` ``server.hostname`` from
+        configuration's ``main`` section will be used.
+    :param int timeout: Time to wait for stablish the connection.
+    :param bool pooled: Whether the connection should be taken from and
+        returned to the connection pool. Use ``False`` when the connection
+        must be closed as soon as the caller is done, for example when
+        closing it tears down a tunnel.
+
+    :return: An SSH connection.
+    :rtype: paramiko.SSHClient
+
+    """
+    if hostname is None:
+        hostname = settings.server.hostname
+    if username is None:
+        username = settings.server.ssh_username
+    if key_filename is None:
+        key_filename = settings.server.ssh_key
+
+    if not pooled:
+        client = _open_connection(hostname, username, key_filename, timeout)
+        try:
+            yield client
+        finally:
+            _close_connection(client)
+        return
+
+    key, client = _pool.checkout(hostname, username, key_filename, timeout)
+    try:
+        yield client
+    except BaseException:
+        _close_connection(client)
+        raise
+    else:
+        _pool.checkin(key, client)
+
+
+class TransferError(Exception):
+    """Indicates that a file transfer produced a corrupted file."""
+
+
+class TransferStats(object):
+    """Statistics of a file transfer.
+
+    :param int size: The total size of the file, in bytes.
+    :param int transferred: The number of bytes transferred, it is less than
+        ``size`` when a transfer is resumed.
+    :param float elapsed: The transfer duration, in seconds.
+
+    """
+    def __init__(self, size, transferred, elapsed):
+        self.size = size
+        self.transferred = transferred
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        """Bytes transferred per second."""
+        if self.elapsed <= 0:
+            return float(self.transferred)
+        return self.transferred / self.elapsed
+
+    def __str__(self):
+        return '{0} of {1} bytes in {2:.2f}s ({3:.2f} MB/s)'.format(
+            self.transferred,
+            self.size,
+            self.elapsed,
+            self.throughput / (1024 * 1024),
+        )
+
+
+#: Size of each SFTP read or write request.
+SFTP_BLOCK_SIZE = 32768
+
+#: Minimum size of each part of a file transferred in parallel.
+SFTP_MIN_PART_SIZE = 16 * 1024 * 1024
+
+
+def _split_parts(start, size, workers):
+    """Split the ``[start, size)`` bytes range in at most ``workers`` parts
+    of at least :data:`SFTP_MIN_PART_SIZE` bytes.
+
+    :return: A list of ``(offset, length)`` tuples.
+
+    """
+    length = size - start
+    if length <= 0:
+        return [(start, 0)]
+    count = max(1, min(workers, length // SFTP_MIN_PART_SIZE))
+    part_size = -(-length // count)  # Ceiling division
+    return [
+        (offset, min(part_size, size - offset))
+        for offset in range(start, size, part_size)
+    ]
+
+
+def _download_part(hostname, remote_file, local_file, offset, length,
+                   progress):
+    """Download ``length`` bytes of ``remote_file`` from ``offset``.
+
+    The requests are pipelined: all blocks are requested before waiting for
+    the replies. ``progress`` is a single item list updated with the number
+    of bytes written.
+
+    """
+    blocks = [
+        (block, min(SFTP_BLOCK_SIZE, offset + length - block))
+        for block in range(offset, offset + length, SFTP_BLOCK_SIZE)
+    ]
+    if not blocks:
+        return
+    with _get_connection(hostname=hostname) as connection:
+        sftp = connection.open_sftp()
+        try:
+            with sftp.open(remote_file, 'rb') as source:
+                with open(local_file, 'r+b') as destination:
+                    destination.seek(offset)
+                    for data in source.readv(blocks):
+                        destination.write(data)
+                        progress[0] += len(data)
+        finally:
+            sftp.close()
+
+
+def _upload_part(hostname, local_file, remote_file, offset, length,
+                 progress):
+    """Upload ``length`` bytes of ``local_file`` from ``offset``.
+
+    The requests are pipelined: writes do not wait for the server
+    acknowledgement. ``progress`` is a single item list updated with the
+    number of bytes read from the local file and sent.
+
+    """
+    with _get_connection(hostname=hostname) as connection:
+        sftp = connection.open_sftp()
+        try:
+            with open(local_file, 'rb') as source:
+                with sftp.open(remote_file, 'r+b') as destination:
+                    destination.set_pipelined(True)
+                    source.seek(offset)
+                    destination.seek(offset)
+                    remaining = length
+                    while remaining > 0:
+                        data = source.read(min(SFTP_BLOCK_SIZE, remaining))
+                        if not data:
+                            break
+                        destination.write(data)
+                        remaining -= len(data)
+                        progress[0] += len(data)
+        finally:
+            sftp.close()
+
+
+def _transfer_parts(transfer_part, parts, *args):
+    """Transfer all ``parts`` at the same time, one thread for each.
+
+    Every thread uses its own pooled connection.
+
+    :return: A tuple in the form ``(contiguous, error)``. ``contiguous`` is
+        the number of bytes transferred contiguously from the first part
+        offset, it is the total size of the parts unless a part failed.
+        ``error`` is the first exception raised while transferring a part or
+        ``None``.
+
+    """
+    progress = [[0] for _ in parts]
+    errors = []
+
+    def run(part, part_progress):
+        """Transfer a part recording any error."""
+        try:
+            transfer_part(*(args + part + (part_progress,)))
+        except Exception as err:  # pylint:disable=broad-except
+            errors.append(err)
+
+    if len(parts) == 1:
+        run(parts[0], progress[0])
+    else:
+        threads = [
+            threading.Thread(target=run, args=(part, part_progress))
+            for part, part_progress in zip(parts, progress)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    contiguous = 0
+    for (_, length), (transferred,) in zip(parts, progress):
+        contiguous += transferred
+        if transferred < length:
+            break
+    return contiguous, errors[0] if errors else None
+
+
+def _local_checksum(path):
+    """Return the SHA-256 hex digest of a local file."""
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as handler:
+        for data in iter(lambda: handler.read(1024 * 1024), b''):
+            checksum.update(data)
+    return checksum.hexdigest()
+
+
+def _remote_checksum(path, hostname=None):
+    """Return the SHA-256 hex digest of a remote file."""
+    result = command(u'sha256sum {0}'.format(path), hostname=hostname)
+    if result.return_code != 0:
+        raise TransferError(
+            u'Not able to checksum {0}: {1}'.format(path, result.stderr))
+    return result.stdout[0].split()[0]
+
+
+def _verify_transfer(local_file, remote_file, hostname):
+    """Raise :class:`TransferError` if local and remote checksums differ."""
+    local = _local_checksum(local_file)
+    remote = _remote_checksum(remote_file, hostname)
+    if local != remote:
+        raise TransferError(
+            u'Checksum mismatch: {0} is {1} but {2} is {3}'.format(
+                local_file, local, remote_file, remote))
+
+
+def upload_file(local_file, remote_file, hostname=None, workers=1,
+                resume=False, verify=False):
+    """Upload a local file to a remote machine
+
+    SFTP write requests are pipelined. Large files can be split in up to
+    ``workers`` parts uploaded at the same time over pooled connections.
+
+    :param local_file: either a file path or a file-like object to be uploaded.
+        File-like objects are always uploaded as a single stream and cannot
+        be resumed or verified.
+    :param remote_file: a remote file path where the uploaded file will be
+        placed.
+    :param hostname: target machine hostname. If not provided will be used the
+        ``server.hostname`` from the configuration.
+    :param int workers: maximum number of parts uploaded at the same time.
+        Each part is at least :data:`SFTP_MIN_PART_SIZE` bytes.
+    :param bool resume: if the remote file exists, upload only what comes
+        after its size. If the upload fails, the remote file is truncated to
+        the data uploaded contiguously, so it can be resumed later.
+    :param bool verify: compare the local and remote SHA-256 checksums once
+        the upload is done.
+    :return: the transfer statistics.
+    :rtype: TransferStats
+    :raises robottelo.ssh.TransferError: if the checksums differ.
+
+    """
+    start_time = time.time()
+    if hasattr(local_file, 'read'):
+        with _get_connection(hostname=hostname) as connection:
+            sftp = connection.open_sftp()
+            try:
+                size = sftp.putfo(local_file, remote_file).st_size
+            finally:
+                sftp.close()
+        stats = TransferStats(size, size, time.time() - start_time)
+        logger.info('Uploaded {0}: {1}'.format(remote_file, stats))
+        return stats
+
+    size = os.path.getsize(local_file)
+    offset = 0
+    with _get_connection(hostname=hostname) as connection:
+        sftp = connection.open_sftp()
+        try:
+            if resume:
+                try:
+                    offset = min(sftp.stat(remote_file).st_size, size)
+                except IOError:
+                    pass
+            if offset == 0:
+                # Create the remote file or truncate it
+                sftp.open(remote_file, 'wb').close()
+            else:
+                sftp.truncate(remote_file, offset)
+        finally:
+            sftp.close()
+
+    contiguous, error = _transfer_parts(
+        _upload_part,
+        _split_parts(offset, size, workers),
+        hostname,
+        local_file,
+        remote_file,
+    )
+    if error is not None:
+        # Keep only the contiguous data, so the upload can be resumed
+        with _get_connection(hostname=hostname) as connection:
+            sftp = connection.open_sftp()
+            try:
+                sftp.truncate(remote_file, offset + contiguous)
+            finally:
+                sftp.close()
+        raise error
+    if verify:
+        _verify_transfer(local_file, remote_file, hostname)
+    stats = TransferStats(size, contiguous, time.time() - start_time)
+    logger.info('Uploaded {0}: {1}'.format(remote_file, stats))
+    return stats
+
+
+def download_file(remote_file, local_file=None, hostname=None, workers=1,
+                  resume=False, verify=False):
+    """Download a remote file to the local machine. If ``hostname`` is not
+    provided will be used the server.
+
+    SFTP read requests are pipelined. Large files can be split in up to
+    ``workers`` parts downloaded at the same time over pooled connections.
+
+    :param int workers: maximum number of parts downloaded at the same time.
+        Each part is at least :data:`SFTP_MIN_PART_SIZE` bytes.
+    :param bool resume: if the local file exists, download only what comes
+        after its size. If the download fails, the local file is truncated to
+        the data downloaded contiguously, so it can be resumed later.
+    :param bool verify: compare the local and remote SHA-256 checksums once
+        the download is done.
+    :return: the transfer statistics.
+    :rtype: TransferStats
+    :raises robottelo.ssh.TransferError: if the checksums differ.
+
+    """
+    if local_file is None:
+        local_file = remote_file
+    start_time = time.time()
+    with _get_connection(hostname=hostname) as connection:
+        sftp = connection.open_sftp()
+        try:
+            size = sftp.stat(remote_file).st_size
+        finally:
+            sftp.close()
+
+    offset = 0
+    if resume and os.path.isfile(local_file):
+        offset = min(os.path.getsize(local_file), size)
+    with open(local_file, 'r+b' if offset else 'wb') as handler:
+        handler.truncate(offset)
+
+    contiguous, error = _transfer_parts(
+        _download_part,
+        _split_parts(offset, size, workers),
+        hostname,
+        remote_file,
+        local_file,
+    )
+    if error is not None:
+        # Keep only the contiguous data, so the download can be resumed
+        with open(local_file, 'r+b') as handler:
+            handler.truncate(offset + contiguous)
+        raise error
+    if verify:
+        _verify_transfer(local_file, remote_file, hostname)
+    stats = TransferStats(size, contiguous, time.time() - start_time)
+    logger.info('Downloaded {0}: {1}'.format(remote_file, stats))
+    return stats
+
+
+def _build_result(stdout, stderr, errorcode, output_format=None):
+    """Decode and clean the raw output of a command and wrap it on a
+    :class:`SSHCommandResult`.
+
+    :param bytes stdout: The raw standard output of the command.
+    :param bytes stderr: The raw standard error of the command.
+    :param int errorcode: The exit status of the command.
+    :param str output_format: The hammer output format, if any.
+
+    """
+    output_size = len(stdout) if stdout else 0
+    if stdout:
+        # Convert to unicode string
+        stdout = stdout.decode('utf-8')
+        logger.debug('<<< stdout\n%s', stdout)
+    stderr = _decode_stderr(stderr)
+
+    if stdout and output_format != 'json':
+        stdout = _clean_output(stdout)
+
+    result = SSHCommandResult(stdout, stderr, errorcode, output_format)
+    result.output_size = output_size
+    return result
+
+
+def _decode_stderr(stderr):
+    """Convert stderr to unicode string and remove all color codes
+    characters.
+
+    """
+    if stderr:
+        stderr = COLOR_CODES_REGEX.sub('', stderr.decode('utf-8'))
+        logger.debug('<<< stderr\n%s', stderr)
+    return stderr
+
+
+def _clean_output(output):
+    """Remove the noise from hammer output and split it in lines.
+
+    For output we don't really want to see all of Rails traffic information,
+    so strip it out. Empty fields are returned as "" which gives us u'""', so
+    strip them too and also remove the escape codes for colors.
+
+    The lines are filtered in a single pass and color codes are removed with
+    a single substitution over the remaining output. When the output has no
+    escape character at all, which is the case when hammer runs without
+    colors, the color codes removal is skipped.
+
+    :param output: An unicode string with the command output.
+    :return: A list with the output lines.
+
+    """
+    lines = [
+        line
+        for line in output.replace('""', '').split('\n')
+        if not line.startswith('[')
+    ]
+    if '\x1b' in output:
+        # Color codes never span lines, removing them from the joined lines
+        # at once is much faster than once per line.
+        lines = COLOR_CODES_REGEX.sub('', '\n'.join(lines)).split('\n')
+    return lines
+
+
+def _iter_channel(channel):
+    """Read the stdout and stderr of a channel at the same time.
+
+    Reading one of the streams until the end before reading the other one can
+    stall: if the command fills the channel window of the stream not being
+    read, it blocks and never ends. This generator reads whatever stream has
+    data available, so both are drained as the data arrives.
+
+    The generator stops once the remote end is done sending output. The
+    channel timeout, if any, is the maximum time to wait for new output.
+
+    :return: A generator yielding ``(is_stderr, data)`` tuples, where
+        ``data`` is at most :data:`RECV_SIZE` bytes.
+    :raises socket.timeout: If no output is received within the channel
+        timeout.
+
+    """
+    timeout = channel.gettimeout()
+    waited = 0
+    while True:
+        received = False
+        if channel.recv_ready():
+            yield False, channel.recv(RECV_SIZE)
+            received = True
+        if channel.recv_stderr_ready():
+            yield True, channel.recv_stderr(RECV_SIZE)
+            received = True
+        if received:
+            waited = 0
+            continue
+        if channel.eof_received or channel.exit_status_ready():
+            # The remote end sends the output before the EOF and the exit
+            # status, nothing else will arrive.
+            if not (channel.recv_ready() or channel.recv_stderr_ready()):
+                return
+            continue
+        if timeout is not None and waited >= timeout:
+            raise socket.timeout()
+        select.select([channel], [], [], 1)
+        waited += 1
+
+
+class SSHCommandStream(object):
+    """Output of a running command, received and cleaned line by line.
+
+    Iterating over this object yields the stdout lines of the command as soon
+    as they are received, so the whole output is never held in memory. Once
+    the iteration is done, :attr:`stderr` and :attr:`return_code` are
+    available. Only a single iteration is possible.
+
+    Use :meth:`result` to get a :class:`SSHCommandResult` as returned by
+    :func:`command`.
+
+    Instances of this class are created by :func:`command_stream`.
+
+    """
+    def __init__(self, lines, output_format=None):
+        self.output_format = output_format
+        self.return_code = None
+        self.stderr = None
+        self._lines = lines(self)
+
+    def __iter__(self):
+        return self._lines
+
+    def result(self):
+        """Consume the remaining output and build a
+        :class:`SSHCommandResult`.
+
+        """
+        stdout = list(self)
+        if not stdout:
+            stdout = u''
+        elif self.output_format == 'json':
+            stdout = u'\n'.join(stdout)
+        return SSHCommandResult(
+            stdout, self.stderr, self.return_code, self.output_format)
+
+
+def command_stream(cmd, hostname=None, output_format=None, timeout=None):
+    """Executes SSH command(s) on remote hostname streaming its output.
+
+    Accepts the same arguments as :func:`command` but, instead of waiting for
+    the command to finish, returns an iterable over the stdout lines which
+    are cleaned as in :func:`command` unless ``output_format`` is ``json``::
+
+        stream = command_stream('cat /var/log/foreman/production.log')
+        for line in stream:
+            ...
+        assert stream.return_code == 0
+
+    The connection is held until the iteration is done. If the iteration is
+    abandoned, the connection is closed instead of being returned to the
+    pool.
+
+    :rtype: SSHCommandStream
+
+    """
+    if timeout is None:
+        timeout = 120
+
+    hostname = hostname or settings.server.hostname
+
+    def split(output):
+        """Split the output in lines, cleaning it unless it is JSON."""
+        if output_format == 'json':
+            return output.split('\n')
+        return _clean_output(output)
+
+    def lines(stream):
+        """Yield stdout lines filling the ``stream`` attributes when done."""
+        logger.debug('>>> [%s] %s', hostname, cmd)
+        stderr = []
+        with _get_connection(hostname=hostname) as connection:
+            _, stdout, _ = connection.exec_command(cmd, timeout)
+            channel = stdout.channel
+            pending = b''
+            received = False
+            for is_stderr, data in _iter_channel(channel):
+                if is_stderr:
+                    stderr.append(data)
+                    continue
+                received = True
+                pending += data
+                end = pending.rfind(b'\n')
+                if end == -1:
+                    continue
+                # Only complete lines are decoded and cleaned
+                output, pending = pending[:end], pending[end + 1:]
+                for line in split(output.decode('utf-8')):
+                    yield line
+            stream.return_code = channel.recv_exit_status()
+        stream.stderr = _decode_stderr(b''.join(stderr))
+        if received:
+            for line in split(pending.decode('utf-8')):
+                yield line
+
+    return SSHCommandStream(lines, output_format)
+
+
+def _read_channel(channel):
+    """Read the whole output of a channel.
+
+    :return: A tuple in the form ``(stdout, stderr, return_code)``.
+
+    """
+    stdout = []
+    stderr = []
+    for is_stderr, data in _iter_channel(channel):
+        (stderr if is_stderr else stdout).append(data)
+    return b''.join(stdout), b''.join(stderr), channel.recv_exit_status()
+
+
+class SSHCommandCache(object):
+    """A thread-safe cache of SSH command results with a time to live.
+
+    Results are keyed on ``(hostname, command, output_format)`` and a cached
+    result is returned until ``ttl`` seconds have passed since it was stored.
+    Each lookup gets its own copy of the cached result, so callers are free to
+    change it.
+
+    Only commands which do not change the remote host state and whose output
+    does not change over time should be cached.
+
+    """
+    def __init__(self):
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
+
+    def get(self, hostname, cmd, output_format=None):
+        """Return a copy of the cached result or ``None`` if there is no
+        result cached or if it has expired.
+
+        """
+        key = (hostname, cmd, output_format)
+        with self._lock:
+            expires, result = self._results.get(key, (None, None))
+            if result is None:
+                return None
+            if expires <= time.time():
+                del self._results[key]
+                return None
+        return copy.deepcopy(result)
+
+    def set(self, hostname, cmd, output_format, result, ttl):
+        """Cache ``result`` for ``ttl`` seconds."""
+        with self._lock:
+            self._results[(hostname, cmd, output_format)] = (
+                time.time() + ttl, copy.deepcopy(result))
+
+    def invalidate(self, hostname=None, cmd=None):
+        """Remove cached results.
+
+        :param str hostname: Only remove results of commands run on this
+            host.
+        :param str cmd: Only remove results of this command.
+
+        If neither ``hostname`` nor ``cmd`` are provided the whole cache is
+        cleared.
+
+        """
+        with self._lock:
+            for key in list(self._results):
+                if ((hostname is None or key[0] == hostname) and
+                        (cmd is None or key[1] == cmd)):
+                    del self._results[key]
+
+
+_cache = SSHCommandCache()
+
+
+def invalidate_cache(hostname=None, cmd=None):
+    """Remove results cached by :func:`command`.
+
+    Accepts the same arguments as :meth:`SSHCommandCache.invalidate`, if
+    ``hostname`` is ``None`` results cached for all hosts are removed.
+
+    """
+    _cache.invalidate(hostname, cmd)
+
+
+def command(cmd, hostname=None, output_format=None, timeout=None,
+            cache_ttl=None):
+    """
+    Executes SSH command(s) on remote hostname.
+    Defaults to main.server.hostname.
+
+    :param int cache_ttl: If provided, the result is cached for ``cache_ttl``
+        seconds and the command is not run again on ``hostname`` while its
+        result is cached. Only use it for commands which do not change the
+        remote host state. See :func:`invalidate_cache`.
+    """
+
+    # Set a default timeout of 120 seconds
+    if timeout is None:
+        timeout = 120
+
+    hostname = hostname or settings.server.hostname
+
+    if cache_ttl:
+        result = _cache.get(hostname, cmd, output_format)
+        if result is not None:
+            logger.debug('>>> [%s] %s (cached)', hostname, cmd)
+            return result
+
+    logger.debug('>>> [%s] %s', hostname, cmd)
+
+    with _get_connection(hostname=hostname) as connection:
+        _, stdout, _ = connection.exec_command(cmd, timeout)
+        stdout, stderr, errorcode = _read_channel(stdout.channel)
+
+    result = _build_result(stdout, stderr, errorcode, output_format)
+    if cache_ttl:
+        _cache.set(hostname, cmd, output_format, result, cache_ttl)
+    return result
+
+
+def command_many(cmds, hostname=None, output_format=None, timeout=None,
+                 max_channels=10):
+    """Executes several SSH commands concurrently on remote hostname.
+
+    All commands share a single authenticated connection: each command runs
+    on its own channel of the connection transport, so the commands run in
+    parallel on the remote host without paying one handshake per command.
+
+    SSH servers limit the number of sessions opened on a single connection
+    (OpenSSH ``MaxSessions`` defaults to 10), so at most ``max_channels``
+    commands run at the same time.
+
+    :param cmds: An iterable of commands to run.
+    :param str hostname: The hostname of the server. If ``None``
+        ``server.hostname`` from the configuration will be used.
+    :param str output_format: The hammer output format, applied to all
+        commands.
+    :param int timeout: Timeout for each command channel, in seconds.
+    :param int max_channels: Maximum number of channels opened at the same
+        time.
+    :return: A list of :class:`SSHCommandResult`, one for each command in the
+        same order of ``cmds``.
+
+    """
+    if timeout is None:
+        timeout = 120
+
+    hostname = hostname or settings.server.hostname
+    cmds = list(cmds)
+    results = []
+
+    with _get_connection(hostname=hostname) as connection:
+        transport = connection.get_transport()
+        for start in range(0, len(cmds), max_channels):
+            channels = []
+            try:
+                for cmd in cmds[start:start + max_channels]:
+                    logger.debug('>>> [%s] %s', hostname, cmd)
+                    channel = transport.open_session()
+                    channel.settimeout(timeout)
+                    channel.exec_command(cmd)
+                    channels.append(channel)
+                for channel in channels:
+                    results.append(_build_result(
+                        *_read_channel(channel), output_format=output_format))
+            finally:
+                for channel in channels:
+                    channel.close()
+
+    return results
+
+
+class SSHBatchedCommand(object):
+    """A command added to a :class:`SSHCommandBatch`.
+
+    ``result`` is ``None`` until the batch runs, then it holds the command
+    :class:`SSHCommandResult`.
+
+    """
+    def __init__(self, cmd, output_format=None):
+        self.cmd = cmd
+        self.output_format = output_format
+        self.result = None
+
+
+class SSHCommandBatch(object):
+    """Run several commands on a host in a single SSH round trip.
+
+    The commands are sent as a single shell script. Each command runs on its
+    own subshell, as it would when run by :func:`command`, and runs even if
+    the previous ones failed. After each command the script writes a
+    boundary line with the command exit status to stdout and another one to
+    stderr, which are used to split the script output back into one
+    :class:`SSHCommandResult` for each command.
+
+    :param str hostname: The hostname of the server. If ``None``
+        ``server.hostname`` from the configuration will be used.
+    :param int timeout: Timeout for the whole script, in seconds. Defaults to
+        120 seconds for each command.
+
+    """
+    def __init__(self, hostname=None, timeout=None):
+        self.hostname = hostname or settings.server.hostname
+        self.timeout = timeout
+        self.commands = []
+
+    def command(self, cmd, output_format=None):
+        """Add ``cmd`` to the batch.
+
+        :return: A :class:`SSHBatchedCommand` whose ``result`` will be
+            available once the batch runs.
+
+        """
+        batched = SSHBatchedCommand(cmd, output_format)
+        self.commands.append(batched)
+        return batched
+
+    def script(self, boundary):
+        """Build the script running all commands of the batch."""
+        lines = []
+        for cmd in self.commands:
+            lines.append(
+                u'( eval {0} ); __rc=$?; '
+                u"printf '\\n{1} %d\\n' $__rc; "
+                u"printf '\\n{1}\\n' >&2"
+                .format(shlex_quote(cmd.cmd), boundary)
+            )
+        return u'\n'.join(lines)
+
+    def run(self):
+        """Run all commands and fill their results.
+
+        If the script stops before all commands reported their exit status,
+        for example because the connection was closed, the commands which did
+        not report get the script exit status, or ``-1`` if it is ``0``.
+
+        :return: A list of :class:`SSHCommandResult`, one for each command in
+            the same order they were added.
+
+        """
+        if not self.commands:
+            return []
+        timeout = self.timeout
+        if timeout is None:
+            timeout = 120 * len(self.commands)
+        boundary = u'__robottelo_batch_{0}__'.format(uuid.uuid4().hex)
+        for cmd in self.commands:
+            logger.debug('>>> [%s] (batch) %s', self.hostname, cmd.cmd)
+
+        with _get_connection(hostname=self.hostname) as connection:
+            _, stdout, _ = connection.exec_command(
+                self.script(boundary), timeout)
+            stdout, stderr, errorcode = _read_channel(stdout.channel)
+
+        boundary = boundary.encode('ascii')
+        stdout = stdout.split(b'\n' + boundary + b' ')
+        stderr = stderr.split(b'\n' + boundary + b'\n')
+        for index, cmd in enumerate(self.commands):
+            output = stdout[index] if index < len(stdout) else b''
+            errors = stderr[index] if index < len(stderr) else b''
+            if index + 1 < len(stdout):
+                return_code, _, stdout[index + 1] = stdout[
+                    index + 1].partition(b'\n')
+                return_code = int(return_code)
+            else:
+                return_code = errorcode or -1
+            cmd.result = _build_result(
+                output, errors, return_code, cmd.output_format)
+        return [cmd.result for cmd in self.commands]
+
+
+@contextmanager
+def batch(hostname=None, timeout=None):
+    """Collect commands and run them in a single SSH round trip on exit.
+
+    Example::
+
+        with ssh.batch(hostname) as commands:
+            commands.command('virsh destroy {0}'.format(name))
+            undefine = commands.command('virsh undefine {0}'.format(name))
+        if undefine.result.return_code != 0:
+            ...
+
+    The commands are not run if an exception is raised inside the block. See
+    :class:`SSHCommandBatch`.
+
+    """
+    commands = SSHCommandBatch(hostname, timeout)
+    yield commands
+    commands.run()
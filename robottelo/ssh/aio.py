@@ -0,0 +1,283 @@
+"""Asyncio interface to run SSH commands.
+
+The functions in this module return :class:`asyncio.Future` objects, so they
+can be awaited from coroutines running on an event loop::
+
+    results = yield from asyncio.gather(*[
+        aio.command('subscription-manager identity', hostname=hostname)
+        for hostname in hostnames
+    ])
+
+All commands targeting a host run on channels of a single connection to that
+host and their output is read by the event loop through the channel file
+descriptors, so no thread is needed for each running command. The number of
+commands running at the same time on each host is bounded because SSH servers
+limit the number of sessions opened on a single connection (OpenSSH
+``MaxSessions`` defaults to 10).
+
+The blocking parts of paramiko, the connection handshake and the channel
+opening, run on the event loop default executor.
+
+This module requires Python 3.4 or newer.
+
+"""
+import asyncio
+import collections
+import logging
+import socket
+
+from robottelo import ssh
+from robottelo.config import settings
+
+logger = logging.getLogger(__name__)
+
+#: Maximum number of bytes read from a channel on each ``recv`` call.
+RECV_SIZE = 32768
+
+
+class _HostLimiter(object):
+    """Bounds the number of callables running at the same time.
+
+    :param int limit: Maximum number of callables started and not yet
+        released.
+
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.running = 0
+        self._waiting = collections.deque()
+
+    def submit(self, start):
+        """Call ``start`` now if the limit allows, otherwise once a running
+        callable is released.
+
+        """
+        if self.running < self.limit:
+            self.running += 1
+            start()
+        else:
+            self._waiting.append(start)
+
+    def release(self):
+        """Mark a running callable as done and start the next waiting one."""
+        if self._waiting:
+            self._waiting.popleft()()
+        else:
+            self.running -= 1
+
+
+def _open_channel(client, cmd):
+    """Open a channel on ``client`` transport and execute ``cmd`` on it.
+
+    This function blocks and should run on an executor.
+
+    """
+    channel = client.get_transport().open_session()
+    channel.exec_command(cmd)
+    channel.setblocking(0)
+    return channel
+
+
+class AsyncSSHClient(object):
+    """Run SSH commands on remote hosts from an asyncio event loop.
+
+    :param int max_concurrency: Maximum number of commands running at the
+        same time on each host.
+    :param loop: The event loop to use. If ``None`` the current event loop
+        will be used.
+
+    """
+    def __init__(self, max_concurrency=10, loop=None):
+        self.max_concurrency = max_concurrency
+        self._loop = loop or asyncio.get_event_loop()
+        self._connections = {}
+        self._limiters = {}
+
+    def _get_limiter(self, hostname):
+        """Return the concurrency limiter for ``hostname``."""
+        if hostname not in self._limiters:
+            self._limiters[hostname] = _HostLimiter(self.max_concurrency)
+        return self._limiters[hostname]
+
+    def _get_connection(self, hostname):
+        """Return a future resolving to the connection to ``hostname``.
+
+        The connection is established on the first call and reused after
+        that, unless it is not alive anymore.
+
+        """
+        future = self._connections.get(hostname)
+        if future is not None and future.done() and (
+                future.exception() is not None or
+                not ssh._is_connection_alive(future.result())):
+            future = None
+        if future is None:
+            future = self._loop.run_in_executor(
+                None,
+                ssh._open_connection,
+                hostname,
+                settings.server.ssh_username,
+                settings.server.ssh_key,
+                10,
+            )
+            self._connections[hostname] = future
+        return future
+
+    def command(self, cmd, hostname=None, output_format=None, timeout=None):
+        """Executes SSH command(s) on remote hostname.
+
+        Accepts the same arguments as :func:`robottelo.ssh.command`.
+
+        :return: A future resolving to a
+            :class:`robottelo.ssh.SSHCommandResult`.
+        :rtype: asyncio.Future
+
+        """
+        if timeout is None:
+            timeout = 120
+        hostname = hostname or settings.server.hostname
+        limiter = self._get_limiter(hostname)
+        result = asyncio.Future(loop=self._loop)
+
+        def start():
+            """Connect and run the command once the limiter allows it."""
+            if result.done():
+                # Cancelled while waiting for its turn
+                limiter.release()
+                return
+            result.add_done_callback(lambda _: limiter.release())
+            logger.debug('>>> [%s] %s', hostname, cmd)
+            _CommandRun(
+                self._loop, self._get_connection(hostname), cmd,
+                output_format, timeout, result
+            )
+
+        limiter.submit(start)
+        return result
+
+    def close(self):
+        """Close all connections opened by this client."""
+        connections = self._connections
+        self._connections = {}
+        for future in connections.values():
+            if future.done() and future.exception() is None:
+                ssh._close_connection(future.result())
+            else:
+                future.cancel()
+
+
+class _CommandRun(object):
+    """Drive a single command from connection to result.
+
+    The command output is read every time the event loop reports the channel
+    as readable, and the ``result`` future is resolved once the remote end
+    sent its exit status and closed the channel output.
+
+    """
+    def __init__(self, loop, connection, cmd, output_format, timeout, result):
+        self.loop = loop
+        self.cmd = cmd
+        self.output_format = output_format
+        self.result = result
+        self.channel = None
+        self.stdout = []
+        self.stderr = []
+        self._timer = loop.call_later(timeout, self._on_timeout)
+        connection.add_done_callback(self._on_connected)
+
+    def _on_connected(self, connection):
+        """Open the command channel once the connection is established."""
+        if self.result.done():
+            return
+        if connection.cancelled():
+            self._finish(exception=asyncio.CancelledError())
+            return
+        if connection.exception() is not None:
+            self._finish(exception=connection.exception())
+            return
+        channel = self.loop.run_in_executor(
+            None, _open_channel, connection.result(), self.cmd)
+        channel.add_done_callback(self._on_channel)
+
+    def _on_channel(self, channel):
+        """Start reading the channel output."""
+        if channel.exception() is not None:
+            self._finish(exception=channel.exception())
+            return
+        self.channel = channel.result()
+        if self.result.done():
+            self.channel.close()
+            return
+        self.loop.add_reader(self.channel.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        """Drain the channel buffers and check whether the command is done."""
+        channel = self.channel
+        while channel.recv_ready():
+            self.stdout.append(channel.recv(RECV_SIZE))
+        while channel.recv_stderr_ready():
+            self.stderr.append(channel.recv_stderr(RECV_SIZE))
+        if channel.eof_received:
+            # After EOF the channel file descriptor stays readable, stop
+            # watching it and wait for the exit status.
+            self.loop.remove_reader(channel.fileno())
+            self._wait_exit_status()
+
+    def _wait_exit_status(self):
+        """Resolve the result once the channel exit status is available."""
+        if self.result.done():
+            return
+        if self.channel.exit_status_ready():
+            self._finish(ssh._build_result(
+                b''.join(self.stdout),
+                b''.join(self.stderr),
+                self.channel.recv_exit_status(),
+                self.output_format,
+            ))
+        else:
+            self.loop.call_later(0.01, self._wait_exit_status)
+
+    def _on_timeout(self):
+        """Abort the command if it is still running."""
+        self._finish(exception=socket.timeout(
+            'Command "{0}" timed out'.format(self.cmd)))
+
+    def _finish(self, result=None, exception=None):
+        """Resolve the result future and release the channel."""
+        self._timer.cancel()
+        if self.channel is not None:
+            if not self.channel.eof_received:
+                self.loop.remove_reader(self.channel.fileno())
+            self.channel.close()
+        if self.result.done():
+            return
+        if exception is not None:
+            self.result.set_exception(exception)
+        else:
+            self.result.set_result(result)
+
+
+_clients = {}
+
+
+def command(cmd, hostname=None, output_format=None, timeout=None, loop=None):
+    """Executes SSH command(s) on remote hostname from an event loop.
+
+    Uses an :class:`AsyncSSHClient` shared by all calls made on the same event
+    loop. Accepts the same arguments as :func:`robottelo.ssh.command`.
+
+    :return: A future resolving to a :class:`robottelo.ssh.SSHCommandResult`.
+    :rtype: asyncio.Future
+
+    """
+    loop = loop or asyncio.get_event_loop()
+    if loop not in _clients:
+        _clients[loop] = AsyncSSHClient(loop=loop)
+    return _clients[loop].command(cmd, hostname, output_format, timeout)
+
+
+def close(loop=None):
+    """Close all connections opened by :func:`command` on ``loop``."""
+    client = _clients.pop(loop or asyncio.get_event_loop(), None)
+    if client is not None:
+        client.close()
@@ -17,67 +17,17 @@ from robottelo.cli.base import CLIReturnCodeError
 from robottelo.cli.org import Org as OrgCli
 from robottelo.cli.subscription import Subscription
 from robottelo.config import settings
+from robottelo.lazy import LazyModule
 from robottelo.performance.constants import(
     DEFAULT_ORG,
     NUM_THREADS,
 )
-from robottelo.performance.graph import(
-    generate_bar_chart_stat,
-    generate_line_chart_raw_candlepin,
-    generate_line_chart_stat_bucketized_candlepin,
-)
-from robottelo.performance.stat import generate_stat_for_concurrent_thread
-from robottelo.performance.thread import (
-    DeleteThread,
-    SyncThread,
-    SubscribeAKThread,
-    SubscribeAttachThread
-)
-from robottelo.ui.browser import browser
-from robottelo.ui.activationkey import ActivationKey
-from robottelo.ui.architecture import Architecture
-from robottelo.ui.computeprofile import ComputeProfile
-from robottelo.ui.computeresource import ComputeResource
-from robottelo.ui.configgroups import ConfigGroups
-from robottelo.ui.container import Container
-from robottelo.ui.contentviews import ContentViews
-from robottelo.ui.contentsearch import ContentSearch
-from robottelo.ui.discoveredhosts import DiscoveredHosts
-from robottelo.ui.discoveryrules import DiscoveryRules
-from robottelo.ui.domain import Domain
-from robottelo.ui.environment import Environment
-from robottelo.ui.gpgkey import GPGKey
-from robottelo.ui.hardwaremodel import HardwareModel
-from robottelo.ui.hostgroup import Hostgroup
-from robottelo.ui.hosts import Hosts
-from robottelo.ui.ldapauthsource import LdapAuthSource
-from robottelo.ui.lifecycleenvironment import LifecycleEnvironment
-from robottelo.ui.location import Location
-from robottelo.ui.login import Login
-from robottelo.ui.medium import Medium
-from robottelo.ui.navigator import Navigator
-from robottelo.ui.operatingsys import OperatingSys
-from robottelo.ui.org import Org
-from robottelo.ui.oscapcontent import OpenScapContent
-from robottelo.ui.oscappolicy import OpenScapPolicy
-from robottelo.ui.oscapreports import OpenScapReports
-from robottelo.ui.partitiontable import PartitionTable
-from robottelo.ui.products import Products
-from robottelo.ui.puppetclasses import PuppetClasses
-from robottelo.ui.registry import Registry
-from robottelo.ui.repository import Repos
-from robottelo.ui.rhai import RHAI
-from robottelo.ui.role import Role
-from robottelo.ui.settings import Settings
-from robottelo.ui.subnet import Subnet
-from robottelo.ui.subscription import Subscriptions
-from robottelo.ui.sync import Sync
-from robottelo.ui.syncplan import Syncplan
-from robottelo.ui.systemgroup import SystemGroup
-from robottelo.ui.template import Template
-from robottelo.ui.trend import Trend
-from robottelo.ui.usergroup import UserGroup
-from robottelo.ui.user import User
+
+# The performance tests modules import numpy, pygal and the API entities,
+# which only the performance tests need
+perf_graph = LazyModule('robottelo.performance.graph')
+perf_stat = LazyModule('robottelo.performance.stat')
+perf_thread = LazyModule('robottelo.performance.thread')
 
 SAUCE_URL = "http://%s:%s@ondemand.saucelabs.com:80/wd/hub"
 
@@ -169,6 +119,53 @@ class UITestCase(TestCase):
 
     def setUp(self):  # noqa
         """We do want a new browser instance for every test."""
+        # The UI helpers import selenium, which only the UI tests need
+        from robottelo.ui.browser import browser
+        from robottelo.ui.activationkey import ActivationKey
+        from robottelo.ui.architecture import Architecture
+        from robottelo.ui.computeprofile import ComputeProfile
+        from robottelo.ui.computeresource import ComputeResource
+        from robottelo.ui.configgroups import ConfigGroups
+        from robottelo.ui.container import Container
+        from robottelo.ui.contentviews import ContentViews
+        from robottelo.ui.contentsearch import ContentSearch
+        from robottelo.ui.discoveredhosts import DiscoveredHosts
+        from robottelo.ui.discoveryrules import DiscoveryRules
+        from robottelo.ui.domain import Domain
+        from robottelo.ui.environment import Environment
+        from robottelo.ui.gpgkey import GPGKey
+        from robottelo.ui.hardwaremodel import HardwareModel
+        from robottelo.ui.hostgroup import Hostgroup
+        from robottelo.ui.hosts import Hosts
+        from robottelo.ui.ldapauthsource import LdapAuthSource
+        from robottelo.ui.lifecycleenvironment import LifecycleEnvironment
+        from robottelo.ui.location import Location
+        from robottelo.ui.login import Login
+        from robottelo.ui.medium import Medium
+        from robottelo.ui.navigator import Navigator
+        from robottelo.ui.operatingsys import OperatingSys
+        from robottelo.ui.org import Org
+        from robottelo.ui.oscapcontent import OpenScapContent
+        from robottelo.ui.oscappolicy import OpenScapPolicy
+        from robottelo.ui.oscapreports import OpenScapReports
+        from robottelo.ui.partitiontable import PartitionTable
+        from robottelo.ui.products import Products
+        from robottelo.ui.puppetclasses import PuppetClasses
+        from robottelo.ui.registry import Registry
+        from robottelo.ui.repository import Repos
+        from robottelo.ui.rhai import RHAI
+        from robottelo.ui.role import Role
+        from robottelo.ui.settings import Settings
+        from robottelo.ui.subnet import Subnet
+        from robottelo.ui.subscription import Subscriptions
+        from robottelo.ui.sync import Sync
+        from robottelo.ui.syncplan import Syncplan
+        from robottelo.ui.systemgroup import SystemGroup
+        from robottelo.ui.template import Template
+        from robottelo.ui.trend import Trend
+        from robottelo.ui.usergroup import UserGroup
+        from robottelo.ui.user import User
+
         self.browser = browser()
         self.browser.maximize_window()
         self.browser.get(settings.server.get_url())
@@ -393,15 +390,16 @@ class ConcurrentTestCase(TestCase):
     def _get_subscription_id(self):
         """Get subscription id"""
         try:
-            result = Subscription.list(
+            # Only the first subscription is used
+            subscription = next(Subscription.iter_list(
                 {'organization-id': self.org_id},
-                per_page=False
-            )
-        except CLIReturnCodeError:
+                page_size=1
+            ))
+        except (CLIReturnCodeError, StopIteration):
             self.logger.error('Fail to get subscription id!')
             raise RuntimeError('Invalid subscription id. Stop!')
-        subscription_id = result[0]['id']
-        subscription_name = result[0]['name']
+        subscription_id = subscription['id']
+        subscription_name = subscription['name']
         self.logger.info(
             'Subscribed to {0} with subscription id {1}'
             .format(subscription_name, subscription_id)
@@ -495,7 +493,7 @@ class ConcurrentTestCase(TestCase):
 
         # generate line chart of raw data
         test_category = self._get_output_filename(raw_file_name)
-        generate_line_chart_raw_candlepin(
+        perf_graph.generate_line_chart_raw_candlepin(
             time_result_dict,
             'Candlepin Subscription Raw Timings Line Chart - '
             '({0}-{1}-clients)'
@@ -589,7 +587,7 @@ class ConcurrentTestCase(TestCase):
         for i in range(current_num_threads):
             time_list = time_result_dict.get('thread-{0}'.format(i))
             thread_name = 'client-{0}'.format(i)
-            stat_dict = generate_stat_for_concurrent_thread(
+            stat_dict = perf_stat.generate_stat_for_concurrent_thread(
                 thread_name,
                 time_list,
                 stat_file_name,
@@ -598,7 +596,7 @@ class ConcurrentTestCase(TestCase):
             )
 
             # create line chart with each client being grouped by buckets
-            generate_line_chart_stat_bucketized_candlepin(
+            perf_graph.generate_line_chart_stat_bucketized_candlepin(
                 stat_dict,
                 'Concurrent Subscription Statistics - per client bucketized: '
                 'Client-{0} by {1}-{2}-clients'
@@ -647,7 +645,7 @@ class ConcurrentTestCase(TestCase):
                 ]
 
             # for each chunk i, compute and output its stat
-            return_stat = generate_stat_for_concurrent_thread(
+            return_stat = perf_stat.generate_stat_for_concurrent_thread(
                 'bucket-{0}'.format(i),
                 chunks_bucket_i,
                 stat_file_name,
@@ -659,7 +657,7 @@ class ConcurrentTestCase(TestCase):
             stat_dict.update({i: return_stat.get(0, (0, 0, 0, 0))})
 
         # create line chart with all clients grouped by a chunk of buckets
-        generate_line_chart_stat_bucketized_candlepin(
+        perf_graph.generate_line_chart_stat_bucketized_candlepin(
             stat_dict,
             'Concurrent Subscription Statistics - per test bucketized: '
             '({0}-{1}-clients)'
@@ -691,7 +689,7 @@ class ConcurrentTestCase(TestCase):
             thread_name = 'client-{0}'.format(i)
 
             # for each client i, compute and output its stat
-            return_stat = generate_stat_for_concurrent_thread(
+            return_stat = perf_stat.generate_stat_for_concurrent_thread(
                 thread_name,
                 time_list,
                 stat_file_name,
@@ -703,7 +701,7 @@ class ConcurrentTestCase(TestCase):
             stat_dict.update({i: return_stat.get(0, (0, 0, 0, 0))})
 
         # create graph based on stats of all clients
-        generate_bar_chart_stat(
+        perf_graph.generate_bar_chart_stat(
             stat_dict,
             'Concurrent Subscription Statistics - per client: '
             '({0}-{1}-clients)'
@@ -727,7 +725,7 @@ class ConcurrentTestCase(TestCase):
             time_list = time_result_dict.get('thread-{0}'.format(i))
             full_list += time_list
 
-        stat_dict = generate_stat_for_concurrent_thread(
+        stat_dict = perf_stat.generate_stat_for_concurrent_thread(
             'test-{0}'.format(len(time_result_dict)),
             full_list,
             stat_file_name,
@@ -735,7 +733,7 @@ class ConcurrentTestCase(TestCase):
             1
         )
 
-        generate_bar_chart_stat(
+        perf_graph.generate_bar_chart_stat(
             stat_dict,
             'Concurrent Subscription Statistics - per test: '
             '({0}-{1}-clients)'
@@ -769,7 +767,7 @@ class ConcurrentTestCase(TestCase):
         for i in range(current_num_threads):
             thread_name = 'thread-{0}'.format(i)
             time_result_dict_ak[thread_name] = []
-            thread = SubscribeAKThread(
+            thread = perf_thread.SubscribeAKThread(
                 i,
                 thread_name,
                 time_result_dict_ak,
@@ -828,7 +826,7 @@ class ConcurrentTestCase(TestCase):
             time_result_dict_register[thread_name] = []
             time_result_dict_attach[thread_name] = []
 
-            thread = SubscribeAttachThread(
+            thread = perf_thread.SubscribeAttachThread(
                 i,
                 thread_name,
                 {},
@@ -903,7 +901,7 @@ class ConcurrentTestCase(TestCase):
         # Create new threads and start the thread which has sublist of uuids
         for i in range(current_num_threads):
             time_result_dict_del['thread-{0}'.format(i)] = []
-            thread = DeleteThread(
+            thread = perf_thread.DeleteThread(
                 i,
                 'thread-{0}'.format(i),
                 uuid_list[
@@ -985,7 +983,7 @@ class ConcurrentTestCase(TestCase):
                     )
                 )
 
-                thread = SyncThread(
+                thread = perf_thread.SyncThread(
                     tid,
                     "thread-{0}".format(tid),
                     time_result_dict,
@@ -157,19 +157,12 @@ class VirtualMachine(object):
         if self._subscribed:
             self.unregister()
 
-        ssh.command(
-            u'virsh destroy {0}'.format(self.hostname),
-            hostname=self.provisioning_server
-        )
-        ssh.command(
-            u'virsh undefine {0}'.format(self.hostname),
-            hostname=self.provisioning_server
-        )
         image_name = u'{0}.img'.format(self.hostname)
-        ssh.command(
-            u'rm {0}'.format(os.path.join(self.image_dir, image_name)),
-            hostname=self.provisioning_server
-        )
+        with ssh.batch(hostname=self.provisioning_server) as commands:
+            commands.command(u'virsh destroy {0}'.format(self.hostname))
+            commands.command(u'virsh undefine {0}'.format(self.hostname))
+            commands.command(
+                u'rm {0}'.format(os.path.join(self.image_dir, image_name)))
 
     def download_install_rpm(self, repo_url, package_name):
         """Downloads and installs custom rpm on the virtual machine.
@@ -276,6 +269,31 @@ class VirtualMachine(object):
         """
         return self.run(u'subscription-manager unregister')
 
+    def _ensure_created(self, action):
+        """Raise :class:`VirtualMachineError` if the virtual machine is not
+        created.
+
+        :param str action: What requires the virtual machine, completing the
+            error message.
+
+        """
+        if not self._created:
+            raise VirtualMachineError(
+                u'The virtual machine should be created before {0}'
+                .format(action)
+            )
+
+    @staticmethod
+    def _rhel_repo_command(rhel_repo):
+        """Return the command adding the Red Hat repository file
+        ``rhel_repo`` to the virtual machine.
+
+        """
+        # 'Access Insights', 'puppet' requires RHEL 6/7 repo and it is not
+        # possible to sync the repo during the tests as they are huge(in GB's)
+        # hence this adds a file in /etc/yum.repos.d/rhel6/7.repo
+        return u'wget -O /etc/yum.repos.d/rhel.repo {0}'.format(rhel_repo)
+
     def run(self, cmd):
         """Runs a ssh command on the virtual machine
 
@@ -287,28 +305,17 @@ class VirtualMachine(object):
             created.
 
         """
-        if not self._created:
-            raise VirtualMachineError(
-                'The virtual machine should be created before running any ssh '
-                'command'
-            )
-
+        self._ensure_created(u'running any ssh command')
         return ssh.command(cmd, hostname=self.ip_addr)
 
     def get(self, remote_path, local_path=None):
         """Get a remote file from the virtual machine."""
-        if not self._created:
-            raise VirtualMachineError(
-                'The virtual machine should be created before getting any file'
-            )
+        self._ensure_created(u'getting any file')
         ssh.download_file(remote_path, local_path, hostname=self.ip_addr)
 
     def put(self, local_path, remote_path=None):
         """Put a local file to the virtual machine."""
-        if not self._created:
-            raise VirtualMachineError(
-                'The virtual machine should be created before putting any file'
-            )
+        self._ensure_created(u'putting any file')
         ssh.upload_file(local_path, remote_path, hostname=self.ip_addr)
 
     def configure_rhel_repo(self, rhel_repo):
@@ -318,13 +325,7 @@ class VirtualMachine(object):
         :return: None.
 
         """
-        # 'Access Insights', 'puppet' requires RHEL 6/7 repo and it is not
-        # possible to sync the repo during the tests as they are huge(in GB's)
-        # hence this adds a file in /etc/yum.repos.d/rhel6/7.repo
-        self.run(
-            'wget -O /etc/yum.repos.d/rhel.repo {0}'
-            .format(rhel_repo)
-        )
+        self.run(self._rhel_repo_command(rhel_repo))
 
     def configure_puppet(self, rhel_repo=None):
         """Configures puppet on the virtual machine/Host.
@@ -333,8 +334,8 @@ class VirtualMachine(object):
         :return: None.
 
         """
+        self._ensure_created(u'running any ssh command')
         sat6_hostname = settings.server.hostname
-        self.configure_rhel_repo(rhel_repo)
         puppet_conf = (
             'pluginsync      = true\n'
             'report          = true\n'
@@ -344,18 +345,21 @@ class VirtualMachine(object):
             'server          = {1}\n'
             .format(sat6_hostname, sat6_hostname)
         )
-        result = self.run(u'yum install puppet -y')
-        if result.return_code != 0:
+        with ssh.batch(hostname=self.ip_addr) as commands:
+            commands.command(self._rhel_repo_command(rhel_repo))
+            install = commands.command(u'yum install puppet -y')
+        if install.result.return_code != 0:
             raise VirtualMachineError(
                 'Failed to install the puppet rpm')
-        self.run(
-            'echo "{0}" >> /etc/puppet/puppet.conf'
-            .format(puppet_conf)
-        )
-        # This particular puppet run on client would populate a cert on sat6
-        # under the capsule --> certifcates or via cli "puppet cert list", so
-        # that we sign it.
-        self.run(u'puppet agent -t')
+        with ssh.batch(hostname=self.ip_addr) as commands:
+            commands.command(
+                'echo "{0}" >> /etc/puppet/puppet.conf'
+                .format(puppet_conf)
+            )
+            # This particular puppet run on client would populate a cert on
+            # sat6 under the capsule --> certifcates or via cli "puppet cert
+            # list", so that we sign it.
+            commands.command(u'puppet agent -t')
         ssh.command(u'puppet cert sign --all')
         # This particular puppet run would create the host entity under
         # 'All Hosts' and let's redirect stderr to /dev/null as errors at this
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Time the hammer output parsers against the original implementations.
+
+The unit tests check that the parsers return what the original
+implementations they keep did, this script compares their speed on the same
+long outputs::
+
+    python scripts/benchmark_parsers.py
+    python scripts/benchmark_parsers.py clean_output
+
+Each function is called 7 times, in turns with the other functions of the
+same benchmark so all are affected the same by the machine load, and its
+best time is reported.
+
+"""
+from __future__ import print_function
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from robottelo import ssh  # noqa
+from robottelo.cli import hammer  # noqa
+from tests.robottelo import test_hammer, test_ssh  # noqa
+
+
+def clean_output():
+    """``ssh.command`` output cleanup of a 50k lines output."""
+    colored = test_ssh._long_output()  # pylint:disable=W0212
+    plain = re.sub(r'\x1b\[\d\d?m', '', colored)
+    return [
+        ('original, colored',
+         lambda: test_ssh._reference_clean_output(colored)),  # noqa pylint:disable=W0212
+        ('colored', lambda: ssh._clean_output(colored)),  # noqa pylint:disable=W0212
+        ('original, plain',
+         lambda: test_ssh._reference_clean_output(plain)),  # noqa pylint:disable=W0212
+        ('plain', lambda: ssh._clean_output(plain)),  # noqa pylint:disable=W0212
+    ]
+
+
+def parse_csv():
+    """``parse_csv`` of a 10k rows ``repository list`` output."""
+    output = test_hammer._long_csv_output()  # pylint:disable=W0212
+    return [
+        ('original', lambda: test_hammer._reference_parse_csv(output)),  # noqa pylint:disable=W0212
+        ('lazy rows', lambda: hammer.parse_csv(output, lazy=True)),
+        ('dicts', lambda: hammer.parse_csv(output)),
+    ]
+
+
+def parse_info():
+    """``parse_info`` of a long ``content-view info`` output."""
+    output = test_hammer._long_info_output()  # pylint:disable=W0212
+    return [
+        ('original', lambda: test_hammer._reference_parse_info(output)),  # noqa pylint:disable=W0212
+        ('parse_info', lambda: hammer.parse_info(output)),
+    ]
+
+
+#: The benchmarks, each returning a list of ``(label, function)`` tuples.
+BENCHMARKS = {
+    'clean_output': clean_output,
+    'parse_csv': parse_csv,
+    'parse_info': parse_info,
+}
+
+
+def best_of(functions, repeat=7):
+    """Return the best time of ``repeat`` calls of each function, calling
+    them in turns.
+
+    """
+    times = [[] for _ in functions]
+    for _ in range(repeat):
+        for function, function_times in zip(functions, times):
+            function_times.append(timeit.timeit(function, number=1))
+    return [min(function_times) for function_times in times]
+
+
+def main():
+    """Run the benchmarks and print their times."""
+    parser = argparse.ArgumentParser(
+        description='Time the hammer output parsers.')
+    parser.add_argument(
+        'benchmarks',
+        nargs='*',
+        help='benchmarks to run, among {0}, all of them by default'.format(
+            ', '.join(sorted(BENCHMARKS))),
+    )
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark: {0}'.format(name))
+    for name in args.benchmarks or sorted(BENCHMARKS):
+        benchmark = BENCHMARKS[name]
+        print('{0}: {1}'.format(name, benchmark.__doc__))
+        labels, functions = zip(*benchmark())
+        for label, seconds in zip(labels, best_of(functions)):
+            print('{0:>9.3f}s  {1}'.format(seconds, label))
+
+
+if __name__ == '__main__':
+    main()
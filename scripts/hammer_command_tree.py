@@ -1,31 +1,50 @@
 """Generate hammer command tree in json format by inspecting every command's
 help.
 
+The help of all the commands of each level of the tree is fetched at once, on
+several channels of a single SSH connection. With ``--incremental``, the
+subcommands of a command whose help did not change since an existing tree was
+generated are copied from it instead of being fetched again.
+
 """
-import json
+import argparse
+import io
+import six
 
-from robottelo import ssh
 from robottelo.cli import hammer
 
 
-def generate_command_tree(command):
-    """Recursively walk trhough the hammer commands and subcommands and fetch
-    their help. Return a dictionary with the contents.
+def main():
+    """Fetch the hammer command tree and write it to the output file."""
+    parser = argparse.ArgumentParser(
+        description='Generate the hammer command tree in json format.')
+    parser.add_argument(
+        '--incremental',
+        metavar='JSON',
+        help='existing command tree whose unchanged subtrees are reused, '
+             'like tests/foreman/data/hammer_commands.json',
+    )
+    parser.add_argument(
+        '--max-channels',
+        type=int,
+        default=10,
+        help='maximum number of help commands running at the same time',
+    )
+    parser.add_argument(
+        '--output',
+        default='hammer_commands.json',
+        help='file where the tree is written, in the working directory by '
+             'default',
+    )
+    args = parser.parse_args()
+    previous = None
+    if args.incremental:
+        previous = hammer.CommandTree.load(args.incremental, cache=False)
+    tree = hammer.CommandTree.fetch(
+        max_channels=args.max_channels, previous=previous)
+    with io.open(args.output, 'w', encoding='utf-8') as handler:
+        handler.write(six.text_type(tree.to_json()))
 
-    """
-    output = ssh.command('{0} --help'.format(command)).stdout
-    contents = hammer.parse_help(output)
-    if len(contents['subcommands']) > 0:
-        for subcommand in contents['subcommands']:
-            subcommand.update(generate_command_tree(
-                '{0} {1}'.format(command, subcommand['name'])
-            ))
-    return contents
 
-# Generate the json file in the working directory
-with open('hammer_commands.json', 'w') as f:
-    f.write(json.dumps(
-        generate_command_tree('hammer'),
-        indent=2,
-        sort_keys=True
-    ))
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Report the time spent importing a module and the modules it imports.
+
+The module is imported on a new interpreter, the same one running this
+script, so nothing is imported beforehand::
+
+    python scripts/import_time.py robottelo.test
+    python scripts/import_time.py --top 30 tests.foreman.cli.test_organization
+
+Python 3.7 and later report the time spent importing every module, run by
+``python -X importtime``, and the modules taking the longest to import are
+listed. Older versions only report the total time.
+
+"""
+from __future__ import print_function
+import argparse
+import re
+import subprocess
+import sys
+
+IMPORT_TIME_REGEX = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+TOTAL_TIME_CODE = '''
+import time
+start = time.time()
+import {0}
+print(time.time() - start)
+'''
+
+
+def parse_import_time(output):
+    """Parse the ``-X importtime`` output.
+
+    :return: A list of tuples in the form ``(module, self_time,
+        cumulative_time)``, with the times in microseconds.
+
+    """
+    imports = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+        if match:
+            imports.append((
+                match.group(4), int(match.group(1)), int(match.group(2))))
+    return imports
+
+
+def main():
+    """Import the module and print the import times."""
+    parser = argparse.ArgumentParser(
+        description='Report the time spent importing a module.')
+    parser.add_argument('module', help='the module to import')
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=20,
+        help='number of modules taking the longest to import to list',
+    )
+    args = parser.parse_args()
+    if sys.version_info < (3, 7):
+        output = subprocess.check_output(
+            [sys.executable, '-c', TOTAL_TIME_CODE.format(args.module)])
+        print('{0}: {1:.3f}s'.format(args.module, float(output)))
+        return
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import {0}'.format(args.module)],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        sys.exit(stderr)
+    imports = parse_import_time(stderr)
+    # The modules imported when the interpreter starts are reported too
+    total = max(
+        cumulative for module, _, cumulative in imports
+        if module == args.module
+    )
+    print('{0}: {1:.3f}s'.format(args.module, total / 1e6))
+    print('{0:>10} {1:>10}  {2}'.format('cumulative', 'self', 'module'))
+    imports.sort(key=lambda item: item[2], reverse=True)
+    for module, self_time, cumulative in imports[:args.top]:
+        print('{0:>9.3f}s {1:>9.3f}s  {2}'.format(
+            cumulative / 1e6, self_time / 1e6, module))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,7 @@ from robottelo.cli.factory import (
     make_host_collection,
     make_lifecycle_environment,
     make_org,
+    rh_org_pool,
     setup_org_for_a_custom_repo,
     setup_org_for_a_rh_repo,
 )
@@ -631,15 +632,10 @@ class ActivationKeyTestCase(CLITestCase):
 
         @Assert: RH products are successfully associated to Activation key
         """
-        result = setup_org_for_a_rh_repo({
-            u'product': PRDS['rhel'],
-            u'repository-set': REPOSET['rhst7'],
-            u'repository': REPOS['rhst7']['name'],
-            u'organization-id': self.org['id'],
-        })
+        result = rh_org_pool.get()
         content = ActivationKey.product_content({
             u'id': result['activationkey-id'],
-            u'organization-id': self.org['id'],
+            u'organization-id': result['organization-id'],
         })
         self.assertEqual(content[0]['name'], REPOSET['rhst7'])
 
@@ -1,14 +1,11 @@
 """Tests related to hammer command and its options and subcommands."""
 import json
 
-from robottelo import ssh
 from robottelo.cli import hammer
 from robottelo.decorators import bz_bug_is_open, tier1
-from robottelo.helpers import read_data_file
+from robottelo.helpers import get_data_file
 from robottelo.test import CLITestCase
 
-HAMMER_COMMANDS = json.loads(read_data_file('hammer_commands.json'))
-
 
 class HammerCommandsTestCase(CLITestCase):
     """Tests for ensuring that  all expected hammer subcommands and its options
@@ -19,31 +16,31 @@ class HammerCommandsTestCase(CLITestCase):
         super(HammerCommandsTestCase, self).__init__(*args, **kwargs)
         self.differences = {}
 
-    # pylint: disable=no-self-use
+    @classmethod
+    def setUpClass(cls):
+        """Load the expected hammer commands tree"""
+        super(HammerCommandsTestCase, cls).setUpClass()
+        cls.hammer_commands = hammer.CommandTree.load(
+            get_data_file('hammer_commands.json'))
+
     def _fetch_command_info(self, command):
         """Fetch command info from expected commands info dictionary."""
-        info = HAMMER_COMMANDS
-        if command != 'hammer':
-            found = False
-            parts = command.split(' ')[1:]  # exclude hammer
-            for part in parts:
-                for command in info['subcommands']:
-                    if command['name'] == part:
-                        info = command
-                        found = True
-                        break
-            if not found:
-                return None
-        return info
+        return self.hammer_commands.get(command)
 
     def _traverse_command_tree(self, command):
-        """Recursively walk through the hammer commands tree and assert that
-        the expected options are present.
+        """Walk through the hammer commands tree fetched from the server and
+        assert that the expected options are present.
+
+        """
+        tree = hammer.CommandTree.fetch(command)
+        for command in tree:
+            self._compare_command(command, tree[command])
+
+    def _compare_command(self, command, output):
+        """Compare the options and subcommands of a command with the expected
+        ones.
 
         """
-        output = hammer.parse_help(
-            ssh.command('{0} --help'.format(command)).stdout
-        )
         command_options = set([option['name'] for option in output['options']])
         command_subcommands = set(
             [subcommand['name'] for subcommand in output['subcommands']]
@@ -91,12 +88,6 @@ class HammerCommandsTestCase(CLITestCase):
                 diff['removed_subcommands'] = removed_subcommands
             self.differences[command] = diff
 
-        if len(output['subcommands']) > 0:
-            for subcommand in output['subcommands']:
-                self._traverse_command_tree(
-                    '{0} {1}'.format(command, subcommand['name'])
-                )
-
     @tier1
     def test_positive_all_options(self):
         """@Test: check all provided options for every hammer command
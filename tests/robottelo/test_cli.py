@@ -1,7 +1,16 @@
+import os
+import shutil
 import six
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest2
 
-from robottelo.cli.base import Base
+from robottelo.cli import hammer_shell
+from robottelo.cli.base import Base, CLIReturnCodeError, LazyInfo
+from robottelo.cli.metrics import CommandMetrics
+from robottelo.ssh import SSHCommandResult, _build_result
 
 if six.PY2:
     import mock
@@ -21,13 +30,15 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_construct_command(self):
         """_construct_command builds a command using flags and arguments"""
         Base.command_base = 'basecommand'
-        Base.command_sub = 'subcommand'
-        command_parts = Base._construct_command({
+        command = Base._construct_command(u'subcommand', {
             u'flag-one': True,
             u'flag-two': False,
             u'argument': u'value',
             u'ommited-arg': None,
-        }).split()
+        })
+        command_parts = command.split()
+
+        self.assertEqual(command.name, u'basecommand subcommand')
 
         self.assertIn(u'basecommand', command_parts)
         self.assertIn(u'subcommand', command_parts)
@@ -36,6 +47,26 @@ class BaseCliTestCase(unittest2.TestCase):
         self.assertNotIn(u'--flag-two', command_parts)
         self.assertEqual(len(command_parts), 4)
 
+    def test_handle_response_error(self):
+        """The error message names the command which failed"""
+        Base.command_base = 'basecommand'
+        response = SSHCommandResult(u'', u'Error: missing --id', 64)
+        with self.assertRaises(CLIReturnCodeError) as context:
+            Base._handle_response(
+                response,
+                command=Base._construct_command(u'info', {u'name': u'x'}),
+            )
+        self.assertEqual(context.exception.return_code, 64)
+        self.assertIn(u'"basecommand info"', context.exception.msg)
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    def test_delete_hooks(self, execute):
+        """The delete hooks are called with the deleted entity options"""
+        hook = mock.Mock()
+        with mock.patch('robottelo.cli.base.DELETE_HOOKS', [hook]):
+            CLIClass.delete({u'id': 1})
+        hook.assert_called_once_with(CLIClass, {u'id': 1})
+
     def test_username_password_parameters_lookup(self):
         """Username and password returned are the parameters"""
         username, password = CLIClass._get_username_password('auser', 'apass')
@@ -67,3 +98,495 @@ class BaseCliTestCase(unittest2.TestCase):
         self.assertEqual(new_class.foreman_admin_username, 'auser')
         self.assertEqual(new_class.foreman_admin_password, 'apass')
         self.assertIn(Base, new_class.__bases__)
+
+
+@mock.patch('robottelo.cli.base.ssh')
+@mock.patch('robottelo.cli.base.hammer_shell.command')
+@mock.patch('robottelo.cli.base.settings')
+class ExecuteTestCase(unittest2.TestCase):
+    """Tests for the hammer execution modes of ``Base.execute``"""
+
+    def setUp(self):
+        """Do not record metrics of the mock responses"""
+        patcher = mock.patch.object(Base, '_record_metrics')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def configure(self, settings, mode, time_hammer=False):
+        """Configure the hammer mode and the credentials"""
+        settings.hammer.mode = mode
+        settings.performance.time_hammer = time_hammer
+        settings.locale = 'en_US.UTF-8'
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'changeme'
+
+    def test_oneshot(self, settings, shell_command, ssh):
+        """A new hammer process runs each command by default"""
+        self.configure(settings, 'oneshot')
+        Base.execute(
+            u'org list', output_format='csv', return_raw_response=True)
+        self.assertEqual(shell_command.call_count, 0)
+        self.assertEqual(
+            ssh.command.call_args[0][0].split(),
+            [b'LANG=en_US.UTF-8', b'hammer', b'-v', b'-u', b'admin', b'-p',
+             b'changeme', b'--output=csv', b'org', b'list'],
+        )
+
+    def test_shell(self, settings, shell_command, ssh):
+        """Commands run on the hammer shell when enabled"""
+        self.configure(settings, 'shell')
+        response = Base.execute(u'org list', return_raw_response=True)
+        self.assertIs(response, shell_command.return_value)
+        self.assertEqual(
+            shell_command.call_args[0],
+            (u'-v -u admin -p changeme  org list', 'admin', 'changeme'),
+        )
+        self.assertEqual(ssh.command.call_count, 0)
+
+    def test_shell_fallback(self, settings, shell_command, ssh):
+        """Commands run on a new hammer process if the shell can not run
+        them
+
+        """
+        self.configure(settings, 'shell')
+        shell_command.side_effect = hammer_shell.HammerShellError()
+        response = Base.execute(u'org list', return_raw_response=True)
+        self.assertIs(response, ssh.command.return_value)
+
+    def test_shell_time_hammer(self, settings, shell_command, ssh):
+        """Timed commands always run on a new hammer process"""
+        self.configure(settings, 'shell', time_hammer=True)
+        Base.execute(u'org list', return_raw_response=True)
+        self.assertEqual(shell_command.call_count, 0)
+        self.assertIn(b'time -p hammer', ssh.command.call_args[0][0])
+
+
+@mock.patch('robottelo.cli.base.Base.execute')
+@mock.patch('robottelo.cli.base.settings')
+class IterListTestCase(unittest2.TestCase):
+    """Tests for the paginated ``Base.iter_list``"""
+
+    def setUp(self):
+        """Set a command base"""
+        patcher = mock.patch.object(Base, 'command_base', 'org')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_iter_list(self, settings, execute):
+        """Pages are fetched until a page is not full"""
+        settings.hammer.json_output = False
+        execute.side_effect = [
+            [{u'id': u'1'}, {u'id': u'2'}],
+            [{u'id': u'3'}],
+        ]
+        self.assertEqual(
+            [row[u'id'] for row in Base.iter_list({u'search': u'x'}, 2)],
+            [u'1', u'2', u'3'],
+        )
+        commands = [call[0][0].split() for call in execute.call_args_list]
+        self.assertEqual(len(commands), 2)
+        for page, command in enumerate(commands, 1):
+            self.assertIn(u'--page="{0}"'.format(page), command)
+            self.assertIn(u'--per-page="2"', command)
+            self.assertIn(u'--search="x"', command)
+
+    def test_iter_list_page_ignored(self, settings, execute):
+        """Fetching stops when the page option is ignored"""
+        settings.hammer.json_output = False
+        execute.return_value = [{u'id': u'1'}, {u'id': u'2'}]
+        self.assertEqual(
+            [row[u'id'] for row in Base.iter_list(page_size=2)],
+            [u'1', u'2'],
+        )
+        self.assertEqual(execute.call_count, 2)
+
+    def test_iter_list_empty_page(self, settings, execute):
+        """Fetching stops on an empty page"""
+        settings.hammer.json_output = False
+        execute.side_effect = [[{u'id': u'1'}, {u'id': u'2'}], []]
+        self.assertEqual(
+            [row[u'id'] for row in Base.iter_list(page_size=2)],
+            [u'1', u'2'],
+        )
+        self.assertEqual(execute.call_count, 2)
+
+    def test_iter_list_lazy(self, settings, execute):
+        """Pages are only fetched when iterating over their rows"""
+        settings.hammer.json_output = False
+        execute.side_effect = [[{u'id': u'1'}], [{u'id': u'2'}]]
+        rows = Base.iter_list(page_size=1)
+        self.assertEqual(execute.call_count, 0)
+        self.assertEqual(next(rows), {u'id': u'1'})
+        self.assertEqual(execute.call_count, 1)
+
+
+@mock.patch('robottelo.cli.base.Base.execute')
+@mock.patch('robottelo.cli.base.settings')
+class JSONOutputTestCase(unittest2.TestCase):
+    """Tests for the JSON output of the ``Base`` read helpers"""
+
+    def setUp(self):
+        """Set a command base"""
+        patcher = mock.patch.object(Base, 'command_base', 'org')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_info(self, settings, execute):
+        """info requests and normalizes the JSON output when enabled"""
+        settings.hammer.json_output = True
+        execute.return_value = {u'Id': 1, u'Label': u'org', u'Users': []}
+        self.assertEqual(
+            Base.info({u'id': 1}),
+            {u'id': u'1', u'label': u'org', u'users': []},
+        )
+        self.assertEqual(execute.call_args[1][u'output_format'], u'json')
+
+    def test_info_output_format(self, settings, execute):
+        """info returns the raw output of an explicit output format"""
+        settings.hammer.json_output = True
+        execute.return_value = {u'Id': 1}
+        self.assertEqual(
+            Base.info({u'id': 1}, output_format=u'json'), {u'Id': 1})
+
+    def test_list(self, settings, execute):
+        """list requests and normalizes the JSON output when enabled"""
+        settings.hammer.json_output = True
+        execute.return_value = [{u'Id': 1, u'Name': u'org'}]
+        self.assertEqual(Base.list(), [{u'id': u'1', u'name': u'org'}])
+        self.assertEqual(execute.call_args[1][u'output_format'], u'json')
+
+    def test_list_csv(self, settings, execute):
+        """list requests CSV output by default"""
+        settings.hammer.json_output = False
+        Base.list()
+        self.assertEqual(execute.call_args[1][u'output_format'], u'csv')
+
+    def test_create(self, settings, execute):
+        """create reads the new object ID from the JSON output"""
+        settings.hammer.json_output = True
+        execute.side_effect = [
+            {u'Message': u'Organization created', u'Id': 3, u'Name': u'org'},
+            {u'Id': 3, u'Name': u'org', u'Description': None},
+        ]
+        self.assertEqual(
+            Base.create({u'name': u'org'}),
+            {u'id': u'3', u'name': u'org', u'description': {}},
+        )
+        self.assertEqual(
+            execute.call_args[1],
+            {u'command': u'org info --id="3"', u'output_format': u'json'},
+        )
+
+
+class LazyInfoTestCase(unittest2.TestCase):
+    """Tests for the on demand loading of ``LazyInfo``"""
+
+    def setUp(self):
+        """Create a lazy info with a mock loader"""
+        self.load = mock.Mock(return_value={u'id': u'1', u'label': u'org'})
+        self.info = LazyInfo({u'id': u'1', u'name': u'org'}, self.load)
+
+    def test_known_fields(self):
+        """Known fields do not load the info fields"""
+        self.assertEqual(self.info[u'name'], u'org')
+        self.assertEqual(self.info.get(u'id'), u'1')
+        self.assertIn(u'name', self.info)
+        self.assertEqual(self.load.call_count, 0)
+
+    def test_missing_field(self):
+        """A missing field loads the info fields once"""
+        self.assertEqual(self.info[u'label'], u'org')
+        self.assertEqual(self.info.get(u'missing', u'default'), u'default')
+        self.assertNotIn(u'missing', self.info)
+        with self.assertRaises(KeyError):
+            self.info[u'missing']  # pylint:disable=W0104
+        self.assertEqual(self.load.call_count, 1)
+
+    def test_all_fields(self):
+        """Accessing all the fields loads the info fields"""
+        self.assertEqual(
+            self.info, {u'id': u'1', u'name': u'org', u'label': u'org'})
+        self.assertEqual(self.load.call_count, 1)
+        self.assertEqual(len(self.info), 3)
+        self.assertEqual(sorted(self.info), [u'id', u'label', u'name'])
+
+
+@mock.patch('robottelo.cli.base.Base.execute')
+@mock.patch('robottelo.cli.base.settings')
+class LazyCreateTestCase(unittest2.TestCase):
+    """Tests for ``Base.create`` when ``hammer.lazy_create`` is enabled"""
+
+    def setUp(self):
+        """Set a command base"""
+        patcher = mock.patch.object(Base, 'command_base', 'org')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_create(self, settings, execute):
+        """The info command only runs when a missing field is accessed"""
+        settings.hammer.json_output = False
+        settings.hammer.lazy_create = True
+        execute.side_effect = [
+            [{u'message': u'Organization created', u'id': u'3',
+              u'name': u'org'}],
+            [u'Id:    3', u'Name:  org', u'Label: org'],
+        ]
+        result = Base.create({u'name': u'org'})
+        self.assertEqual(result[u'id'], u'3')
+        self.assertNotIn(u'message', dict.keys(result))
+        self.assertEqual(execute.call_count, 1)
+        self.assertEqual(result[u'label'], u'org')
+        self.assertEqual(execute.call_count, 2)
+        self.assertEqual(
+            execute.call_args[1][u'command'], u'org info --id="3"')
+
+
+class StressCLI(Base):
+    """CLI class which checks the commands it runs match their callers"""
+    command_base = 'stress'
+
+    @classmethod
+    def execute(cls, command, output_format=None, **kwargs):
+        """Return the output of the subcommand named in the command options,
+        if it is the subcommand which was built. Commands without that option
+        are the info commands run by create.
+
+        """
+        expected = u'info'
+        if u'--expected="' in command:
+            expected = command.split(u'--expected="')[1].split(u'"')[0]
+        if command.name != u'stress {0}'.format(expected):
+            raise AssertionError(u'{0} built for {1}'.format(
+                command.name, expected))
+        if expected == u'create':
+            return [{u'id': u'1', u'name': u'stress'}]
+        if expected == u'info':
+            return [u'Id: 1']
+        return [{u'id': u'1'}]
+
+
+@mock.patch('robottelo.cli.base.settings')
+class ConcurrentCommandTestCase(unittest2.TestCase):
+    """Stress test for building commands from several threads"""
+
+    def setUp(self):
+        """Switch threads as often as possible"""
+        if six.PY2:
+            interval = sys.getcheckinterval()
+            sys.setcheckinterval(1)
+            self.addCleanup(sys.setcheckinterval, interval)
+        else:
+            interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+            self.addCleanup(sys.setswitchinterval, interval)
+
+    def test_concurrent_commands(self, settings):
+        """Threads running create, info and list at the same time always
+        build the command of their own subcommand
+
+        """
+        settings.hammer.json_output = False
+        settings.hammer.lazy_create = False
+        errors = []
+
+        def run(thread_number):
+            """Run 500 mixed commands"""
+            for i in range(500):
+                try:
+                    operation = (i + thread_number) % 3
+                    if operation == 0:
+                        StressCLI.create({u'expected': u'create'})
+                    elif operation == 1:
+                        StressCLI.info({u'expected': u'info'})
+                    else:
+                        StressCLI.list({u'expected': u'list'})
+                except Exception as err:  # pylint:disable=broad-except
+                    errors.append(err)
+
+        threads = [
+            threading.Thread(target=run, args=(number,))
+            for number in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+@mock.patch('robottelo.cli.base.ssh.command')
+@mock.patch('robottelo.cli.base.settings')
+class MetricsTestCase(unittest2.TestCase):
+    """Tests for the metrics recorded by ``Base.execute``"""
+
+    def setUp(self):
+        """Record the metrics on a new collection"""
+        patcher = mock.patch('robottelo.cli.base.metrics', CommandMetrics())
+        self.metrics = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(Base, 'command_base', 'org')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timed_command(self, settings, command):
+        """The hammer run time is parsed from the time output"""
+        settings.hammer.mode = 'oneshot'
+        settings.performance.time_hammer = True
+        command.return_value = _build_result(
+            b'Id,Name\n1,org\n',
+            b'real 0.50\nuser 0.40\nsys 0.05\n',
+            0,
+            'csv',
+        )
+        Base.list()
+        histogram = self.metrics.histogram
+        self.assertEqual(histogram(u'org list', 'output_size').max, 14)
+        self.assertEqual(histogram(u'org list', 'hammer_time').max, 500000)
+        self.assertEqual(histogram(u'org list', 'parse_time').count, 1)
+        self.assertEqual(histogram(u'org list', 'ssh_overhead').count, 1)
+        self.assertEqual(histogram(u'org list', 'wall_time').count, 1)
+
+    def test_info_parse_time(self, settings, command):
+        """The info output parse time is recorded"""
+        settings.hammer.mode = 'oneshot'
+        settings.hammer.json_output = False
+        settings.performance.time_hammer = False
+        command.return_value = _build_result(b'Id: 1\n', b'', 0)
+        self.assertEqual(Base.info({u'id': 1}), {u'id': u'1'})
+        histogram = self.metrics.histogram
+        self.assertEqual(histogram(u'org info', 'parse_time').count, 1)
+        self.assertIsNone(histogram(u'org info', 'hammer_time'))
+        self.assertEqual(histogram(u'org info', 'wall_time').count, 1)
+
+
+# A hammer replacement printing the output of the commands run by the tests
+FAKE_HAMMER = b"""#!/bin/sh
+case "$*" in
+    *first*) printf 'Id,Name\\n1,first\\n\\n\\n' ;;
+    *second*) printf '\\nName is taken\\n\\n' >&2; exit 65 ;;
+    *third*) printf 'Id,Name\\n3,third' ;;
+    *stop*) kill -9 0 ;;
+esac
+"""
+
+
+@mock.patch('robottelo.cli.base.settings')
+class ExecuteBatchTestCase(unittest2.TestCase):
+    """Tests for ``Base.execute_batch``"""
+
+    def setUp(self):
+        """Build the commands of an org class and run the SSH commands on a
+        local shell with a fake hammer.
+
+        """
+        patcher = mock.patch.object(Base, 'command_base', 'org')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.commands = [
+            Base._construct_command('create', {u'name': name})
+            for name in (u'first', u'second', u'third')
+        ]
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        hammer = os.path.join(directory, 'hammer')
+        with open(hammer, 'wb') as handler:
+            handler.write(FAKE_HAMMER)
+        os.chmod(hammer, 0o755)
+        environment = dict(
+            os.environ, PATH=directory + os.pathsep + os.environ['PATH'])
+        patcher = mock.patch('robottelo.ssh._get_connection')
+        self.get_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        connection = self.get_connection.return_value.__enter__.return_value
+
+        def exec_command(script, timeout):  # pylint:disable=W0613
+            """Run ``script`` with ``sh`` and return its output as the
+            channel.
+
+            """
+            process = subprocess.Popen(
+                ['sh', '-c', script],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=environment,
+                # The whole script is killed when a command stops it
+                preexec_fn=os.setsid,
+            )
+            stdout, stderr = process.communicate()
+            return None, mock.Mock(
+                channel=(stdout, stderr, process.returncode)), None
+
+        connection.exec_command.side_effect = exec_command
+        patcher = mock.patch(
+            'robottelo.ssh._read_channel', side_effect=lambda channel: channel)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def configure(self, settings):
+        """Configure the credentials and run hammer on a new process"""
+        settings.locale = 'en_US.UTF-8'
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'changeme'
+        settings.hammer.mode = 'oneshot'
+        settings.performance.time_hammer = False
+
+    def test_single_ssh_command(self, settings):
+        """All commands run on a single SSH command"""
+        self.configure(settings)
+        Base.execute_batch(self.commands, output_format='csv')
+        self.assertEqual(self.get_connection.call_count, 1)
+        script = self.get_connection.return_value.__enter__.return_value \
+            .exec_command.call_args[0][0]
+        self.assertIn(
+            u'LANG=en_US.UTF-8 hammer -v -u admin -p changeme --output=csv '
+            u'org create --name=', script)
+
+    def test_results(self, settings):
+        """Each command gets the result ``ssh.command`` returns for it,
+        trailing blank lines included.
+
+        """
+        self.configure(settings)
+        for output_format in (None, 'csv'):
+            results = Base.execute_batch(
+                self.commands, output_format=output_format)
+            expected = [
+                Base.execute(
+                    command,
+                    output_format=output_format,
+                    return_raw_response=True,
+                )
+                for command in self.commands
+            ]
+            self.assertEqual(
+                [result.stdout for result in results],
+                [result.stdout for result in expected],
+            )
+            self.assertEqual(
+                [result.stderr for result in results],
+                [result.stderr for result in expected],
+            )
+            self.assertEqual(
+                [result.return_code for result in results],
+                [result.return_code for result in expected],
+            )
+        self.assertEqual(
+            results[0].stdout, [{u'id': u'1', u'name': u'first'}])
+        self.assertEqual(results[1].stderr, u'\nName is taken\n\n')
+        self.assertEqual(results[1].return_code, 65)
+        self.assertEqual(
+            Base.execute_batch(self.commands[:1])[0].stdout,
+            [u'Id,Name', u'1,first', u'', u'', u''],
+        )
+
+    def test_stopped(self, settings):
+        """Commands which did not run get the script return code"""
+        self.configure(settings)
+        self.commands[1] = Base._construct_command(
+            'create', {u'name': u'stop'})
+        results = Base.execute_batch(self.commands, output_format='csv')
+        self.assertEqual(results[0].return_code, 0)
+        self.assertEqual(
+            [result.return_code for result in results[1:]], [-9, -9])
+        with self.assertRaises(CLIReturnCodeError):
+            Base._handle_response(results[2])
@@ -1,5 +1,10 @@
 """Unit tests for :mod:`robottelo.decorators`."""
+import os
+import shutil
 import six
+import tempfile
+import threading
+import time
 
 from fauxfactory import gen_integer
 from robottelo import decorators
@@ -151,12 +156,12 @@ class BzBugIsOpenTestCase(TestCase):
 class CacheableTestCase(TestCase):
     """Tests for :func:`robottelo.decorators.cacheable`."""
     def setUp(self):
-        self.object_cache_patcher = mock.patch.dict(
-            'robottelo.decorators.OBJECT_CACHE')
+        self.object_cache_patcher = mock.patch(
+            'robottelo.decorators.OBJECT_CACHE', decorators.ObjectCache())
         self.object_cache = self.object_cache_patcher.start()
 
         def make_foo(options):
-            return {'id': 42}
+            return {'id': 42, 'options': options}
 
         self.make_foo = decorators.cacheable(make_foo)
 
@@ -166,21 +171,163 @@ class CacheableTestCase(TestCase):
     def test_build_cache(self):
         """Create a new object and add it to the cache."""
         obj = self.make_foo(cached=True)
-        self.assertEqual(decorators.OBJECT_CACHE, {'foo': {'id': 42}})
-        self.assertEqual(id(decorators.OBJECT_CACHE['foo']), id(obj))
+        self.assertIn(('foo', ()), self.object_cache)
+        self.assertEqual(len(self.object_cache), 1)
+        self.assertEqual(self.object_cache.misses, 1)
+        self.assertIs(self.make_foo({}, cached=True), obj)
 
     def test_return_from_cache(self):
         """Return an already cached object."""
-        cache_obj = {'id': 42}
-        decorators.OBJECT_CACHE['foo'] = cache_obj
-        obj = self.make_foo(cached=True)
-        self.assertEqual(id(cache_obj), id(obj))
+        obj = self.make_foo({'name': 'foo', 'org': 1}, cached=True)
+        self.assertIs(
+            self.make_foo({'org': 1, 'name': 'foo'}, cached=True), obj)
+        self.assertEqual(self.object_cache.hits, 1)
+        self.assertEqual(self.object_cache.misses, 1)
+
+    def test_cache_by_options(self):
+        """Objects created with different options are cached apart."""
+        first = self.make_foo({'org': 1}, cached=True)
+        second = self.make_foo({'org': 2}, cached=True)
+        self.assertIsNot(first, second)
+        self.assertEqual(second['options'], {'org': 2})
+        self.assertEqual(len(self.object_cache), 2)
+
+    @mock.patch('robottelo.decorators._object_cache_bounded', False)
+    @mock.patch('robottelo.decorators.settings')
+    def test_size_from_settings(self, settings):
+        """The cache size is read once the settings are configured."""
+        settings.configured = False
+        self.make_foo(cached=True)
+        self.assertIsNone(self.object_cache.max_size)
+        settings.configured = True
+        settings.hammer.object_cache_size = 1
+        self.make_foo({'org': 1}, cached=True)
+        self.assertEqual(self.object_cache.max_size, 1)
+        self.assertEqual(len(self.object_cache), 1)
 
     def test_create_and_not_add_to_cache(self):
         """Create a new object and not add it to the cache."""
         self.make_foo(cached=False)
-        self.assertNotIn('foo', decorators.OBJECT_CACHE)
-        self.assertEqual(decorators.OBJECT_CACHE, {})
+        self.assertEqual(len(self.object_cache), 0)
+        self.assertEqual(self.object_cache.misses, 0)
+
+
+class ObjectCacheTestCase(TestCase):
+    """Tests for :class:`robottelo.decorators.ObjectCache`."""
+    def setUp(self):
+        self.cache = decorators.ObjectCache()
+
+    def test_lru(self):
+        """The least recently used objects are dropped first."""
+        self.cache.max_size = 2
+        for index in range(2):
+            self.cache.get_or_create('org', {'index': index}, dict)
+        # Use the first one so the second one is the least recently used
+        self.cache.get_or_create('org', {'index': 0}, dict)
+        self.cache.get_or_create('org', {'index': 2}, dict)
+        self.assertIn(self.cache.key('org', {'index': 0}), self.cache)
+        self.assertNotIn(self.cache.key('org', {'index': 1}), self.cache)
+        self.assertIn(self.cache.key('org', {'index': 2}), self.cache)
+
+    def test_discard(self):
+        """Objects can be dropped by options, ID or name."""
+        for name, entity_id in (('org', 1), ('org', 2), ('product', 1)):
+            self.cache.get_or_create(
+                name, {'id': entity_id}, lambda: {'id': str(entity_id)})
+        self.cache.discard('org', {'id': 2})
+        self.assertNotIn(self.cache.key('org', {'id': 2}), self.cache)
+        self.cache.discard_entity('org', 1)
+        self.assertNotIn(self.cache.key('org', {'id': 1}), self.cache)
+        self.assertEqual(len(self.cache), 1)
+        self.cache.clear('product')
+        self.assertEqual(len(self.cache), 0)
+
+    def test_failure_not_cached(self):
+        """Objects which fail to be created are not cached."""
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_create('org', None, fail)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.get_or_create('org', None, dict), {})
+        self.assertEqual(self.cache._creating, {})
+
+    def test_concurrent_create_failure(self):
+        """Threads waiting for a failed creation and threads coming next
+        never create the object at the same time.
+
+        """
+        lock = threading.Lock()
+        running = []
+        overlaps = []
+        started = threading.Event()
+        failed = threading.Event()
+
+        def create():
+            with lock:
+                running.append(1)
+                overlaps.append(len(running) > 1)
+            started.set()
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+            if not failed.is_set():
+                failed.set()
+                raise ValueError()
+            return {'id': 1}
+
+        def get_or_create():
+            try:
+                results.append(self.cache.get_or_create('org', None, create))
+            except ValueError:
+                pass
+
+        results = []
+        first = threading.Thread(target=get_or_create)
+        first.start()
+        started.wait(5)
+        waiting = threading.Thread(target=get_or_create)
+        waiting.start()
+        failed.wait(5)
+        first.join()
+        later = threading.Thread(target=get_or_create)
+        later.start()
+        for thread in (waiting, later):
+            thread.join()
+        self.assertEqual(overlaps, [False, False])
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(self.cache._creating, {})
+
+    def test_concurrent_create(self):
+        """An object requested by several threads is created once."""
+        created = []
+        started = threading.Event()
+
+        def create():
+            started.set()
+            time.sleep(0.05)
+            created.append(1)
+            return {'id': 1}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.cache.get_or_create('org', None, create)))
+            for _ in range(4)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(created, [1])
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.cache.hits, 3)
+        self.assertEqual(self.cache.misses, 1)
 
 
 class RmBugIsOpenTestCase(TestCase):
@@ -384,6 +531,269 @@ class RedmineClosedIssueStatusesTestCase(TestCase):
             )
         requests.get.assert_not_called()
 
+    @mock.patch('robottelo.decorators._get_redmine_bug_status_id')
+    @mock.patch('robottelo.decorators._load_bugs')
+    def test_not_in_bug_cache(self, load_bugs, get_status_id):
+        """Bugs are assumed closed when the statuses are not in the bug
+        cache, which is looked up only once.
+
+        """
+        load_bugs.return_value = {}
+        get_status_id.return_value = 12
+        with mock.patch.dict(
+                'robottelo.decorators._redmine', closed_statuses=None):
+            self.assertIsNone(decorators._redmine_closed_issue_statuses())
+            self.assertFalse(decorators.rm_bug_is_open(1))
+            self.assertFalse(decorators.rm_bug_is_open(2))
+        self.assertEqual(load_bugs.call_count, 1)
+
+
+class BugCacheTestCase(TestCase):
+    """Tests for :class:`robottelo.decorators.BugCache`."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = decorators.BugCache(
+            os.path.join(self.directory, 'bugs', 'bugs.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_update(self):
+        """Only the bugs missing from the cache are fetched, and are cached
+        for the other processes.
+
+        """
+        fetch = mock.Mock(return_value={'1': {'status': 'NEW'}})
+        self.assertEqual(
+            self.cache.update('bugzilla', [1], fetch),
+            {'1': {'status': 'NEW'}}
+        )
+        fetch.side_effect = lambda bug_ids: {
+            six.text_type(bug_id): {'status': 'CLOSED'} for bug_id in bug_ids}
+        self.assertEqual(
+            self.cache.update('bugzilla', [1, 2], fetch),
+            {'1': {'status': 'NEW'}, '2': {'status': 'CLOSED'}}
+        )
+        fetch.assert_called_with([2])
+        other = decorators.BugCache(self.cache.path)
+        self.assertEqual(
+            other.get('bugzilla', [1, 2, 3]),
+            {'1': {'status': 'NEW'}, '2': {'status': 'CLOSED'}}
+        )
+        self.assertEqual(other.get('redmine', [1, 2]), {})
+
+    def test_expired(self):
+        """Expired bugs are fetched again, and only returned by ``get`` when
+        stale bugs are requested.
+
+        """
+        self.cache.update('bugzilla', [1], lambda bug_ids: {'1': 'old'})
+        self.cache.ttl = 0
+        time.sleep(0.01)
+        self.assertEqual(self.cache.get('bugzilla', [1]), {})
+        self.assertEqual(
+            self.cache.get('bugzilla', [1], stale=True), {'1': 'old'})
+        self.assertEqual(
+            self.cache.update('bugzilla', [1], lambda bug_ids: {'1': 'new'}),
+            {'1': 'new'}
+        )
+
+    def test_fetch_error(self):
+        """Nothing is cached if fetching fails."""
+        fetch = mock.Mock(side_effect=decorators.BugFetchError)
+        with self.assertRaises(decorators.BugFetchError):
+            self.cache.update('bugzilla', [1], fetch)
+        self.assertEqual(self.cache.get('bugzilla', [1], stale=True), {})
+
+
+class LoadBugsTestCase(TestCase):
+    """Tests for ``robottelo.decorators._load_bugs``."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings_patcher = mock.patch('robottelo.decorators.settings')
+        self.settings = self.settings_patcher.start()
+        self.settings.bugs.cache_path = os.path.join(
+            self.directory, 'bugs.sqlite')
+        self.settings.bugs.cache_ttl = 3600
+        self.settings.bugs.offline = False
+
+    def tearDown(self):
+        self.settings_patcher.stop()
+        shutil.rmtree(self.directory)
+
+    def test_without_cache(self):
+        """Bugs are fetched when no bug cache is configured."""
+        self.settings.bugs.cache_path = None
+        bug = object()
+        self.assertIs(
+            decorators._load_bugs(
+                'bugzilla', [1], lambda bug_ids: {'1': bug})['1'],
+            bug
+        )
+
+    def test_cached_bugzilla_bug(self):
+        """Bugzilla bugs are read back from the cache with their status and
+        whiteboard.
+
+        """
+        bug = mock.Mock(status='NEW', whiteboard='verified in upstream')
+        decorators._load_bugs('bugzilla', [1], lambda bug_ids: {'1': bug})
+        fetch = mock.Mock()
+        self.assertEqual(
+            decorators._load_bugs('bugzilla', [1], fetch),
+            {'1': decorators.BugzillaBug('NEW', 'verified in upstream')}
+        )
+        fetch.assert_not_called()
+
+    def test_fetch_error(self):
+        """Expired bugs are used if fetching them fails."""
+        decorators._load_bugs('redmine', [1], lambda bug_ids: {'1': 5})
+        self.settings.bugs.cache_ttl = 0
+        time.sleep(0.01)
+        fetch = mock.Mock(side_effect=decorators.BugFetchError)
+        self.assertEqual(
+            decorators._load_bugs('redmine', [1], fetch), {'1': 5})
+        fetch.assert_called_once_with([1])
+        with self.assertRaises(decorators.BugFetchError):
+            decorators._load_bugs('redmine', [2], fetch)
+
+    def test_offline(self):
+        """Bugs are only read from the cache, whatever their age, when
+        offline.
+
+        """
+        decorators._load_bugs('redmine', [1], lambda bug_ids: {'1': 5})
+        self.settings.bugs.cache_ttl = 0
+        self.settings.bugs.offline = True
+        time.sleep(0.01)
+        fetch = mock.Mock()
+        self.assertEqual(
+            decorators._load_bugs('redmine', [1, 2], fetch), {'1': 5})
+        fetch.assert_not_called()
+
+
+class PrefetchBugsTestCase(TestCase):
+    """Tests for :func:`robottelo.decorators.prefetch_bugs`."""
+    def setUp(self):
+        self.patchers = [
+            mock.patch.dict('robottelo.decorators._bugzilla', clear=True),
+            mock.patch.dict(
+                'robottelo.decorators._redmine', issues={}),
+            mock.patch.dict(
+                'robottelo.decorators._referenced_bugs',
+                bugzilla=set(), redmine=set()),
+            mock.patch.dict(
+                'robottelo.decorators._prefetched_bugs',
+                bugzilla=set(), redmine=set()),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.bugzilla_patcher = mock.patch('robottelo.decorators.bugzilla')
+        self.bugzilla = self.bugzilla_patcher.start()
+        self.requests_patcher = mock.patch('robottelo.decorators.requests')
+        self.requests = self.requests_patcher.start()
+
+    def tearDown(self):
+        self.requests_patcher.stop()
+        self.bugzilla_patcher.stop()
+        for patcher in reversed(self.patchers):
+            patcher.stop()
+
+    def test_referenced_bugs(self):
+        """The bugs referenced by skip_if_bug_open are recorded."""
+        @decorators.skip_if_bug_open('bugzilla', 1)
+        @decorators.skip_if_bug_open('redmine', 2)
+        def foo():
+            pass
+
+        self.assertEqual(decorators._referenced_bugs['bugzilla'], {1})
+        self.assertEqual(decorators._referenced_bugs['redmine'], {2})
+
+    def test_bugzilla(self):
+        """Referenced Bugzilla bugs are fetched with a single query."""
+        decorators._referenced_bugs['bugzilla'].update([1, 2])
+        connection = self.bugzilla.RHBugzilla.return_value
+        connection.getbugs.return_value = [
+            mock.Mock(id=1, status='NEW', whiteboard=''),
+            None,
+        ]
+        decorators.prefetch_bugs()
+        self.assertEqual(
+            decorators._get_bugzilla_bug(1),
+            decorators.BugzillaBug('NEW', '')
+        )
+        self.assertEqual(
+            sorted(connection.getbugs.call_args[0][0]), [1, 2])
+        # Bug 2 was not found, it is fetched by itself when looked up
+        connection.getbugsimple.return_value = 'bug 2'
+        self.assertEqual(decorators._get_bugzilla_bug(2), 'bug 2')
+        self.assertEqual(connection.getbugs.call_count, 1)
+
+    def test_bugzilla_error(self):
+        """Bugs are fetched one by one if they can not be prefetched."""
+        decorators._referenced_bugs['bugzilla'].update([1, 2])
+        connection = self.bugzilla.RHBugzilla.return_value
+        connection.getbugs.side_effect = decorators.Fault(1, 'Error')
+        connection.getbugsimple.return_value = 'bug 1'
+        decorators.prefetch_bugs()
+        self.assertEqual(decorators._get_bugzilla_bug(1), 'bug 1')
+        self.assertEqual(connection.getbugs.call_count, 1)
+
+    def test_redmine(self):
+        """Referenced Redmine bugs are fetched with a single request."""
+        decorators._referenced_bugs['redmine'].update([1, 2])
+        self.requests.get.return_value.status_code = 200
+        self.requests.get.return_value.json.return_value = {'issues': [
+            {'id': 1, 'status': {'id': 3}},
+            {'id': 2, 'status': {'id': 5}},
+        ]}
+        decorators.prefetch_bugs()
+        self.assertEqual(decorators._get_redmine_bug_status_id(2), 5)
+        self.assertEqual(decorators._get_redmine_bug_status_id(1), 3)
+        self.requests.get.assert_called_once_with(
+            '{0}/issues.json'.format(decorators.REDMINE_URL),
+            params={'issue_id': mock.ANY, 'limit': 2, 'status_id': '*'},
+        )
+        self.assertEqual(
+            sorted(self.requests.get.call_args[1]['params']['issue_id']
+                   .split(',')),
+            ['1', '2']
+        )
+
+    def test_lookup_not_prefetched(self):
+        """Looking up a bug only fetches that bug, even if others are
+        referenced.
+
+        """
+        decorators._referenced_bugs['bugzilla'].update([1, 2])
+        connection = self.bugzilla.RHBugzilla.return_value
+        connection.getbugsimple.return_value = 'bug 1'
+        self.assertEqual(decorators._get_bugzilla_bug(1), 'bug 1')
+        connection.getbugsimple.assert_called_once_with(1)
+        connection.getbugs.assert_not_called()
+        self.assertNotIn(2, decorators._bugzilla)
+
+    def test_report(self):
+        """Bugs are fetched in chunks and each query is reported."""
+        decorators._referenced_bugs['redmine'].update([1, 2, 3])
+        ok = mock.Mock(status_code=200)
+        ok.json.return_value = {'issues': [{'id': 1, 'status': {'id': 3}}]}
+        self.requests.get.side_effect = lambda url, params: (
+            ok if params['issue_id'] == '1' else mock.Mock(status_code=500))
+        report = decorators.prefetch_bugs(chunk_size=1)
+        self.assertEqual(self.requests.get.call_count, 3)
+        self.assertEqual(sorted(report), ['redmine'])
+        self.assertEqual(report['redmine']['bugs'], 3)
+        self.assertEqual(report['redmine']['found'], 1)
+        self.assertEqual(
+            sorted(bool(query['error'])
+                   for query in report['redmine']['queries']),
+            [False, True, True]
+        )
+        self.assertEqual(decorators._redmine['issues'], {1: 3})
+        # Nothing is left to prefetch
+        self.assertEqual(decorators.prefetch_bugs(), {})
+
 
 class RunOnlyOnTestCase(TestCase):
     """Tests for :func:`robottelo.decorators.run_only_on`."""
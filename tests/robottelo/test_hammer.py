@@ -1,8 +1,22 @@
 # -*- encoding: utf-8 -*-
 """Tests for Robottelo's hammer helpers"""
+import csv
+import io
+import os
+import re
+import shutil
+import six
+import tempfile
 import unittest2
 
 from robottelo.cli import hammer
+from robottelo.ssh import SSHCommandResult
+from six.moves import cStringIO as StringIO
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
 
 
 class ParseCSVTestCase(unittest2.TestCase):
@@ -37,6 +51,127 @@ class ParseCSVTestCase(unittest2.TestCase):
             ]
         )
 
+    def test_parse_csv_lazy(self):
+        """Lazy rows can be used as the dicts returned by default"""
+        output_lines = [
+            u'Id,Name,Full Name',
+            u'1,chårs,"a, b"',
+            u'2',
+            u'',
+        ]
+        rows = hammer.parse_csv(output_lines, lazy=True)
+        self.assertEqual(rows, hammer.parse_csv(output_lines))
+        self.assertEqual(rows[0][u'full-name'], u'a, b')
+        self.assertIsInstance(rows[0][u'name'], six.text_type)
+        self.assertEqual(rows[0].get(u'name'), u'chårs')
+        self.assertEqual(dict(rows[1]), {u'id': u'2'})
+        self.assertEqual(len(rows[1]), 1)
+        self.assertNotIn(u'name', rows[1])
+        self.assertIsNone(rows[1].get(u'name'))
+        with self.assertRaises(KeyError):
+            rows[1][u'name']  # pylint:disable=W0104
+        with self.assertRaises(KeyError):
+            rows[0][u'missing']  # pylint:disable=W0104
+        self.assertNotEqual(rows[0], rows[1])
+
+
+def _reference_parse_csv(output):
+    """The original ``parse_csv``, decoding the values one by one."""
+    data = '\n'.join(output)
+    if six.PY2:
+        data = data.encode('utf8')
+    reader = csv.reader(StringIO(data))
+    if six.PY2:
+        reader = ([value.decode('utf8') for value in row] for row in reader)
+    keys = [header.replace(' ', '-').lower() for header in next(reader)]
+    return [dict(zip(keys, values)) for values in reader if len(values) > 0]
+
+
+def _long_csv_output():
+    """Return a 10k rows output built from a recorded ``repository list``
+    output.
+
+    """
+    path = os.path.join(
+        os.path.dirname(__file__), 'data', 'hammer_repository_list.csv')
+    with io.open(path, encoding='utf-8') as handler:
+        recorded = handler.read().splitlines()
+    output = [recorded[0]]
+    rows = recorded[1:]
+    for i in range(10000):
+        row = rows[i % len(rows)]
+        output.append(u'{0},{1}'.format(i, row.split(u',', 1)[1]))
+    return output
+
+
+class ParseLongCSVTestCase(unittest2.TestCase):
+    """Compare ``parse_csv`` to the original parser on a long output"""
+    @classmethod
+    def setUpClass(cls):
+        """Build a long ``repository list`` output."""
+        cls.output = _long_csv_output()
+
+    def test_parse_csv(self):
+        """Both row types have the same contents as the original parser"""
+        expected = _reference_parse_csv(self.output)
+        self.assertEqual(hammer.parse_csv(self.output), expected)
+        self.assertEqual(hammer.parse_csv(self.output, lazy=True), expected)
+        self.assertEqual(
+            [dict(row) for row in hammer.parse_csv(self.output, lazy=True)],
+            expected
+        )
+
+
+class ParseJSONTestCase(unittest2.TestCase):
+    """Tests for normalizing JSON hammer output"""
+    def test_parse_json(self):
+        """JSON output has the same shape as the parsed info output"""
+        data = hammer.load_json(u"""{
+            "Id": 1,
+            "Name": "chårs",
+            "Description": null,
+            "Red Hat Repository": false,
+            "Publish via HTTP": true,
+            "Sync Plan ID": {},
+            "GPG": {"GPG Key ID": 1, "GPG Key": "key name"},
+            "Organizations": ["Org 1", "Org 2"],
+            "Repositories": [
+                {"Repo Name": "repo1", "Repo ID": 10},
+                {"Repo Name": "repo2", "Repo ID": 20}
+            ]
+        }""")
+        self.assertEqual(
+            hammer.parse_json(data),
+            hammer.parse_info([
+                u'Id:                 1',
+                u'Name:               chårs',
+                u'Description:        ',
+                u'Red Hat Repository: no',
+                u'Publish via HTTP:   yes',
+                u'Sync Plan ID:',
+                u'GPG:',
+                u'    GPG Key ID: 1',
+                u'    GPG Key: key name',
+                u'Organizations:',
+                u'    Org 1',
+                u'    Org 2',
+                u'Repositories:',
+                u' 1) Repo Name: repo1',
+                u'    Repo ID:   10',
+                u' 2) Repo Name: repo2',
+                u'    Repo ID:   20',
+            ])
+        )
+
+    def test_parse_json_list(self):
+        """JSON list output has the same shape as the parsed CSV output"""
+        data = hammer.load_json(
+            u'[{"Id": 1, "Name": "ACME"}, {"Id": 2, "Name": "Default"}]')
+        self.assertEqual(
+            hammer.parse_json(data),
+            hammer.parse_csv([u'Id,Name', u'1,ACME', u'2,Default'])
+        )
+
 
 class ParseHelpTestCase(unittest2.TestCase):
     """Tests for parsing hammer help output"""
@@ -289,3 +424,298 @@ class ParseInfoTestCase(unittest2.TestCase):
                 ],
             }
         )
+
+    def test_parse_nested_attributes(self):
+        """Can parse groups of sub-properties nested deeper than one level"""
+        output = [
+            'Id:               1',
+            'Name:             host1.example.com',
+            'Content Information:',
+            '    Content view:',
+            '        ID:   1',
+            '        Name: Default Organization View',
+            '    Lifecycle environment:',
+            '        ID:   1',
+            '        Name: Library',
+            '    Content Source:',
+            'Network Interfaces:',
+            ' 1) Id:           1',
+            '    Identifier:   eth0',
+            '    Addresses:',
+            '        MAC address:  52:54:00:ab:cd:ef',
+            '        IPv4 address: 192.168.100.10',
+            ' 2) Id:           2',
+            '    Identifier:   eth1',
+            'Parameters:',
+            '    domain => example.com',
+        ]
+        self.assertEqual(
+            hammer.parse_info(output),
+            {
+                'id': '1',
+                'name': 'host1.example.com',
+                'content-information': {
+                    'content-view': {
+                        'id': '1',
+                        'name': 'Default Organization View',
+                    },
+                    'lifecycle-environment': {
+                        'id': '1',
+                        'name': 'Library',
+                    },
+                    'content-source': '',
+                },
+                'network-interfaces': [
+                    {
+                        'id': '1',
+                        'identifier': 'eth0',
+                        'addresses': {
+                            'mac-address': '52:54:00:ab:cd:ef',
+                            'ipv4-address': '192.168.100.10',
+                        },
+                    },
+                    {'id': '2', 'identifier': 'eth1'},
+                ],
+                'parameters': {'domain': 'example.com'},
+            }
+        )
+
+    def test_parse_invalid_line(self):
+        """Raises ValueError on lines with no property"""
+        with self.assertRaises(ValueError):
+            hammer.parse_info(['Name: org', 'no property'])
+
+
+def _reference_parse_info(output):
+    """The original ``parse_info``, which handles a single level of
+    sub-properties.
+
+    """
+    contents = {}
+    sub_prop = None
+    sub_num = None
+    for line in output:
+        if line == '':
+            continue
+        if line.startswith(' '):
+            if line.find(':') != -1:
+                key, value = line.lstrip().split(":", 1)
+            elif line.find('=>') != -1:
+                key, value = line.lstrip().split(" =>", 1)
+            else:
+                key = value = None
+            if key is None and value is None:
+                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
+                if match is None:
+                    match = re.match(r'(.*)$', line.lstrip())
+                value = match.group(1)
+                if isinstance(contents[sub_prop], dict):
+                    contents[sub_prop] = []
+                contents[sub_prop].append(value)
+            else:
+                starts_with_number = re.match(r'(\d+)\)', key)
+                if starts_with_number:
+                    sub_num = int(starts_with_number.group(1))
+                    if sub_num == 1:
+                        contents[sub_prop] = []
+                    key = re.sub(r'\d+\)', '', key)
+                    contents[sub_prop].append({})
+                key = key.lstrip().replace(' ', '-').lower()
+                if sub_num is not None:
+                    contents[sub_prop][-1][key] = value.lstrip()
+                else:
+                    contents[sub_prop][key] = value.lstrip()
+        else:
+            sub_num = None
+            key, value = line.lstrip().split(":", 1)
+            key = key.lstrip().replace(' ', '-').lower()
+            if value.lstrip() == '':
+                sub_prop = key
+                contents[sub_prop] = {}
+            else:
+                contents[key] = value.lstrip()
+    return contents
+
+
+def _long_info_output():
+    """Return a long ``content-view info`` output."""
+    output = [
+        u'ID:                     2',
+        u'Name:                   cv 1',
+        u'Versions:',
+    ]
+    for i in range(1, 501):
+        output.extend([
+            u' {0}) ID:        {0}'.format(i),
+            u'    Version:   {0}.0'.format(i),
+            u'    Published: 2015/11/05 15:01:12',
+        ])
+    output.append(u'Facts:')
+    for i in range(2000):
+        output.append(u'    fact_{0} => value {0}'.format(i))
+    output.append(u'Activation Keys:')
+    for i in range(500):
+        output.append(u'    {0}) ak{0}'.format(i + 1))
+    return output
+
+
+class ParseInfoCorpusTestCase(unittest2.TestCase):
+    """Compare ``parse_info`` to the original parser on recorded outputs
+    and on a long output
+
+    """
+    @classmethod
+    def setUpClass(cls):
+        """Load the recorded outputs of several ``info`` subcommands."""
+        path = os.path.join(
+            os.path.dirname(__file__), 'data', 'hammer_info.txt')
+        cls.corpus = {}
+        with io.open(path, encoding='utf-8') as handler:
+            for line in handler.read().splitlines():
+                if line.startswith(u'### '):
+                    name = line[4:]
+                    cls.corpus[name] = []
+                elif not line.startswith(u'#'):
+                    cls.corpus[name].append(line)
+
+    def test_parse_info_corpus(self):
+        """Recorded outputs are parsed as the original parser did"""
+        self.assertGreater(len(self.corpus), 5)
+        for name, output in self.corpus.items():
+            self.assertEqual(
+                hammer.parse_info(output),
+                _reference_parse_info(output),
+                name
+            )
+
+    def test_parse_long_info(self):
+        """A long output is parsed as the original parser did"""
+        output = _long_info_output()
+        self.assertEqual(
+            hammer.parse_info(output),
+            _reference_parse_info(output)
+        )
+
+
+#: Help output of each command of a small hammer command tree.
+HELP_OUTPUTS = {
+    u'hammer --help': [
+        u'Usage:',
+        u'    hammer [OPTIONS] SUBCOMMAND [ARG] ...',
+        u'Subcommands:',
+        u' organization                  Manipulate organizations',
+        u'Options:',
+        u' --version                     show version',
+    ],
+    u'hammer organization --help': [
+        u'Subcommands:',
+        u' create                        Create an organization',
+        u' list                          List all organizations',
+    ],
+    u'hammer organization create --help': [
+        u'Options:',
+        u' --name NAME                   Name',
+        u' --label LABEL                 Label',
+    ],
+    u'hammer organization list --help': [
+        u'Options:',
+        u' --per-page PER_PAGE           Number of results per page',
+    ],
+}
+
+
+def _help_result(cmd, **kwargs):
+    """Return the help output of ``cmd``."""
+    return SSHCommandResult(HELP_OUTPUTS[cmd])
+
+
+class CommandTreeTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.cli.hammer.CommandTree`"""
+    def setUp(self):
+        """Write a command tree JSON file"""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'commands.json')
+        self.cache_path = os.path.join(self.directory, 'commands.pickle')
+        self.tree = self.fetch()
+        with io.open(self.path, 'w', encoding='utf-8') as handler:
+            handler.write(six.text_type(self.tree.to_json()))
+
+    def fetch(self, **kwargs):
+        """Fetch the tree from the help outputs, recording the commands."""
+        self.fetched = []
+
+        def command_many(cmds, **kwargs):
+            """Return the help output of each command."""
+            self.fetched.extend(cmds)
+            return [_help_result(cmd) for cmd in cmds]
+
+        with mock.patch('robottelo.ssh.command', side_effect=_help_result):
+            with mock.patch(
+                    'robottelo.ssh.command_many', side_effect=command_many):
+                return hammer.CommandTree.fetch(**kwargs)
+
+    def test_fetch(self):
+        """The tree is built from the help of every command"""
+        self.assertEqual(list(self.tree), [
+            u'hammer',
+            u'hammer organization',
+            u'hammer organization create',
+            u'hammer organization list',
+        ])
+        self.assertEqual(
+            self.tree.options(u'hammer organization create'),
+            set([u'name', u'label']),
+        )
+        self.assertEqual(
+            self.tree.subcommands(u'hammer organization'),
+            set([u'create', u'list']),
+        )
+        self.assertEqual(
+            self.tree[u'hammer organization list']['description'],
+            u'List all organizations',
+        )
+        self.assertIsNone(self.tree.get(u'hammer host'))
+
+    def test_load(self):
+        """The loaded tree is cached as a pickle"""
+        tree = hammer.CommandTree.load(self.path)
+        self.assertEqual(tree.root, self.tree.root)
+        self.assertTrue(os.path.isfile(self.cache_path))
+        with mock.patch('robottelo.cli.hammer.load_json') as load_json:
+            tree = hammer.CommandTree.load(self.path)
+        self.assertEqual(load_json.call_count, 0)
+        self.assertEqual(tree.root, self.tree.root)
+
+    def test_stale_cache(self):
+        """A cache older than the JSON file is not used"""
+        hammer.CommandTree.load(self.path)
+        stat = os.stat(self.cache_path)
+        os.utime(self.path, (stat.st_atime, stat.st_mtime + 10))
+        with mock.patch(
+                'robottelo.cli.hammer.load_json',
+                side_effect=hammer.load_json) as load_json:
+            hammer.CommandTree.load(self.path)
+        self.assertEqual(load_json.call_count, 1)
+
+    def test_broken_cache(self):
+        """A broken cache is replaced"""
+        with open(self.cache_path, 'wb') as handler:
+            handler.write(b'broken')
+        os.utime(self.path, (0, 0))
+        tree = hammer.CommandTree.load(self.path)
+        self.assertEqual(tree.root, self.tree.root)
+        self.assertEqual(
+            len(hammer.CommandTree.load(self.path)), len(self.tree))
+
+    def test_fetch_incremental(self):
+        """Only the subcommands of commands whose help changed are fetched"""
+        tree = self.fetch(previous=hammer.CommandTree.load(self.path))
+        self.assertEqual(self.fetched, [u'hammer organization --help'])
+        self.assertEqual(tree.root, self.tree.root)
+        previous = hammer.CommandTree.load(self.path)
+        previous[u'hammer organization']['help_hash'] = u'changed'
+        previous[u'hammer organization']['subcommands'] = []
+        tree = self.fetch(previous=previous)
+        self.assertEqual(len(self.fetched), 3)
+        self.assertEqual(tree.root, self.tree.root)
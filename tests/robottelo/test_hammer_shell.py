@@ -0,0 +1,232 @@
+"""Tests for module ``robottelo.cli.hammer_shell``."""
+import json
+import six
+import socket
+
+from robottelo.cli import hammer_shell
+from unittest2 import TestCase
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class MockDriverChannel(object):
+    """A mock ``paramiko.Channel`` running the hammer shell driver.
+
+    Each command received is looked up on ``commands``, a dict mapping the
+    command to a ``(stdout, stderr, return_code)`` tuple. Output is received
+    in chunks of at most ``chunk_size`` bytes.
+
+    """
+    def __init__(self, commands=None, start_status=b'ready', chunk_size=7):
+        self.commands = commands or {}
+        self.start_status = start_status
+        self.chunk_size = chunk_size
+        self.cmd = None
+        self.boundary = None
+        self.received = []
+        self.closed = False
+        self.exited = False
+        self._stdout = b''
+        self._stderr = b''
+
+    def exec_command(self, cmd):
+        """Start the driver and report it as loaded."""
+        self.cmd = cmd
+        self.boundary = cmd.split()[-1].encode('ascii')
+        self._finish(b'hammer (0.0.1)\n', b'', self.start_status)
+
+    def _finish(self, stdout, stderr, status):
+        """Queue the output of a command followed by the boundary lines."""
+        self._stdout += stdout + b'\n' + self.boundary + b' ' + status + b'\n'
+        self._stderr += stderr + b'\n' + self.boundary + b' ' + status + b'\n'
+
+    def sendall(self, data):
+        """Run the command received."""
+        command = json.loads(data.decode('utf-8'))[0]
+        self.received.append(command)
+        if command not in self.commands:
+            self.exited = True
+            return
+        stdout, stderr, return_code = self.commands[command]
+        self._finish(stdout, stderr, str(return_code).encode('ascii'))
+
+    def recv_ready(self):
+        """Whether stdout data is available."""
+        return len(self._stdout) > 0
+
+    def recv(self, size):
+        """Return at most ``chunk_size`` bytes of stdout data."""
+        size = min(size, self.chunk_size)
+        data, self._stdout = self._stdout[:size], self._stdout[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        """Whether stderr data is available."""
+        return len(self._stderr) > 0
+
+    def recv_stderr(self, size):
+        """Return at most ``chunk_size`` bytes of stderr data."""
+        size = min(size, self.chunk_size)
+        data, self._stderr = self._stderr[:size], self._stderr[size:]
+        return data
+
+    @property
+    def eof_received(self):
+        """The driver output ends once it exits."""
+        return self.exited and not (self._stdout or self._stderr)
+
+    def exit_status_ready(self):
+        """The exit status is available once the driver exits."""
+        return self.exited
+
+    def close(self):
+        """Mark the channel as closed."""
+        self.closed = True
+
+
+class FramedOutputTestCase(TestCase):
+    """Tests for the splitting of the driver output."""
+    def test_pop(self):
+        """Output is returned only once the whole boundary line is
+        received.
+
+        """
+        output = hammer_shell._FramedOutput(b'BOUNDARY')
+        data = b'first\n\nBOUNDARY 0\n\nBOUNDARY 12\nthird'
+        popped = []
+        for index in range(len(data)):
+            output.feed(data[index:index + 1])
+            result = output.pop()
+            if result is not None:
+                popped.append(result)
+        self.assertEqual(popped, [(b'first\n', b'0'), (b'', b'12')])
+        self.assertEqual(bytes(output.data), b'third')
+
+
+class HammerShellTestCase(TestCase):
+    """Tests for running commands on hammer shells."""
+    def setUp(self):
+        """Run the shells on mock driver channels and use an empty pool."""
+        patcher = mock.patch(
+            'robottelo.cli.hammer_shell._pool',
+            hammer_shell.HammerShellPool(),
+        )
+        self.pool = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('robottelo.cli.hammer_shell.settings')
+        settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings.server.hostname = 'example.com'
+        settings.locale = 'en_US.UTF-8'
+        patcher = mock.patch('robottelo.ssh._open_connection')
+        self.open_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.channels = []
+        self.commands = {
+            u'-u admin -p changeme org list': (b'Id,Name\n1,ACME\n', b'', 0),
+            u'-u admin -p changeme org info': (b'', b'Error: --id\n', 64),
+        }
+
+        def open_session():
+            """Create and record a new mock driver channel."""
+            self.channels.append(MockDriverChannel(self.commands))
+            return self.channels[-1]
+
+        transport = self.open_connection.return_value.get_transport()
+        transport.open_session.side_effect = open_session
+
+    def test_command(self):
+        """Commands run on the same hammer process and get their own
+        output and return code.
+
+        """
+        result = hammer_shell.command(
+            u'-u admin -p changeme org list', 'admin', 'changeme',
+            output_format='csv',
+        )
+        self.assertEqual(result.stdout, [{u'id': u'1', u'name': u'ACME'}])
+        self.assertEqual(result.return_code, 0)
+        result = hammer_shell.command(
+            u'-u admin -p changeme org info', 'admin', 'changeme')
+        self.assertEqual(result.stderr, u'Error: --id\n')
+        self.assertEqual(result.return_code, 64)
+        self.assertEqual(len(self.channels), 1)
+        self.assertTrue(
+            self.channels[0].cmd.startswith(u'LANG=en_US.UTF-8 ruby -e '))
+        self.assertEqual(self.channels[0].received, [
+            u'-u admin -p changeme org list',
+            u'-u admin -p changeme org info',
+        ])
+
+    def test_shell_per_user(self):
+        """Commands of different users never share a hammer process."""
+        self.commands[u'-u other -p secret org list'] = (b'', b'', 0)
+        hammer_shell.command(
+            u'-u admin -p changeme org list', 'admin', 'changeme')
+        hammer_shell.command(u'-u other -p secret org list', 'other', 'secret')
+        hammer_shell.command(
+            u'-u admin -p changeme org list', 'admin', 'changeme')
+        self.assertEqual(len(self.channels), 2)
+        self.assertEqual(len(self.channels[0].received), 2)
+
+    def test_shell_features(self):
+        """Commands using shell features are not run on the shell."""
+        with self.assertRaises(hammer_shell.HammerShellError):
+            hammer_shell.command(
+                u'-u admin -p changeme org list --search "$NAME"',
+                'admin', 'changeme',
+            )
+        self.assertEqual(len(self.channels), 0)
+
+    def test_start_failure(self):
+        """No other shell is started on a host where hammer failed to
+        start.
+
+        """
+        self.open_connection.side_effect = socket.error('refused')
+        for _ in range(2):
+            with self.assertRaises(hammer_shell.HammerShellError):
+                hammer_shell.command(
+                    u'-u admin -p changeme org list', 'admin', 'changeme')
+        self.assertEqual(self.open_connection.call_count, 1)
+
+    def test_driver_load_failure(self):
+        """A driver which fails to load hammer is reported as a start
+        failure.
+
+        """
+        transport = self.open_connection.return_value.get_transport()
+        transport.open_session.side_effect = None
+        transport.open_session.return_value = MockDriverChannel(
+            start_status=b'1')
+        with self.assertRaises(hammer_shell.HammerShellError):
+            hammer_shell.command(
+                u'-u admin -p changeme org list', 'admin', 'changeme')
+        self.assertTrue(transport.open_session.return_value.closed)
+
+    def test_shell_exited(self):
+        """A shell which exits while running a command is not reused."""
+        with self.assertRaises(hammer_shell.HammerShellExited):
+            hammer_shell.command(
+                u'-u admin -p changeme org delete', 'admin', 'changeme')
+        self.assertTrue(self.channels[0].closed)
+        hammer_shell.command(
+            u'-u admin -p changeme org list', 'admin', 'changeme')
+        self.assertEqual(len(self.channels), 2)
+
+    def test_pool_max_size(self):
+        """Only ``max_size`` idle shells are kept running."""
+        self.pool.max_size = 1
+        shells = [
+            self.pool.checkout('example.com', 'C', user, 'changeme')
+            for user in ('admin', 'other')
+        ]
+        for shell in shells:
+            self.pool.checkin(shell)
+        self.assertEqual(self.pool._idle, [shells[1]])
+        self.assertTrue(self.channels[0].closed)
+        self.pool.close_all()
+        self.assertTrue(self.channels[1].closed)
@@ -0,0 +1,38 @@
+"""Tests for module ``robottelo.lazy``."""
+import subprocess
+import sys
+
+from robottelo.lazy import LazyModule
+from unittest2 import TestCase
+
+
+class LazyModuleTestCase(TestCase):
+    """Tests for :class:`robottelo.lazy.LazyModule`."""
+    def test_import_on_attribute_access(self):
+        """The module is imported when an attribute is first accessed."""
+        module = LazyModule('json')
+        self.assertIsNone(module._module)
+        self.assertEqual(module.dumps([1]), '[1]')
+        self.assertIs(module._module, sys.modules['json'])
+
+    def test_import_error(self):
+        """A missing module raises ImportError when used, not before."""
+        module = LazyModule('robottelo_missing_module')
+        with self.assertRaises(ImportError):
+            module.anything
+
+    def test_missing_attribute(self):
+        """A missing attribute raises AttributeError."""
+        module = LazyModule('json')
+        with self.assertRaises(AttributeError):
+            module.robottelo_missing_attribute
+
+    def test_decorators_imports(self):
+        """Importing the decorators does not import the Bugzilla client."""
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys\n'
+            'import robottelo.decorators\n'
+            'print("bugzilla" in sys.modules)'
+        ])
+        self.assertEqual(output.strip(), b'False')
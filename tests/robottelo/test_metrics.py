@@ -0,0 +1,118 @@
+"""Tests for module ``robottelo.cli.metrics``."""
+import csv
+import json
+import os
+import shutil
+import six
+import tempfile
+
+from robottelo.cli import metrics
+from unittest2 import TestCase
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class HistogramTestCase(TestCase):
+    """Tests for :class:`robottelo.cli.metrics.Histogram`."""
+    def test_small_values(self):
+        """Small values are counted exactly."""
+        histogram = metrics.Histogram()
+        for value in range(1, 101):
+            histogram.record(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.min, 1)
+        self.assertEqual(histogram.max, 100)
+        self.assertEqual(histogram.mean, 50.5)
+        self.assertEqual(histogram.percentile(50), 50)
+        self.assertEqual(histogram.percentile(99), 99)
+        self.assertEqual(histogram.percentile(100), 100)
+
+    def test_relative_error(self):
+        """Percentiles of large values are within the bucket precision."""
+        histogram = metrics.Histogram()
+        values = [int(1.37 ** exponent) for exponent in range(20, 60)]
+        for value in values:
+            histogram.record(value)
+        for index, value in enumerate(values):
+            percentile = 100.0 * (index + 1) / len(values)
+            estimate = histogram.percentile(percentile)
+            self.assertGreaterEqual(estimate, value)
+            self.assertLessEqual(estimate, value * 1.02)
+        self.assertEqual(histogram.percentile(100), values[-1])
+        self.assertEqual(
+            sum(count for _, count in histogram.buckets()), len(values))
+
+    def test_empty(self):
+        """An empty histogram has no statistics."""
+        histogram = metrics.Histogram()
+        self.assertIsNone(histogram.mean)
+        self.assertIsNone(histogram.percentile(50))
+        self.assertEqual(histogram.buckets(), [])
+
+
+class CommandMetricsTestCase(TestCase):
+    """Tests for :class:`robottelo.cli.metrics.CommandMetrics`."""
+    def setUp(self):
+        """Record a few metrics."""
+        self.metrics = metrics.CommandMetrics()
+        for wall_time in (0.5, 1.5, 1.0):
+            self.metrics.record(u'org create', 'wall_time', wall_time)
+        self.metrics.record(u'org create', 'output_size', 120)
+        self.metrics.record(u'org list', 'wall_time', 0.25)
+
+    def test_summary(self):
+        """Values are summarized in the unit of each metric."""
+        summary = self.metrics.summary()
+        self.assertEqual(
+            [(row['command'], row['metric']) for row in summary],
+            [(u'org create', 'output_size'), (u'org create', 'wall_time'),
+             (u'org list', 'wall_time')],
+        )
+        self.assertEqual(summary[0]['unit'], 'bytes')
+        self.assertEqual(summary[0]['p50'], 120)
+        wall_time = summary[1]
+        self.assertEqual(wall_time['count'], 3)
+        self.assertEqual(wall_time['total'], 3.0)
+        self.assertEqual(wall_time['min'], 0.5)
+        self.assertEqual(wall_time['max'], 1.5)
+        self.assertAlmostEqual(wall_time['p50'], 1.0, delta=0.01)
+
+    def test_export(self):
+        """Histograms are exported as JSON or CSV."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'metrics.json')
+        self.metrics.export(path)
+        with open(path) as handler:
+            data = json.load(handler)
+        self.assertEqual(data[1]['command'], u'org create')
+        self.assertEqual(sum(count for _, count in data[1]['buckets']), 3)
+        path = os.path.join(directory, 'metrics.csv')
+        self.metrics.export(path)
+        with open(path) as handler:
+            rows = list(csv.DictReader(handler))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2]['command'], 'org list')
+        self.assertEqual(float(rows[2]['max']), 0.25)
+        self.assertNotIn('buckets', rows[2])
+
+    def test_reset(self):
+        """Reset forgets all the histograms."""
+        self.metrics.reset()
+        self.assertEqual(self.metrics.summary(), [])
+        self.assertIsNone(self.metrics.histogram(u'org list', 'wall_time'))
+
+    @mock.patch('robottelo.cli.metrics.settings')
+    def test_export_at_exit(self, settings):
+        """Metrics are exported at exit only when a path is configured."""
+        settings.configured = True
+        settings.hammer.metrics_path = None
+        with mock.patch.object(metrics.metrics, 'export') as export:
+            metrics._export_at_exit()
+            self.assertEqual(export.call_count, 0)
+            settings.hammer.metrics_path = '/tmp/metrics.csv'
+            metrics._export_at_exit()
+            export.assert_called_once_with('/tmp/metrics.csv')
@@ -0,0 +1,199 @@
+"""Tests for module ``robottelo.parallel``."""
+import threading
+import time
+
+from robottelo.parallel import EntityPool, StepGraph
+from unittest2 import TestCase
+
+
+class StepGraphTestCase(TestCase):
+    """Tests for :class:`robottelo.parallel.StepGraph`."""
+    def test_add_unknown_requirement(self):
+        """Steps can only require steps added before them."""
+        graph = StepGraph()
+        with self.assertRaises(ValueError):
+            graph.add('product', lambda results: None, requires=['org'])
+
+    def test_add_duplicate(self):
+        """A step name can only be used once."""
+        graph = StepGraph()
+        graph.add('org', lambda results: None)
+        with self.assertRaises(ValueError):
+            graph.add('org', lambda results: None)
+        with self.assertRaises(ValueError):
+            graph.add_result('org', 1)
+
+    def test_results(self):
+        """Steps receive the results of the steps they require and all the
+        results are returned.
+
+        """
+        graph = StepGraph()
+        graph.add_result('org', 1)
+        graph.add('product', lambda results: results['org'] + 1,
+                  requires=['org'])
+        graph.add('repository', lambda results: results['product'] * 10,
+                  requires=['product'])
+        self.assertEqual(
+            graph.run(), {'org': 1, 'product': 2, 'repository': 20})
+
+    def test_independent_steps_run_concurrently(self):
+        """Independent steps run at the same time, steps requiring them run
+        once they are done.
+
+        """
+        barrier = threading.Condition()
+        started = []
+        finished = []
+
+        def step(name):
+            """Wait until both independent steps are running."""
+            def function(results):
+                with barrier:
+                    started.append(name)
+                    barrier.notify_all()
+                    while len(started) < 2:
+                        barrier.wait(5)
+                return len(started)
+            return function
+
+        graph = StepGraph()
+        graph.add('environment', step('environment'))
+        graph.add('content-view', step('content-view'))
+        graph.add(
+            'promote',
+            lambda results: finished.extend(sorted(results)),
+            requires=['environment', 'content-view'],
+        )
+        results = graph.run()
+        self.assertEqual(results['environment'], 2)
+        self.assertEqual(results['content-view'], 2)
+        self.assertEqual(finished, ['content-view', 'environment'])
+
+    def test_max_workers(self):
+        """No more than ``max_workers`` steps run at the same time."""
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def step(results):
+            """Record how many steps are running."""
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        graph = StepGraph()
+        for index in range(6):
+            graph.add(index, step)
+        graph.run(max_workers=2)
+        self.assertEqual(peak[0], 2)
+
+    def test_error(self):
+        """The first error is raised once the running steps are done, and no
+        other step is started.
+
+        """
+        done = []
+
+        def fail(results):
+            """Fail right away."""
+            raise RuntimeError('failed')
+
+        def slow(results):
+            """Finish after the failure."""
+            time.sleep(0.05)
+            done.append('slow')
+
+        graph = StepGraph()
+        graph.add('fail', fail)
+        graph.add('slow', slow)
+        graph.add('after', lambda results: done.append('after'))
+        with self.assertRaisesRegex(RuntimeError, 'failed'):
+            graph.run(max_workers=2)
+        self.assertEqual(done, ['slow'])
+
+
+class EntityPoolTestCase(TestCase):
+    """Tests for :class:`robottelo.parallel.EntityPool`."""
+    def setUp(self):
+        """Prepare numbered entities, once ``allowed`` is set."""
+        self.allowed = threading.Event()
+        self.allowed.set()
+        self.lock = threading.Lock()
+        self.prepared = []
+
+        def prepare():
+            """Return the next number."""
+            self.allowed.wait(5)
+            with self.lock:
+                self.prepared.append(len(self.prepared))
+                return self.prepared[-1]
+
+        self.pool = EntityPool(prepare, workers=2)
+        self.addCleanup(self.pool.close)
+
+    def wait_ready(self, count):
+        """Wait until ``count`` entities are ready."""
+        for _ in range(500):
+            if self.pool.ready == count:
+                return
+            time.sleep(0.01)
+        self.fail('The pool has {0} entities ready'.format(self.pool.ready))
+
+    def test_not_started(self):
+        """Entities are prepared by the caller of an empty pool."""
+        self.assertEqual(self.pool.get(), 0)
+        self.assertEqual(self.pool.get(), 1)
+        self.assertEqual(self.pool.ready, 0)
+
+    def test_size_callable(self):
+        """A callable size is read and the pool started by the first get."""
+        sizes = []
+        self.pool.size = lambda: sizes.append(2) or 2
+        self.assertEqual(sizes, [])
+        self.assertIn(self.pool.get(), (0, 1))
+        self.wait_ready(2)
+        self.assertEqual(sizes, [2])
+        self.assertEqual(self.pool.size, 2)
+
+    def test_prepared_ahead(self):
+        """Entities are prepared before they are taken, and replaced."""
+        self.pool.start(3)
+        self.wait_ready(3)
+        self.assertIn(self.pool.get(), (0, 1, 2))
+        self.wait_ready(3)
+        self.assertEqual(len(self.prepared), 4)
+
+    def test_wait_for_entity(self):
+        """Callers wait for the entities being prepared."""
+        self.allowed.clear()
+        self.pool.start(1)
+        timer = threading.Timer(0.05, self.allowed.set)
+        timer.start()
+        self.assertEqual(self.pool.get(), 0)
+        timer.join()
+
+    def test_error(self):
+        """The error of a failed preparation is raised by get once."""
+        def fail():
+            """Fail the first time."""
+            self.pool.prepare = lambda: 'entity'
+            raise RuntimeError('failed')
+
+        self.pool.prepare = fail
+        self.pool.start(1)
+        with self.assertRaisesRegex(RuntimeError, 'failed'):
+            self.pool.get()
+        self.assertEqual(self.pool.get(), 'entity')
+
+    def test_close(self):
+        """Closed pools forget their entities and stop preparing them."""
+        self.pool.start(2)
+        self.wait_ready(2)
+        self.pool.close()
+        self.assertEqual(self.pool.ready, 0)
+        self.assertEqual(self.pool.get(), 2)
+        self.assertEqual(self.pool.ready, 0)
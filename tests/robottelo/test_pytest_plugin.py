@@ -0,0 +1,141 @@
+"""Tests for module ``robottelo.pytest_plugin``."""
+import os
+import shutil
+import six
+import tempfile
+
+from robottelo import pytest_plugin
+from unittest2 import TestCase
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+SOURCE = b'''
+from robottelo.decorators import bz_bug_is_open, skip_if_bug_open
+
+
+@skip_if_bug_open('bugzilla', 1)
+@decorators.skip_if_bug_open('redmine', 2)
+def test_positive_create():
+    if bz_bug_is_open('3') or decorators.rm_bug_is_open(4):
+        pass
+    if bz_bug_is_open(bug_id) or bz_bug_is_open('not an ID'):
+        pass
+    skip_if_bug_open(bug_type, 5)
+'''
+
+
+class FindBugLookupsTestCase(TestCase):
+    """Tests for :func:`robottelo.pytest_plugin.find_bug_lookups`."""
+    def test_find_bug_lookups(self):
+        """Only literal bug IDs are found, with their type kept."""
+        self.assertEqual(
+            pytest_plugin.find_bug_lookups(SOURCE),
+            {('bugzilla', 1), ('redmine', 2), ('bugzilla', '3'),
+             ('redmine', 4)}
+        )
+
+
+class SummarizeTestCase(TestCase):
+    """Tests for :func:`robottelo.pytest_plugin.summarize`."""
+    def test_summarize(self):
+        """The trackers latency and errors are summarized."""
+        report = {
+            'bugzilla': {
+                'bugs': 150,
+                'found': 100,
+                'queries': [
+                    {'bugs': 100, 'error': None, 'seconds': 1.5},
+                    {'bugs': 50, 'error': 'Timeout', 'seconds': 30},
+                ],
+                'seconds': 30.1,
+            },
+            'redmine': {
+                'bugs': 2,
+                'found': 2,
+                'queries': [],
+                'seconds': 0.01,
+            },
+        }
+        self.assertEqual(pytest_plugin.summarize([('gw0', report)]), [
+            u'[gw0] bugzilla: 100 of 150 bugs found in 30.10s, 2 queries, '
+            u'slowest 30.00s, 1 failed',
+            u'[gw0] bugzilla query of 50 bugs failed after 30.00s: Timeout',
+            u'[gw0] redmine: 2 of 2 bugs found in 0.01s, from the bug cache',
+        ])
+
+
+class CollectionFinishTestCase(TestCase):
+    """Tests for :func:`robottelo.pytest_plugin.pytest_collection_finish`."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test_module.py')
+        with open(self.path, 'wb') as handler:
+            handler.write(SOURCE)
+        self.session = mock.Mock()
+        self.session.items = [
+            mock.Mock(fspath=self.path), mock.Mock(fspath=self.path)]
+        self.session.config = mock.Mock(spec=[])
+        self.patchers = [
+            mock.patch('robottelo.pytest_plugin._reports', []),
+            mock.patch('robottelo.pytest_plugin.TESTS_DIRECTORY',
+                       self.directory),
+            mock.patch('robottelo.pytest_plugin._configure_settings',
+                       return_value=True),
+            mock.patch('robottelo.pytest_plugin.decorators'),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.decorators = pytest_plugin.decorators
+        self.decorators.prefetch_bugs.return_value = {'redmine': {}}
+
+    def tearDown(self):
+        for patcher in reversed(self.patchers):
+            patcher.stop()
+        shutil.rmtree(self.directory)
+
+    def test_prefetch(self):
+        """The bugs looked up by the tests are prefetched and reported."""
+        pytest_plugin.pytest_collection_finish(self.session)
+        self.assertEqual(
+            set(
+                call[0] for call in
+                self.decorators.reference_bug.call_args_list
+            ),
+            {('bugzilla', 1), ('redmine', 2), ('bugzilla', '3'),
+             ('redmine', 4)}
+        )
+        self.decorators.prefetch_bugs.assert_called_once_with(
+            max_workers=pytest_plugin.PREFETCH_WORKERS)
+        self.assertEqual(pytest_plugin._reports, [(None, {'redmine': {}})])
+
+    def test_xdist_worker(self):
+        """A pytest-xdist worker sends its report to the master."""
+        self.session.config.workeroutput = {}
+        pytest_plugin.pytest_collection_finish(self.session)
+        self.assertEqual(pytest_plugin._reports, [])
+        self.assertEqual(
+            self.session.config.workeroutput,
+            {pytest_plugin.WORKER_OUTPUT_KEY: {'redmine': {}}}
+        )
+        node = mock.Mock()
+        node.gateway.id = 'gw0'
+        node.workeroutput = self.session.config.workeroutput
+        pytest_plugin.pytest_testnodedown(node, None)
+        self.assertEqual(pytest_plugin._reports, [('gw0', {'redmine': {}})])
+
+    def test_other_tests_ignored(self):
+        """Tests outside of the foreman tests are not scanned."""
+        pytest_plugin.TESTS_DIRECTORY = os.path.join(self.directory, 'foreman')
+        pytest_plugin.pytest_collection_finish(self.session)
+        pytest_plugin._configure_settings.assert_not_called()
+        self.decorators.reference_bug.assert_not_called()
+        self.decorators.prefetch_bugs.assert_not_called()
+
+    def test_not_configured(self):
+        """Nothing is prefetched without settings."""
+        pytest_plugin._configure_settings.return_value = False
+        pytest_plugin.pytest_collection_finish(self.session)
+        self.decorators.prefetch_bugs.assert_not_called()
@@ -1,7 +1,11 @@
 """Tests for module ``robottelo.ssh``."""
 # (too-many-public-methods) pylint: disable=R0904
 import os
+import re
+import shutil
 import six
+import subprocess
+import tempfile
 
 from robottelo import ssh
 from unittest2 import TestCase
@@ -58,9 +62,28 @@ class MockSSHClient(object):
         """A no-op stub method."""
         self.close_ += 1
 
+    def get_transport(self):
+        """Return a mock transport which is active until ``close`` is
+        called.
+
+        """
+        transport = mock.Mock()
+        transport.is_active.return_value = self.close_ == 0
+        return transport
+
 
 class SSHTestCase(TestCase):
     """Tests for module ``robottelo.ssh``."""
+    def setUp(self):
+        """Use a fresh connection pool and a mocked ``paramiko.SSHClient``
+        for each test.
+
+        """
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        patcher = mock.patch('robottelo.ssh._pool', ssh.SSHConnectionPool())
+        self.pool = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @mock.patch('robottelo.ssh.settings')
     def test_get_connection(self, settings):
         """Test method ``_get_connection``.
@@ -69,11 +92,10 @@ class SSHTestCase(TestCase):
         ``_call_paramiko_sshclient``) before calling ``_get_connection``.
         Assert that certain parameters are passed to the (mock)
         ``paramiko.SSHClient`` object, and that certain methods on that object
-        are called.
+        are called. The connection is returned to the pool instead of being
+        closed.
 
         """
-        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
-
         key_filename = os.path.join(
             os.path.abspath(__name__), 'data', 'test_dsa.key'
         )
@@ -89,4 +111,585 @@ class SSHTestCase(TestCase):
             self.assertEqual(connection.key_filename, key_filename)
         self.assertEqual(connection.set_missing_host_key_policy_, 1)
         self.assertEqual(connection.connect_, 1)
+        self.assertEqual(connection.close_, 0)
+        self.assertEqual(self.pool.size, 1)
+
+    def test_get_connection_reuse(self):
+        """An idle connection is reused for the same host, user and key."""
+        with ssh._get_connection(  # pylint:disable=W0212
+                'example.com', 'nobody', 'key') as first:
+            pass
+        with ssh._get_connection(  # pylint:disable=W0212
+                'example.com', 'nobody', 'key') as second:
+            self.assertIs(first, second)
+            self.assertEqual(second.connect_, 1)
+        with ssh._get_connection(  # pylint:disable=W0212
+                'other.example.com', 'nobody', 'key') as third:
+            self.assertIsNot(first, third)
+        self.assertEqual(self.pool.size, 2)
+
+    def test_get_connection_not_pooled(self):
+        """A non pooled connection is closed when the caller is done."""
+        with ssh._get_connection(  # pylint:disable=W0212
+                'example.com', 'nobody', 'key', pooled=False) as connection:
+            self.assertEqual(connection.close_, 0)
+        self.assertEqual(connection.close_, 1)
+        self.assertEqual(self.pool.size, 0)
+
+    def test_get_connection_error(self):
+        """A connection is closed and discarded if an error occurs while it
+        is being used.
+
+        """
+        with self.assertRaises(ValueError):
+            with ssh._get_connection(  # pylint:disable=W0212
+                    'example.com', 'nobody', 'key') as connection:
+                raise ValueError()
         self.assertEqual(connection.close_, 1)
+        self.assertEqual(self.pool.size, 0)
+
+    def test_pool_dead_connection(self):
+        """A connection which is not alive anymore is not reused."""
+        key, client = self.pool.checkout('example.com', 'nobody', 'key')
+        self.pool.checkin(key, client)
+        client.close_ = 1
+        _, new_client = self.pool.checkout('example.com', 'nobody', 'key')
+        self.assertIsNot(client, new_client)
+        self.assertEqual(self.pool.size, 0)
+
+    def test_pool_max_size(self):
+        """Connections returned to a full pool are closed."""
+        pool = ssh.SSHConnectionPool(max_size=1)
+        checked_out = [
+            pool.checkout('example.com', 'nobody', 'key') for _ in range(2)]
+        for key, client in checked_out:
+            pool.checkin(key, client)
+        self.assertEqual(pool.size, 1)
+        self.assertEqual(checked_out[0][1].close_, 0)
+        self.assertEqual(checked_out[1][1].close_, 1)
+
+    def test_pool_idle_eviction(self):
+        """Idle connections older than ``idle_timeout`` are closed."""
+        pool = ssh.SSHConnectionPool(idle_timeout=60)
+        with mock.patch('robottelo.ssh.time') as time:
+            time.time.return_value = 1000
+            key, client = pool.checkout('example.com', 'nobody', 'key')
+            pool.checkin(key, client)
+            time.time.return_value = 1061
+            _, new_client = pool.checkout('example.com', 'nobody', 'key')
+        self.assertIsNot(client, new_client)
+        self.assertEqual(client.close_, 1)
+
+    def test_pool_close_all(self):
+        """``close_all`` closes all idle connections."""
+        key, client = self.pool.checkout('example.com', 'nobody', 'key')
+        self.pool.checkin(key, client)
+        self.pool.close_all()
+        self.assertEqual(client.close_, 1)
+        self.assertEqual(self.pool.size, 0)
+
+
+class MockChannel(object):
+    """A mock ``paramiko.Channel``.
+
+    Unless ``stdout`` is provided, the channel echoes the command executed.
+    Unless ``exit_status`` is provided, the command length is the exit status.
+    Data is received in chunks of at most ``chunk_size`` bytes, alternating
+    between stdout and stderr.
+
+    """
+    def __init__(self, stdout=None, stderr=b'', chunk_size=4,
+                 exit_status=None):
+        self.cmd = None
+        self.exit_status = exit_status
+        self.closed = False
+        self.chunk_size = chunk_size
+        self._stdout = stdout
+        self._stderr = stderr
+
+    def settimeout(self, timeout):  # pylint:disable=W0613
+        """A no-op stub method."""
+
+    def gettimeout(self):
+        """Return no timeout."""
+        return None
+
+    def exec_command(self, cmd):
+        """Record the command to be executed."""
+        self.cmd = cmd
+        if self._stdout is None:
+            self._stdout = cmd.encode('utf-8')
+
+    def recv_ready(self):
+        """Whether stdout data is available."""
+        return len(self._stdout) > 0
+
+    def recv(self, size):
+        """Return at most ``chunk_size`` bytes of stdout data."""
+        size = min(size, self.chunk_size)
+        data, self._stdout = self._stdout[:size], self._stdout[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        """Whether stderr data is available."""
+        return len(self._stderr) > 0
+
+    def recv_stderr(self, size):
+        """Return at most ``chunk_size`` bytes of stderr data."""
+        size = min(size, self.chunk_size)
+        data, self._stderr = self._stderr[:size], self._stderr[size:]
+        return data
+
+    @property
+    def eof_received(self):
+        """All output is sent at once, so EOF is reached once it is read."""
+        return not (self._stdout or self._stderr)
+
+    def exit_status_ready(self):
+        """The exit status is available once all output is read."""
+        return self.eof_received
+
+    def recv_exit_status(self):
+        """Return the exit status."""
+        if self.exit_status is None:
+            return len(self.cmd)
+        return self.exit_status
+
+    def close(self):
+        """Mark the channel as closed."""
+        self.closed = True
+
+
+class CommandManyTestCase(TestCase):
+    """Tests for ``robottelo.ssh.command_many``."""
+    @mock.patch('robottelo.ssh._get_connection')
+    def test_command_many(self, get_connection):
+        """All commands run on channels of the same transport and results
+        are returned in order.
+
+        """
+        channels = []
+
+        def open_session():
+            """Create and record a new mock channel."""
+            channels.append(MockChannel())
+            return channels[-1]
+
+        connection = get_connection.return_value.__enter__.return_value
+        transport = connection.get_transport.return_value
+        transport.open_session.side_effect = open_session
+        cmds = ['echo {0}'.format('x' * i) for i in range(5)]
+        results = ssh.command_many(
+            cmds, hostname='example.com', max_channels=2)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(channels), 5)
+        self.assertTrue(all(channel.closed for channel in channels))
+        self.assertEqual([result.stdout for result in results],
+                         [[cmd] for cmd in cmds])
+        self.assertEqual([result.return_code for result in results],
+                         [len(cmd) for cmd in cmds])
+
+
+class StreamTestCase(TestCase):
+    """Tests for the streaming of command output."""
+    def test_iter_channel(self):
+        """stdout and stderr are drained as data is available."""
+        channel = MockChannel(b'12345678', b'abcd')
+        self.assertEqual(
+            list(ssh._iter_channel(channel)),  # pylint:disable=W0212
+            [(False, b'1234'), (True, b'abcd'), (False, b'5678')]
+        )
+
+    @mock.patch('robottelo.ssh._get_connection')
+    def test_command_stream(self, get_connection):
+        """Lines are cleaned and yielded as they are received, and the
+        result is the same as ``command`` one.
+
+        """
+        output = (
+            u'[ INFO 2015-11-05] Rails traffic\n'
+            u'Id,Name\n'
+            u'1,\x1b[32mch\xe5rs\x1b[0m\n'
+            u'2,""\n'
+        ).encode('utf-8')
+        connection = get_connection.return_value.__enter__.return_value
+        stdout = mock.Mock(channel=MockChannel(output, b'err', exit_status=3))
+        connection.exec_command.return_value = (None, stdout, None)
+        stream = ssh.command_stream('hammer', 'example.com')
+        self.assertEqual(
+            list(stream),
+            [u'Id,Name', u'1,ch\xe5rs', u'2,', u''],
+        )
+        self.assertEqual(stream.return_code, 3)
+        self.assertEqual(stream.stderr, u'err')
+        results = []
+        for run in (ssh.command, lambda *args, **kwargs: ssh.command_stream(
+                *args, **kwargs).result()):
+            stdout.channel = MockChannel(output, exit_status=0)
+            results.append(run('hammer', 'example.com', output_format='csv'))
+        self.assertEqual(
+            results[0].stdout,
+            [{u'id': u'1', u'name': u'ch\xe5rs'}, {u'id': u'2', u'name': u''}]
+        )
+        self.assertEqual(results[1].stdout, results[0].stdout)
+        self.assertEqual(results[1].return_code, results[0].return_code)
+
+
+class CommandCacheTestCase(TestCase):
+    """Tests for the caching of ``ssh.command`` results."""
+    def setUp(self):
+        """Run commands on mock channels and use an empty cache."""
+        patcher = mock.patch('robottelo.ssh._cache', ssh.SSHCommandCache())
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('robottelo.ssh._get_connection')
+        self.get_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        connection = self.get_connection.return_value.__enter__.return_value
+
+        def exec_command(cmd, timeout):  # pylint:disable=W0613
+            """Run ``cmd`` on a new mock channel."""
+            channel = MockChannel()
+            channel.exec_command(cmd)
+            return None, mock.Mock(channel=channel), None
+
+        connection.exec_command.side_effect = exec_command
+
+    def test_not_cached_by_default(self):
+        """Commands run every time unless ``cache_ttl`` is provided."""
+        ssh.command('hostname', 'example.com')
+        ssh.command('hostname', 'example.com')
+        self.assertEqual(self.get_connection.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_cached(self):
+        """A cached command runs once per host and each call gets its own
+        copy of the result.
+
+        """
+        result = ssh.command('hostname', 'example.com', cache_ttl=60)
+        result.stdout.append(u'changed')
+        cached = ssh.command('hostname', 'example.com', cache_ttl=60)
+        self.assertEqual(self.get_connection.call_count, 1)
+        self.assertEqual(cached.stdout, [u'hostname'])
+        self.assertEqual(cached.return_code, len('hostname'))
+        ssh.command('hostname', 'other.example.com', cache_ttl=60)
+        ssh.command('uname', 'example.com', cache_ttl=60)
+        self.assertEqual(self.get_connection.call_count, 3)
+
+    @mock.patch('robottelo.ssh.time')
+    def test_expired(self, time):
+        """A cached result is not used after its TTL."""
+        time.time.return_value = 1000
+        ssh.command('hostname', 'example.com', cache_ttl=60)
+        time.time.return_value = 1059
+        ssh.command('hostname', 'example.com', cache_ttl=60)
+        self.assertEqual(self.get_connection.call_count, 1)
+        time.time.return_value = 1060
+        ssh.command('hostname', 'example.com', cache_ttl=60)
+        self.assertEqual(self.get_connection.call_count, 2)
+
+    def test_invalidate_cache(self):
+        """Cached results can be removed by host, by command or all at
+        once.
+
+        """
+        for hostname in ('a.example.com', 'b.example.com'):
+            for cmd in ('hostname', 'uname'):
+                ssh.command(cmd, hostname, cache_ttl=60)
+        ssh.invalidate_cache(cmd='uname')
+        self.assertEqual(len(self.cache), 2)
+        ssh.invalidate_cache(hostname='a.example.com')
+        self.assertEqual(len(self.cache), 1)
+        ssh.command('hostname', 'b.example.com', cache_ttl=60)
+        self.assertEqual(self.get_connection.call_count, 4)
+        ssh.invalidate_cache()
+        self.assertEqual(len(self.cache), 0)
+
+
+def _reference_clean_output(output):
+    """The original, line by line, cleanup of ``ssh.command`` output."""
+    regex = re.compile(r'\x1b\[\d\d?m')
+    output = output.replace('""', '')
+    return [
+        regex.sub('', line)
+        for line in output.split('\n')
+        if not line.startswith('[')
+    ]
+
+
+def _long_output():
+    """Return a 50k lines hammer CSV output with some Rails traffic lines,
+    empty fields and colors.
+
+    """
+    lines = [u'Id,Name,Description,Label']
+    for i in range(50000):
+        if i % 1000 == 0:
+            lines.append(u'[ INFO 2015-11-05 Rails traffic {0}]'.format(i))
+        lines.append(
+            u'{0},name-{0},"",\x1b[3{1}mlabel-{0}\x1b[0m'.format(i, i % 8))
+    return u'\n'.join(lines) + u'\n'
+
+
+class CleanOutputTestCase(TestCase):
+    """Tests for the ``ssh.command`` output cleanup."""
+    @classmethod
+    def setUpClass(cls):
+        """Build a long output, with and without colors."""
+        cls.colored = _long_output()
+        cls.plain = re.sub(r'\x1b\[\d\d?m', '', cls.colored)
+
+    def test_clean_output(self):
+        """The output without colors, which skips the color codes removal,
+        and the colored output are cleaned as the original cleanup did.
+
+        """
+        for output in (self.colored, self.plain):
+            self.assertEqual(
+                ssh._clean_output(output),  # pylint:disable=W0212
+                _reference_clean_output(output),
+            )
+
+
+class LocalSFTPFile(object):
+    """A mock ``paramiko.SFTPFile`` backed by a local file."""
+    def __init__(self, path, mode):
+        self.handler = open(path, mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def readv(self, chunks):
+        """Read each ``(offset, length)`` chunk."""
+        for offset, length in chunks:
+            self.handler.seek(offset)
+            yield self.handler.read(length)
+
+    def set_pipelined(self, pipelined):  # pylint:disable=W0613
+        """A no-op stub method."""
+
+    def __getattr__(self, name):
+        return getattr(self.handler, name)
+
+
+class LocalSFTPClient(object):
+    """A mock ``paramiko.SFTPClient`` operating on local files.
+
+    :param int fail_after: number of bytes that can be read or written by
+        each file before raising ``IOError``.
+
+    """
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+
+    def open(self, path, mode):
+        """Open a local file."""
+        sftp_file = LocalSFTPFile(path, mode)
+        if self.fail_after is not None:
+            budget = [self.fail_after]
+            write = sftp_file.handler.write
+
+            def failing_write(data):
+                """Raise ``IOError`` once the budget is exhausted."""
+                if len(data) > budget[0]:
+                    raise IOError('Connection lost')
+                budget[0] -= len(data)
+                write(data)
+            sftp_file.write = failing_write
+        return sftp_file
+
+    def stat(self, path):  # pylint:disable=R0201
+        """Stat a local file."""
+        return os.stat(path)
+
+    def truncate(self, path, size):  # pylint:disable=R0201
+        """Truncate a local file."""
+        with open(path, 'r+b') as handler:
+            handler.truncate(size)
+
+    def close(self):
+        """A no-op stub method."""
+
+
+class TransferTestCase(TestCase):
+    """Tests for ``upload_file`` and ``download_file``."""
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.source = os.path.join(self.tmpdir, 'source')
+        self.destination = os.path.join(self.tmpdir, 'destination')
+        self.content = os.urandom(100000)
+        with open(self.source, 'wb') as handler:
+            handler.write(self.content)
+        self.sftp = LocalSFTPClient()
+        patcher = mock.patch('robottelo.ssh._get_connection')
+        get_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        connection = get_connection.return_value.__enter__.return_value
+        connection.open_sftp.side_effect = lambda: self.sftp
+        for name in ('SFTP_BLOCK_SIZE', 'SFTP_MIN_PART_SIZE'):
+            patcher = mock.patch('robottelo.ssh.{0}'.format(name), 1000)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            'robottelo.ssh._remote_checksum',
+            lambda path, hostname: ssh._local_checksum(path),  # noqa pylint:disable=W0212
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_transferred(self):
+        """Assert the destination is identical to the source."""
+        with open(self.destination, 'rb') as handler:
+            self.assertEqual(handler.read(), self.content)
+
+    def test_split_parts(self):
+        """Parts have at least ``SFTP_MIN_PART_SIZE`` bytes and cover the
+        whole range.
+
+        """
+        split_parts = ssh._split_parts  # pylint:disable=W0212
+        self.assertEqual(split_parts(0, 2500, 4), [(0, 1250), (1250, 1250)])
+        self.assertEqual(split_parts(500, 2500, 1), [(500, 2000)])
+        self.assertEqual(
+            split_parts(0, 3001, 3), [(0, 1001), (1001, 1001), (2002, 999)])
+        self.assertEqual(split_parts(10, 10, 4), [(10, 0)])
+
+    def test_download_file(self):
+        """Files are downloaded as a single stream or in parallel parts."""
+        for workers in (1, 8):
+            stats = ssh.download_file(
+                self.source, self.destination, workers=workers, verify=True)
+            self.assert_transferred()
+            self.assertEqual(stats.transferred, len(self.content))
+
+    def test_upload_file(self):
+        """Files are uploaded as a single stream or in parallel parts."""
+        for workers in (1, 8):
+            stats = ssh.upload_file(
+                self.source, self.destination, workers=workers, verify=True)
+            self.assert_transferred()
+            self.assertEqual(stats.transferred, len(self.content))
+
+    def test_upload_file_object(self):
+        """File-like objects are uploaded as a single stream."""
+        self.sftp.putfo = mock.Mock(
+            return_value=mock.Mock(st_size=len(self.content)))
+        stats = ssh.upload_file(six.BytesIO(self.content), self.destination)
+        self.assertEqual(self.sftp.putfo.call_count, 1)
+        self.assertEqual(stats.size, len(self.content))
+
+    def test_resume_download(self):
+        """A failed download is truncated to its contiguous data and can be
+        resumed.
+
+        """
+        with open(self.destination, 'wb') as handler:
+            handler.write(self.content[:10000])
+        # Writes to each opened local file fail after 20000 bytes
+        failing_sftp = LocalSFTPClient(fail_after=20000)
+        with mock.patch(
+                'robottelo.ssh.open', failing_sftp.open, create=True):
+            with self.assertRaises(IOError):
+                ssh.download_file(
+                    self.source, self.destination, workers=4, resume=True)
+        self.assertEqual(os.path.getsize(self.destination), 30000)
+        stats = ssh.download_file(
+            self.source, self.destination, resume=True, verify=True)
+        self.assert_transferred()
+        self.assertEqual(stats.transferred, len(self.content) - 30000)
+
+    def test_resume_upload(self):
+        """A failed upload is truncated to its contiguous data and can be
+        resumed.
+
+        """
+        self.sftp.fail_after = 20000
+        with self.assertRaises(IOError):
+            ssh.upload_file(self.source, self.destination, workers=4)
+        self.assertEqual(os.path.getsize(self.destination), 20000)
+        self.sftp.fail_after = None
+        stats = ssh.upload_file(
+            self.source, self.destination, resume=True, verify=True)
+        self.assert_transferred()
+        self.assertEqual(stats.transferred, len(self.content) - 20000)
+
+    def test_verify(self):
+        """A checksum mismatch raises ``TransferError``."""
+        with mock.patch('robottelo.ssh._remote_checksum', return_value='x'):
+            with self.assertRaises(ssh.TransferError):
+                ssh.download_file(self.source, self.destination, verify=True)
+
+
+class BatchTestCase(TestCase):
+    """Tests for ``robottelo.ssh.batch``."""
+    def setUp(self):
+        """Run the batch scripts on a local shell."""
+        patcher = mock.patch('robottelo.ssh._get_connection')
+        self.get_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        connection = self.get_connection.return_value.__enter__.return_value
+
+        def exec_command(script, timeout):  # pylint:disable=W0613
+            """Run ``script`` with ``sh`` and return its output on a mock
+            channel.
+
+            """
+            process = subprocess.Popen(
+                ['sh', '-c', script],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            stdout, stderr = process.communicate()
+            channel = MockChannel(
+                stdout, stderr, 1024, exit_status=process.returncode)
+            return None, mock.Mock(channel=channel), None
+
+        connection.exec_command.side_effect = exec_command
+
+    def test_batch(self):
+        """All commands run on one round trip and each one gets the same
+        result it would get from ``ssh.command``.
+
+        """
+        with ssh.batch('example.com') as commands:
+            failed = commands.command('echo out; echo err >&2; exit 3')
+            partial = commands.command("printf 'no newline'")
+            quoted = commands.command("echo \"it's\" '$HOME'")
+            csv = commands.command(
+                "printf 'Id,Name\\n1,foo\\n'", output_format='csv')
+            empty = commands.command('true')
+        self.assertEqual(self.get_connection.call_count, 1)
+        self.assertEqual(failed.result.stdout, [u'out', u''])
+        self.assertEqual(failed.result.stderr, u'err\n')
+        self.assertEqual(failed.result.return_code, 3)
+        self.assertEqual(partial.result.stdout, [u'no newline'])
+        self.assertEqual(partial.result.return_code, 0)
+        self.assertEqual(quoted.result.stdout, [u"it's $HOME", u''])
+        self.assertEqual(csv.result.stdout, [{u'id': u'1', u'name': u'foo'}])
+        self.assertEqual(empty.result.stdout, b'')
+        self.assertEqual(empty.result.stderr, b'')
+        self.assertEqual(empty.result.return_code, 0)
+
+    def test_batch_interrupted(self):
+        """Commands not reached get the script exit status."""
+        with ssh.batch('example.com') as commands:
+            first = commands.command('echo first')
+            commands.command('kill -9 $$')
+            last = commands.command('echo last')
+        self.assertEqual(first.result.stdout, [u'first', u''])
+        self.assertEqual(last.result.stdout, b'')
+        self.assertEqual(last.result.return_code, -9)
+
+    def test_batch_not_run_on_error(self):
+        """Nothing runs if the block raises an exception."""
+        with self.assertRaises(ValueError):
+            with ssh.batch('example.com') as commands:
+                command = commands.command('echo')
+                raise ValueError()
+        self.assertIsNone(command.result)
+        self.assertEqual(self.get_connection.call_count, 0)
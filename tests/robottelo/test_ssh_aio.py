@@ -0,0 +1,123 @@
+"""Tests for module ``robottelo.ssh.aio``."""
+import os
+import six
+import unittest2
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+    import asyncio
+    from robottelo.ssh import aio
+
+
+class MockChannel(object):
+    """A mock ``paramiko.Channel`` which echoes the command executed.
+
+    The channel file descriptor is a real pipe, so the event loop can watch
+    it, which becomes readable when the command output is available.
+
+    """
+    running = 0
+    max_running = 0
+
+    def __init__(self):
+        self.cmd = None
+        self.eof_received = False
+        self.closed = False
+        self._stdout = b''
+        self._read_fd, self._write_fd = os.pipe()
+
+    def exec_command(self, cmd):
+        """Record the command and make its output available."""
+        self.cmd = cmd
+        self._stdout = cmd.encode('utf-8')
+        MockChannel.running += 1
+        MockChannel.max_running = max(
+            MockChannel.max_running, MockChannel.running)
+        os.write(self._write_fd, b'x')
+
+    def setblocking(self, blocking):  # pylint:disable=W0613
+        """A no-op stub method."""
+
+    def fileno(self):
+        """Return the pipe read end."""
+        return self._read_fd
+
+    def recv_ready(self):
+        """Whether stdout data is available."""
+        return len(self._stdout) > 0
+
+    def recv(self, size):
+        """Return the stdout data and mark the end of the stream."""
+        data, self._stdout = self._stdout[:size], self._stdout[size:]
+        if not self._stdout:
+            self.eof_received = True
+        return data
+
+    def recv_stderr_ready(self):
+        """No stderr data is ever available."""
+        return False
+
+    def exit_status_ready(self):
+        """The exit status is available once all output is read."""
+        return self.eof_received
+
+    def recv_exit_status(self):
+        """Return 0 as the exit status."""
+        return 0
+
+    def close(self):
+        """Close the pipe."""
+        if not self.closed:
+            MockChannel.running -= 1
+            os.close(self._read_fd)
+            os.close(self._write_fd)
+            self.closed = True
+
+
+@unittest2.skipIf(six.PY2, 'asyncio requires Python 3')
+class AsyncSSHClientTestCase(unittest2.TestCase):
+    """Tests for ``robottelo.ssh.aio.AsyncSSHClient``."""
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        MockChannel.running = MockChannel.max_running = 0
+        self.client = mock.Mock()
+        self.client.get_transport.return_value.open_session.side_effect = (
+            MockChannel)
+        patcher = mock.patch(
+            'robottelo.ssh._open_connection', return_value=self.client)
+        self.open_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('robottelo.ssh.aio.settings')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_command(self):
+        """Commands results are returned in order, all commands sharing a
+        single connection to the host.
+
+        """
+        client = aio.AsyncSSHClient(loop=self.loop)
+        cmds = ['echo {0}'.format(i) for i in range(25)]
+        results = self.loop.run_until_complete(asyncio.gather(
+            *[client.command(cmd, 'example.com') for cmd in cmds],
+            loop=self.loop
+        ))
+        self.assertEqual([result.stdout for result in results],
+                         [[cmd] for cmd in cmds])
+        self.assertEqual(self.open_connection.call_count, 1)
+        self.assertEqual(MockChannel.running, 0)
+
+    def test_max_concurrency(self):
+        """No more than ``max_concurrency`` commands run on a host at the
+        same time.
+
+        """
+        client = aio.AsyncSSHClient(max_concurrency=3, loop=self.loop)
+        self.loop.run_until_complete(asyncio.gather(
+            *[client.command('true', 'example.com') for _ in range(10)],
+            loop=self.loop
+        ))
+        self.assertLessEqual(MockChannel.max_running, 3)
@@ -3,9 +3,9 @@ import six
 import unittest2
 
 if six.PY2:
-    from mock import call, patch
+    from mock import patch
 else:
-    from unittest.mock import call, patch
+    from unittest.mock import patch
 
 from robottelo import ssh
 from robottelo.vm import VirtualMachine, VirtualMachineError
@@ -88,9 +88,9 @@ class VirtualMachineTestCase(unittest2.TestCase):
         with self.assertRaises(VirtualMachineError):
             vm.run('ls')
 
-    @patch('robottelo.ssh.command')
-    def test_destroy(self, ssh_command):
-        """Check if destroy runs the required ssh commands"""
+    @patch.object(ssh.SSHCommandBatch, 'run', autospec=True)
+    def test_destroy(self, batch_run):
+        """Check if destroy runs the required ssh commands in a batch"""
         self.configure_provisoning_server()
         image_dir = '/opt/robottelo/images'
         vm = VirtualMachine()
@@ -102,15 +102,51 @@ class VirtualMachineTestCase(unittest2.TestCase):
         ):
             vm.destroy()
 
-        self.assertEqual(ssh_command.call_count, 3)
-
-        ssh_command_args_list = [
-            call('virsh destroy {0}'.format(vm.hostname),
-                 hostname=self.provisioning_server),
-            call('virsh undefine {0}'.format(vm.hostname),
-                 hostname=self.provisioning_server),
-            call('rm {0}/{1}.img'.format(image_dir, vm.hostname),
-                 hostname=self.provisioning_server),
-        ]
+        self.assertEqual(batch_run.call_count, 1)
+        batch = batch_run.call_args[0][0]
+        self.assertEqual(batch.hostname, self.provisioning_server)
+        self.assertListEqual(
+            [command.cmd for command in batch.commands],
+            [
+                'virsh destroy {0}'.format(vm.hostname),
+                'virsh undefine {0}'.format(vm.hostname),
+                'rm {0}/{1}.img'.format(image_dir, vm.hostname),
+            ]
+        )
 
-        self.assertListEqual(ssh_command.call_args_list, ssh_command_args_list)
+    @patch('robottelo.ssh.command')
+    @patch.object(ssh.SSHCommandBatch, 'run', autospec=True)
+    def test_configure_puppet_rhel_repo(self, batch_run, ssh_command):
+        """Check configure_puppet adds the same repository file as
+        configure_rhel_repo
+        """
+        self.configure_provisoning_server()
+        self.settings.server.hostname = 'satellite.example.com'
+        repo = 'http://example.com/rhel7.repo'
+        batches = []
+
+        def run(batch):
+            batches.append([command.cmd for command in batch.commands])
+            for command in batch.commands:
+                command.result = ssh.SSHCommandResult()
+        batch_run.side_effect = run
+        vm = VirtualMachine()
+        with patch.multiple(vm, _created=True, ip_addr='192.168.0.1'):
+            vm.configure_rhel_repo(repo)
+            vm.configure_puppet(repo)
+
+        repo_command = ssh_command.call_args_list[0][0][0]
+        self.assertEqual(
+            repo_command,
+            'wget -O /etc/yum.repos.d/rhel.repo {0}'.format(repo)
+        )
+        self.assertEqual(batches[0][0], repo_command)
+
+    def test_configure_puppet_raises_exception(self):
+        """Check configure_puppet raises an exception if the vm is not
+        created
+        """
+        self.configure_provisoning_server()
+        vm = VirtualMachine()
+        with self.assertRaises(VirtualMachineError):
+            vm.configure_puppet('http://example.com/rhel7.repo')